@@ -6,7 +6,8 @@ from xhs import XhsClient
 
 from conf import BASE_DIR
 from utils.files_times import generate_schedule_time_next_day, get_title_and_hashtags
-from  src.core.uploader.xhs_uploader.main import sign_local, beauty_print
+from src.core.uploader.xhs_uploader.main import beauty_print
+from src.core.signer.router import get_signer
 
 config = configparser.RawConfigParser()
 config.read(Path(BASE_DIR / "src" / "core" / "uploader" / "xhs_uploader" / "accounts.ini"))
@@ -23,7 +24,7 @@ if __name__ == '__main__':
     file_num = len(files)
 
     cookies = config['account1']['cookies']
-    xhs_client = XhsClient(cookies, sign=sign_local, timeout=60)
+    xhs_client = XhsClient(cookies, sign=get_signer(), timeout=60)
     # auth cookie
     # 注意：该校验cookie方式可能并没那么准确
     try:
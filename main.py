@@ -18,6 +18,10 @@ from src.core.pages.cookie_manager import CookieManagerPage
 from src.core.pages.history import HistoryPage
 from src.core.pages.favorite import FavoritePage
 from src.logger.logger import Logger
+from src.core.signer.pool import a1_from_cookie, close_signer_pool, warm_up_signer_pool
+from src.core.processor.http_client import close_http_client
+from src.core.processor.llm import get_llm_router
+from src.core.signer.router import get_signer
 
 # 设置日志文件路径
 log_path = os.path.expanduser('~/Desktop/xhsai_error.log')
@@ -42,6 +46,9 @@ class XiaohongshuUI(QMainWindow):
 
         self.logger.success("小红书发文助手启动")
 
+        # 签名统计写入应用日志
+        self.signer = get_signer(self.logger)
+
         self.setWindowTitle("✨ 小红书发文助手")
 
         self.setStyleSheet(f"""
@@ -218,11 +225,26 @@ class XiaohongshuUI(QMainWindow):
             self.home_page.handle_preview_result)
         self.browser_thread.preview_error.connect(
             self.home_page.handle_preview_error)
+        self.browser_thread.video_success.connect(
+            self.video_page.handle_publish_result)
+        self.browser_thread.video_error.connect(
+            self.video_page.handle_publish_error)
+        self.browser_thread.upload_progress.connect(
+            self.update_upload_progress)
+        self.browser_thread.upload_progress.connect(
+            self.video_page.handle_upload_progress)
+        self.browser_thread.action_cancelled.connect(
+            self.home_page.handle_action_cancelled)
+        self.browser_thread.action_cancelled.connect(
+            self.video_page.handle_action_cancelled)
         self.browser_thread.start()
         
         # 启动下载器线程
         self.start_downloader_thread()
 
+        # 后台预热签名浏览器
+        self.start_signer_warmup()
+
     def center(self):
         """将窗口移动到屏幕中央"""
         # 获取屏幕几何信息
@@ -249,6 +271,10 @@ class XiaohongshuUI(QMainWindow):
             preview_btn.setText(text)
             preview_btn.setEnabled(enabled)
 
+    def update_upload_progress(self, account_id, percent, speed):
+        """显示视频上传进度"""
+        self.logger.info(f"[{account_id}] 视频上传 {percent:.0f}%，{speed / 1024 / 1024:.2f}MB/s")
+
     def switch_page(self, index):
         # 切换页面
         self.stack.setCurrentIndex(index)
@@ -266,7 +292,7 @@ class XiaohongshuUI(QMainWindow):
             # 停止所有线程
             if hasattr(self, 'browser_thread'):
                 self.browser_thread.stop()
-                self.browser_thread.wait(1000)  # 等待最多1秒
+                self.browser_thread.wait(5000)  # 等待浏览器资源释放，最多5秒
                 if self.browser_thread.isRunning():
                     self.browser_thread.terminate()  # 强制终止
                     self.browser_thread.wait()  # 等待终止完成
@@ -279,6 +305,13 @@ class XiaohongshuUI(QMainWindow):
                 self.image_processor.terminate()
                 self.image_processor.wait()
 
+            # 记录签名统计并关闭签名浏览器
+            self.signer.log_stats()
+            close_signer_pool()
+            # 记录文案生成后端统计，关闭内容生成的 HTTP 连接池
+            get_llm_router().log_stats()
+            close_http_client()
+
             # 清理资源
             self.images = []
             self.image_list = []
@@ -325,6 +358,33 @@ class XiaohongshuUI(QMainWindow):
         except Exception as e:
             self.logger.error(f"启动下载器线程时出错: {str(e)}")
             
+    def start_signer_warmup(self):
+        """在后台预热签名浏览器，首次发布或查询话题时无需等待浏览器冷启动"""
+        try:
+            if not self.config.get_signer_config().get('prewarm', True):
+                return
+
+            # 为已保存的账号提前建立签名上下文
+            a1_values = []
+            account_manager = self.home_page.account_manager
+            latest_account = account_manager.get_latest_account()
+            if latest_account:
+                a1_values.append(a1_from_cookie(account_manager.get_account_cookies(latest_account)))
+            a1_values.append(a1_from_cookie(self.video_page.get_account_cookies()))
+
+            self.signer_warmup = warm_up_signer_pool(a1_values)
+            self.signer_warmup.add_done_callback(self._on_signer_warmed)
+        except Exception as e:
+            self.logger.error(f"启动签名浏览器预热时出错: {str(e)}")
+
+    def _on_signer_warmed(self, future):
+        """签名浏览器预热完成回调（在签名线程中执行）"""
+        try:
+            elapsed = future.result()
+            self.logger.success(f"签名浏览器预热完成，耗时 {elapsed:.1f}s")
+        except Exception as e:
+            self.logger.error(f"签名浏览器预热失败: {str(e)}")
+
     def stop_downloader(self):
         """关闭下载器"""
         try:
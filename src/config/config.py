@@ -1,5 +1,32 @@
+import copy
 import json
 import os
+import threading
+
+from src.core.atomic_file import atomic_open
+
+# 同一进程中有多个 Config 实例，读取合并和写入配置文件时互斥
+_config_lock = threading.Lock()
+_MISSING = object()
+
+
+def merge_changes(base, mine, theirs):
+    """把本实例相对 base 的修改合并到文件中的最新配置 theirs 上
+
+    只有本实例改过的项才覆盖文件中的值，其他实例在此期间保存的修改得以保留；两边都是字典时逐项合并。
+    """
+    merged = dict(theirs)
+    for key in set(base) | set(mine):
+        old, new = base.get(key, _MISSING), mine.get(key, _MISSING)
+        if old == new:
+            continue
+        if new is _MISSING:
+            merged.pop(key, None)
+        elif isinstance(old, dict) and isinstance(new, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_changes(old, new, merged[key])
+        else:
+            merged[key] = new
+    return merged
 
 
 class Config:
@@ -23,50 +50,132 @@ class Config:
                 "title": "测试标题",
             },
             "phone": "18888888888",
+            "signer": {
+                "pool_size": 2,
+                "headless": True,
+                "max_uses": 500,
+                "health_interval": 60,
+                "max_contexts": 8,
+                "min_free_memory_mb": 512,
+                # 嵌入式 JS 引擎签名使用的脚本（定义 window._webmsxyw），为空则不启用
+                "js_path": "",
+                # 统一签名器可用的后端：pool 本地浏览器池，remote 签名服务，js 嵌入式 JS 引擎
+                "backends": ["pool", "remote", "js"],
+                # 启动时在后台预热签名浏览器
+                "prewarm": True,
+            },
+            "browser": {
+                # 使用 ~/.xhs_system/browser_profile 持久化浏览器用户目录
+                "persistent_profile": False,
+                "profile_dir": "",
+                # 发布次数或浏览器进程内存超过阈值时回收重启浏览器
+                "max_posts_per_browser": 50,
+                "max_browser_rss_mb": 1500,
+                # 有等待检查的草稿标签页时推迟回收，最多等待的分钟数
+                "draft_idle_minutes": 30,
+                # 同时执行的浏览器操作数，0 表示按 CPU 核数和可用内存自动计算
+                "max_concurrent_actions": 0,
+                "memory_per_context_mb": 300,
+            },
+            # 创作者页面资源拦截，可另外配置 blocked_types / blocked_patterns /
+            # allowed_patterns / stub_patterns 覆盖默认规则。
+            # 注册拦截路由后 Playwright 会关闭 HTTP 缓存：临时上下文本来就没有缓存，拦截更划算；
+            # 持久化用户目录默认不拦截以保留缓存和 service worker，route_persistent_profile 为 True 时也拦截；
+            # 拦截的上下文按 baseline_sample_rate 抽样放行整次导航，测量节省的加载时间
+            "resource_policy": {
+                "enabled": True,
+                "route_persistent_profile": False,
+                "baseline_sample_rate": 0.05,
+            },
+            # 内容生成：批量生成时同时请求的主题数，单次生成的总超时（秒），结果缓存的有效期和大小上限
+            "generation": {
+                "batch_concurrency": 3,
+                "timeout": 300,
+                "cache_ttl_hours": 72,
+                "cache_max_mb": 50,
+            },
+            # 内容生成等外部 API 请求：超时（秒）和 5xx 重试次数
+            "http": {
+                "connect_timeout": 10,
+                "read_timeout": 180,
+                "retries": 3,
+                "backoff": 1.0,
+            },
+            # 文案生成后端：workflow 远程工作流，ollama 本地模型；按延迟和健康状态选择
+            "llm": {
+                "backends": ["workflow", "ollama"],
+                "ollama_url": "http://127.0.0.1:11434",
+                "ollama_model": "qwen2.5:14b",
+                "health_interval": 60,
+            },
         }
         self.load_config()
 
+    def _read_file(self):
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
     def load_config(self):
         """加载配置"""
+        # 上次读取或保存时文件中的配置，保存时据此判断本实例改过哪些项
+        self._saved = {}
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-                # 确保所有默认配置项都存在
-                self._ensure_default_config()
+                with _config_lock:
+                    self.config = self._read_file()
+                    self._saved = copy.deepcopy(self.config)
+                # 确保所有默认配置项都存在，缺少时才写回文件
+                if self._ensure_default_config():
+                    self.save_config()
             else:
-                self.config = self.default_config
+                self.config = copy.deepcopy(self.default_config)
                 self.save_config()
         except Exception as e:
             print(f"加载配置失败: {str(e)}")
-            self.config = self.default_config
-            self.save_config()
+            self.config = copy.deepcopy(self.default_config)
+            # 文件存在但无法解析时不用默认配置覆盖，避免丢失账号等数据
+            if not os.path.exists(self.config_file):
+                self.save_config()
 
     def _ensure_default_config(self):
-        """确保所有默认配置项都存在"""
+        """确保所有默认配置项都存在，返回是否补充了缺失的项"""
+        added = False
         # 检查并添加缺失的顶级配置项
         for key, value in self.default_config.items():
             if key not in self.config:
-                self.config[key] = value
+                self.config[key] = copy.deepcopy(value)
+                added = True
         
         # 检查并添加缺失的嵌套配置项
-        if 'title_edit' in self.config:
-            for key, value in self.default_config['title_edit'].items():
-                if key not in self.config['title_edit']:
-                    self.config['title_edit'][key] = value
-        else:
-            self.config['title_edit'] = self.default_config['title_edit']
-        
-        # 保存更新后的配置
-        self.save_config()
+        for section, defaults in self.default_config.items():
+            if not isinstance(defaults, dict):
+                continue
+            if not isinstance(self.config.get(section), dict):
+                self.config[section] = copy.deepcopy(defaults)
+                added = True
+                continue
+            for key, value in defaults.items():
+                if key not in self.config[section]:
+                    self.config[section][key] = copy.deepcopy(value)
+                    added = True
+        return added
 
     def save_config(self):
-        """保存配置"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"保存配置失败: {str(e)}")
+        """保存配置：重新读取文件，只写入本实例改过的项，不覆盖其他实例在此期间保存的修改"""
+        with _config_lock:
+            try:
+                try:
+                    current = self._read_file()
+                except (OSError, ValueError):
+                    current = None
+                if isinstance(current, dict):
+                    self.config = merge_changes(self._saved, self.config, current)
+                # 每次写入独立的临时文件后重命名，其他进程不会读到写了一半的配置
+                with atomic_open(self.config_file) as f:
+                    json.dump(self.config, f, indent=4, ensure_ascii=False)
+                self._saved = copy.deepcopy(self.config)
+            except Exception as e:
+                print(f"保存配置失败: {str(e)}")
 
     def get_app_config(self):
         """获取app配置"""
@@ -104,6 +213,30 @@ class Config:
         self.config['title_edit']['author'] = author
         self.save_config()
 
+    def get_signer_config(self):
+        """获取签名浏览器池配置"""
+        return self.config.get('signer', self.default_config['signer'])
+
+    def get_browser_config(self):
+        """获取发布浏览器配置"""
+        return self.config.get('browser', self.default_config['browser'])
+
+    def get_resource_policy_config(self):
+        """获取资源拦截配置"""
+        return self.config.get('resource_policy', self.default_config['resource_policy'])
+
+    def get_http_config(self):
+        """获取 HTTP 客户端配置"""
+        return self.config.get('http', self.default_config['http'])
+
+    def get_generation_config(self):
+        """获取内容生成配置"""
+        return self.config.get('generation', self.default_config['generation'])
+
+    def get_llm_config(self):
+        """获取文案生成后端配置"""
+        return self.config.get('llm', self.default_config['llm'])
+
     def add_account(self, account_name, cookie):
         """添加账号"""
         if not account_name.startswith(('account_', 'phone_')):
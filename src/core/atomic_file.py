@@ -0,0 +1,27 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_open(path, mode='w', encoding='utf-8'):
+    """写入同目录下的独立临时文件，完成后原子替换目标文件
+
+    每次写入使用 mkstemp 生成的唯一文件名，多个线程同时保存同一个文件时不会互相覆盖临时文件，
+    读取方只会看到完整的旧文件或新文件；写入出错时删除临时文件，目标文件保持不变。
+    """
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_file = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
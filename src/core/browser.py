@@ -1,8 +1,16 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 import asyncio
+import threading
+import uuid
 
+from src.core.browser_manager import BrowserManager
+from src.core.cookie_jar import cookie_header, flush_all
+from src.core.dispatcher import ActionDispatcher
 from src.core.write_xiaohongshu import XiaohongshuPoster
 
+# 放入队列表示停止主循环
+_STOP = object()
+
 
 class BrowserThread(QThread):
     # 添加信号
@@ -12,13 +20,38 @@ class BrowserThread(QThread):
     login_error = pyqtSignal(str)  # 用于传递错误信息
     preview_success = pyqtSignal()  # 用于通知预览成功
     preview_error = pyqtSignal(str)  # 用于传递预览错误信息
+    video_success = pyqtSignal()  # 视频已上传并填好发布页
+    video_error = pyqtSignal(str)  # 视频发布错误信息
+    upload_progress = pyqtSignal(str, float, float)  # 账号、上传百分比、速度（字节/秒）
+    action_cancelled = pyqtSignal(str)  # 被取消的动作 ID
 
     def __init__(self):
         super().__init__()
-        self.poster = None
-        self.action_queue = []
+        # 所有账号共享一个浏览器进程，每个账号一个独立的上下文
+        self.browser_manager = BrowserManager()
+        self.posters = {}  # account_id -> XiaohongshuPoster
+        self.current_account = None
         self.is_running = True
         self.loop = None
+        # 事件循环启动后创建的动作队列，启动前提交的动作先放在 _pending 中
+        self._queue = None
+        self._pending = []
+        self._submit_lock = threading.Lock()
+        # 已进入队列但还没交给调度器的动作 ID，以及在此期间收到的取消请求（只在事件循环线程访问）
+        self._queued = set()
+        self._pending_cancels = set()
+        # 不同账号并发执行，同一账号串行执行，总并发数按机器配置限制
+        self.dispatcher = ActionDispatcher(self._run_action, self._action_account,
+                                           on_done=self._on_action_done)
+
+    @property
+    def poster(self):
+        """当前账号的 poster（最近一次登录的账号）"""
+        return self.posters.get(self.current_account)
+
+    def get_poster(self, account_id=None):
+        """按账号获取 poster"""
+        return self.posters.get(account_id if account_id is not None else self.current_account)
 
     def run(self):
         # 创建新的事件循环
@@ -41,48 +74,176 @@ class BrowserThread(QThread):
             cookies = await self.poster.get_cookies()
             
             # 格式化cookie字符串
-            cookie_str = ';'.join([
-                f"{cookie['name']}={cookie['value']}"
-                for cookie in cookies
-                if cookie.get('domain', '').endswith('.xiaohongshu.com')
-            ])
-            
-            return cookie_str
+            return cookie_header(cookies, domain_suffix='.xiaohongshu.com')
         except Exception as e:
             print(f"获取cookie失败: {str(e)}")
             return None
 
+    def _action_account(self, action):
+        """动作所属的账号，登录动作默认使用手机号"""
+        account_id = action.get('account_id')
+        if account_id is None and action['type'] == 'login':
+            account_id = action.get('phone')
+        return account_id if account_id is not None else self.current_account
+
+    def submit(self, action):
+        """提交一个动作（线程安全，可在 GUI 线程调用），事件循环会立即处理
+
+        action 可以带 priority（数值越小越先执行）、scheduled（后台定时发布）和 deadline（秒）。
+        返回动作 ID，用于 cancel。
+        """
+        action_id = action.setdefault('action_id', uuid.uuid4().hex)
+        with self._submit_lock:
+            if self._queue is None:
+                self._pending.append(action)
+            else:
+                self._call_threadsafe(self._enqueue, action)
+        return action_id
+
+    def cancel(self, action_id):
+        """取消动作（线程安全）：排队中的不再执行，执行中的立即停止并释放浏览器资源"""
+        with self._submit_lock:
+            for action in self._pending:
+                if action['action_id'] == action_id:
+                    self._pending.remove(action)
+                    self.action_cancelled.emit(action_id)
+                    return
+            if self._queue is not None:
+                self._call_threadsafe(self._cancel, action_id)
+
+    def _call_threadsafe(self, callback, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # 事件循环已经关闭
+            pass
+
+    def _enqueue(self, action):
+        self._queued.add(action['action_id'])
+        self._queue.put_nowait(action)
+
+    def _cancel(self, action_id):
+        # 回调按提交顺序执行，动作一定已经入队；还没交给调度器时记下，分发时再取消
+        if not self.dispatcher.cancel(action_id) and action_id in self._queued:
+            self._pending_cancels.add(action_id)
+
     async def async_run(self):
-        """异步主循环"""
-        while self.is_running:
-            if self.action_queue:
-                action = self.action_queue.pop(0)
-                try:
-                    if action['type'] == 'login':
-                        self.poster = XiaohongshuPoster()
-                        await self.poster.initialize()
-                        await self.poster.login(action['phone'])
-                        
-                        # 直接发送成功信号，不尝试获取cookie
-                        self.login_success.emit(self.poster)
-                        
-                    elif action['type'] == 'preview' and self.poster:
-                        await self.poster.post_article(
-                            action['title'],
-                            action['content'],
-                            action['images']
-                        )
-                        self.preview_success.emit()
-                except Exception as e:
-                    if action['type'] == 'login':
-                        self.login_error.emit(str(e))
-                    elif action['type'] == 'preview':
-                        self.preview_error.emit(str(e))
-            # 使用异步sleep而不是QThread.msleep
-            await asyncio.sleep(0.1)  # 避免CPU占用过高
+        """异步主循环：没有动作时阻塞在队列上，不占用CPU"""
+        with self._submit_lock:
+            self._queue = asyncio.Queue()
+            for action in self._pending:
+                self._enqueue(action)
+            self._pending = []
+            if not self.is_running:
+                self._queue.put_nowait(_STOP)
+
+        while True:
+            action = await self._queue.get()
+            if action is _STOP:
+                break
+            action_id = action['action_id']
+            self._queued.discard(action_id)
+            if action_id in self._pending_cancels:
+                self._pending_cancels.discard(action_id)
+                self.action_cancelled.emit(action_id)
+                continue
+            self.dispatcher.dispatch(action)
+
+        await self._shutdown()
+
+    def _emit_error(self, action, message):
+        if action['type'] == 'login':
+            self.login_error.emit(message)
+        elif action['type'] == 'preview':
+            self.preview_error.emit(message)
+        elif action['type'] == 'video':
+            self.video_error.emit(message)
+
+    def _on_action_done(self, action, status, error):
+        """调度器回调：超时按错误处理，取消时通知界面"""
+        if status == 'timeout':
+            self._emit_error(action, str(error))
+        elif status == 'cancelled':
+            self.action_cancelled.emit(action['action_id'])
+        elif status == 'failed':
+            self._emit_error(action, str(error))
+
+    async def _release_action(self, action, account_id):
+        """动作被取消或超时后释放它占用的浏览器资源"""
+        poster = self.posters.get(account_id)
+        if poster is None:
+            return
+        if action['type'] == 'login':
+            # 登录中途的上下文不可复用，下次登录重新初始化
+            await poster.close(force=True)
+        else:
+            # 关闭发布标签页，保留已登录的上下文
+            await poster.close()
+
+    async def _run_action(self, action):
+        account_id = self._action_account(action)
+        async with self.browser_manager.lease():
+            try:
+                if action['type'] == 'login':
+                    poster = self.posters.get(account_id)
+                    if poster is None:
+                        poster = XiaohongshuPoster(account_id=account_id,
+                                                   browser_manager=self.browser_manager)
+                        poster.progress_callback = (
+                            lambda percent, speed, account=str(account_id):
+                            self.upload_progress.emit(account, percent, speed))
+                        self.posters[account_id] = poster
+                    elif poster.playwright is not None and not poster.is_alive():
+                        # 浏览器崩溃或页面被关闭，释放旧的上下文后重新初始化
+                        await poster.close(force=True)
+                    await poster.initialize()
+                    await poster.login(action['phone'])
+                    self.current_account = account_id
+
+                    # 直接发送成功信号，不尝试获取cookie
+                    self.login_success.emit(poster)
+
+                elif action['type'] == 'preview':
+                    poster = self.posters.get(account_id)
+                    if not poster:
+                        raise Exception("请先登录")
+                    await poster.post_article(
+                        action['title'],
+                        action['content'],
+                        action['images']
+                    )
+                    self.browser_manager.record_post()
+                    self.preview_success.emit()
+
+                elif action['type'] == 'video':
+                    poster = self.posters.get(account_id)
+                    if not poster:
+                        raise Exception("请先登录")
+                    await poster.post_video(
+                        action['title'],
+                        action['content'],
+                        action.get('video_path')
+                    )
+                    self.browser_manager.record_post()
+                    self.video_success.emit()
+            except asyncio.CancelledError:
+                await self._release_action(action, account_id)
+                raise
+            except Exception as e:
+                self._emit_error(action, str(e))
+
+    async def _shutdown(self):
+        """关闭所有账号的上下文和共享浏览器"""
+        await self.dispatcher.close()
+        for poster in self.posters.values():
+            await poster.close(force=True)
+        self.posters = {}
+        await self.browser_manager.close()
+        flush_all()
 
     def stop(self):
-        self.is_running = False
-        # 确保浏览器资源被释放
-        if self.poster and self.loop and self.loop.is_running():
-            asyncio.run_coroutine_threadsafe(self.poster.close(force=True), self.loop)
+        # 主循环退出后会释放所有浏览器资源
+        with self._submit_lock:
+            self.is_running = False
+            if self._queue is not None:
+                self._call_threadsafe(self._queue.put_nowait, _STOP)
@@ -0,0 +1,270 @@
+import asyncio
+import atexit
+import itertools
+import logging
+import os
+import sys
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from src.config.config import Config
+from src.core.memory import kill_process_trees, process_tree_rss_mb, root_pids_with_arg
+
+# 所有存活的 BrowserManager，进程退出时兜底清理残留的浏览器进程
+_managers = weakref.WeakSet()
+# 每次启动浏览器的唯一标记，用于找到对应的浏览器进程
+_launch_seq = itertools.count(1)
+
+
+def build_launch_args():
+    """构造发布浏览器的启动参数（处理打包后的 Chromium 路径）"""
+    launch_args = {
+        'headless': False,
+        'args': [
+            '--no-sandbox',
+            '--disable-dev-shm-usage',
+            '--disable-gpu',
+            '--disable-extensions',
+            '--disable-infobars',
+            '--start-maximized',
+            '--ignore-certificate-errors',
+            '--ignore-ssl-errors'
+        ]
+    }
+
+    chromium_path = None
+
+    if getattr(sys, 'frozen', False):
+        # 如果是打包后的可执行文件
+        executable_dir = os.path.dirname(sys.executable)
+        logging.debug(f"executable_dir: {executable_dir}")
+        if sys.platform == 'darwin':  # macOS系统
+            if 'XhsAi' in executable_dir:
+                # 如果在 DMG 中运行
+                browser_path = os.path.join(
+                    executable_dir, "ms-playwright")
+            else:
+                # 如果已经安装到应用程序文件夹
+                browser_path = os.path.join(
+                    executable_dir, "Contents", "MacOS", "ms-playwright")
+            logging.debug(f"浏览器路径: {browser_path}")
+            chromium_path = os.path.join(
+                browser_path, "chromium-1161/chrome-mac/Chromium.app/Contents/MacOS/Chromium")
+        else:
+            # Windows系统
+            executable_dir = sys._MEIPASS
+            print(f"临时解压目录: {executable_dir}")
+            browser_path = os.path.join(executable_dir, "ms-playwright")
+            print(f"浏览器路径: {browser_path}")
+            chromium_path = os.path.join(
+                browser_path, "chrome-win", "chrome.exe")
+            logging.debug(f"Chromium 路径: {chromium_path}")
+    logging.debug(f"Chromium 路径: {chromium_path}")
+    if chromium_path:
+        # 确保浏览器文件存在且有执行权限
+        if os.path.exists(chromium_path):
+            os.chmod(chromium_path, 0o755)
+            launch_args['executable_path'] = chromium_path
+        else:
+            raise Exception(f"浏览器文件不存在: {chromium_path}")
+    return launch_args
+
+
+class BrowserManager:
+    """多个账号共享的浏览器，负责所有浏览器进程的生命周期
+
+    只启动一个 Chromium 进程，每个账号使用独立的 BrowserContext，
+    内存随上下文数量增长，而不是随浏览器数量增长。
+    发布次数达到 max_posts 或浏览器进程内存超过 max_rss_mb 时，在空闲时回收重启浏览器；
+    还有等待用户检查的草稿标签页时推迟回收，直到草稿被关闭或超过 draft_idle_timeout 秒，
+    内存超过上限的 1.5 倍时不再等待。
+    记录启动的浏览器进程，程序退出时确保它们被结束。
+    """
+
+    def __init__(self, max_posts=None, max_rss_mb=None, draft_idle_timeout=None):
+        browser_config = Config().get_browser_config()
+        self.max_posts = max_posts if max_posts is not None else browser_config.get('max_posts_per_browser', 50)
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else browser_config.get('max_browser_rss_mb', 1500)
+        if draft_idle_timeout is None:
+            draft_idle_timeout = browser_config.get('draft_idle_minutes', 30) * 60
+        self.draft_idle_timeout = draft_idle_timeout
+        self.playwright = None
+        self.browser = None
+        self._lock = asyncio.Lock()
+        self._pids = set()  # 由本实例启动的浏览器主进程
+        self._posters = weakref.WeakSet()  # 使用本实例浏览器的 poster
+        self._active = 0  # 正在执行的操作数
+        self._recycle_pending = False
+        self._recycle_timer = None
+        self.posts_since_launch = 0
+        self.recycle_count = 0
+        _managers.add(self)
+
+    async def start(self):
+        """启动 Playwright（重复调用无副作用）"""
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        return self.playwright
+
+    async def get_browser(self):
+        """获取共享浏览器，未启动或已断开时重新启动"""
+        async with self._lock:
+            await self.start()
+            if self.browser is None or not self.browser.is_connected():
+                launch_args, marker = self._marked_launch_args()
+                self.browser = await self.playwright.chromium.launch(**launch_args)
+                self._track_process(marker)
+                self.posts_since_launch = 0
+            return self.browser
+
+    async def new_context(self, **kwargs):
+        """在共享浏览器中创建一个隔离的上下文"""
+        browser = await self.get_browser()
+        return await browser.new_context(**kwargs)
+
+    async def launch_persistent_context(self, user_data_dir, **kwargs):
+        """持久化用户目录需要独立的浏览器进程，但共用同一个 Playwright"""
+        await self.start()
+        launch_args, marker = self._marked_launch_args()
+        context = await self.playwright.chromium.launch_persistent_context(
+            user_data_dir, **launch_args, **kwargs)
+        self._track_process(marker)
+        return context
+
+    def _marked_launch_args(self):
+        """在启动参数中加入唯一标记（Chromium 会忽略未知参数）"""
+        launch_args = build_launch_args()
+        marker = f"--xhs-browser-manager={os.getpid()}-{next(_launch_seq)}"
+        launch_args['args'] = launch_args['args'] + [marker]
+        return launch_args, marker
+
+    def _track_process(self, marker):
+        started = root_pids_with_arg(marker)
+        self._pids.update(started)
+        logging.debug(f"浏览器进程: {sorted(started)}")
+
+    def register(self, poster):
+        """登记使用本实例浏览器的 poster，回收浏览器时会先通知它们"""
+        self._posters.add(poster)
+
+    def unregister(self, poster):
+        self._posters.discard(poster)
+
+    def context_count(self):
+        return len(self.browser.contexts) if self.browser else 0
+
+    def rss_mb(self):
+        """本实例启动的浏览器进程占用的内存（MB），没有 psutil 时返回 None"""
+        return process_tree_rss_mb(self._pids)
+
+    def needs_recycle(self):
+        if self.max_posts and self.posts_since_launch >= self.max_posts:
+            return True
+        rss = self.rss_mb()
+        return bool(self.max_rss_mb and rss is not None and rss > self.max_rss_mb)
+
+    def record_post(self):
+        """记录一次发布，达到回收条件时在所有操作结束后回收浏览器"""
+        self.posts_since_launch += 1
+        if self.needs_recycle():
+            self._recycle_pending = True
+
+    @asynccontextmanager
+    async def lease(self):
+        """执行一次浏览器操作；回收进行中时等待回收完成"""
+        async with self._lock:
+            self._active += 1
+        try:
+            yield self
+        finally:
+            self._active -= 1
+            await self.maybe_recycle()
+
+    def _draft_wait_seconds(self):
+        """最新的待检查草稿还需要保留多久，没有草稿时返回 0"""
+        wait = 0
+        for poster in list(self._posters):
+            age = poster.pending_draft_age()
+            if age is not None:
+                wait = max(wait, self.draft_idle_timeout - age)
+        return wait
+
+    async def maybe_recycle(self):
+        """空闲且没有待检查的草稿时执行待处理的回收，否则稍后再检查"""
+        if not self._recycle_pending or self._active:
+            return
+        wait = self._draft_wait_seconds()
+        rss = self.rss_mb()
+        over_hard_limit = bool(self.max_rss_mb and rss is not None and rss > self.max_rss_mb * 1.5)
+        if wait > 0 and not over_hard_limit:
+            if self._recycle_timer is None:
+                print(f"有等待检查的草稿，浏览器回收推迟到草稿关闭后（最多 {wait / 60:.0f} 分钟）")
+            else:
+                self._recycle_timer.cancel()
+            self._recycle_timer = asyncio.get_running_loop().call_later(
+                wait, lambda: asyncio.ensure_future(self.maybe_recycle()))
+            return
+        await self.recycle(only_if_idle=True)
+
+    def draft_closed(self):
+        """草稿标签页关闭时由 poster 调用"""
+        if self._recycle_pending:
+            asyncio.ensure_future(self.maybe_recycle())
+
+    async def recycle(self, only_if_idle=False):
+        """关闭所有上下文并重启浏览器，poster 下次使用时重新初始化并恢复 cookies"""
+        async with self._lock:
+            # 等待锁期间可能已经开始了新的操作或完成了回收
+            if only_if_idle and (self._active or not self._recycle_pending):
+                return
+            self._recycle_pending = False
+            if self._recycle_timer is not None:
+                self._recycle_timer.cancel()
+                self._recycle_timer = None
+            rss = self.rss_mb()
+            print(f"回收浏览器: 已发布 {self.posts_since_launch} 次，"
+                  f"内存 {f'{rss:.0f}MB' if rss is not None else '未知'}")
+            started = time.perf_counter()
+            for poster in list(self._posters):
+                await poster.suspend()
+            await self._close_browser()
+            self.posts_since_launch = 0
+            self.recycle_count += 1
+            logging.debug(f"浏览器回收耗时 {time.perf_counter() - started:.2f}s")
+
+    async def _close_browser(self):
+        try:
+            if self.browser:
+                await self.browser.close()
+        except Exception as e:
+            logging.debug(f"关闭浏览器时出错: {str(e)}")
+        self.browser = None
+        self._kill_leftovers()
+
+    def _kill_leftovers(self):
+        """结束关闭后仍然残留的浏览器进程"""
+        killed = kill_process_trees(self._pids)
+        if killed:
+            logging.debug(f"结束残留的浏览器进程 {killed} 个")
+        self._pids = set()
+
+    async def close(self):
+        """关闭浏览器和 Playwright"""
+        await self._close_browser()
+        try:
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception as e:
+            logging.debug(f"关闭 Playwright 时出错: {str(e)}")
+        self.playwright = None
+        _managers.discard(self)
+
+
+@atexit.register
+def _cleanup_managers():
+    """程序退出时兜底结束所有残留的浏览器进程"""
+    for manager in list(_managers):
+        manager._kill_leftovers()
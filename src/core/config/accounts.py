@@ -2,12 +2,14 @@ import configparser
 from pathlib import Path
 import os
 
+from src.core.atomic_file import atomic_open
+
 def validate_cookie_format(cookie):
     """验证cookie格式"""
     try:
         # 检查必要的cookie字段
         required_fields = ['a1', 'web_session', 'xsecappid']
-        cookie_dict = dict(item.split('=', 1) for item in cookie.split(';'))
+        cookie_dict = dict(item.strip().split('=', 1) for item in cookie.split(';') if item.strip())
         
         # 验证必要字段是否存在
         for field in required_fields:
@@ -39,8 +41,8 @@ class AccountManager:
         self.config.read(self.config_file)
 
     def save_config(self):
-        """保存配置"""
-        with open(self.config_file, 'w') as f:
+        """保存配置（写入临时文件后重命名，避免写入中断损坏配置）"""
+        with atomic_open(self.config_file) as f:
             self.config.write(f)
 
     def get_account_cookies(self, account_name='account1'):
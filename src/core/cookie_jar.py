@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import threading
+
+from src.core.atomic_file import atomic_open
+
+
+def cookie_header(cookies, names=None, domain_suffix=None):
+    """把 cookie 列表拼成 "name1=value1; name2=value2" 格式的字符串
+
+    Args:
+        cookies: cookie 字典列表（Playwright / xhs-sdk 的格式）
+        names: 只保留这些名称的 cookie，按给定顺序输出
+        domain_suffix: 只保留域名以此结尾的 cookie
+    """
+    values = {}
+    for cookie in cookies:
+        if domain_suffix and not cookie.get('domain', '').endswith(domain_suffix):
+            continue
+        if names is not None and cookie['name'] not in names:
+            continue
+        values[cookie['name']] = cookie['value']
+    if names is not None:
+        values = {name: values[name] for name in names if name in values}
+    return "; ".join(f"{name}={value}" for name, value in values.items())
+
+
+def write_json_atomic(path, data, **kwargs):
+    """先写入临时文件再重命名，写入中途崩溃不会留下损坏的文件"""
+    with atomic_open(path) as f:
+        json.dump(data, f, **kwargs)
+
+
+class CookieJar:
+    """单个账号的 cookies
+
+    只在第一次使用时读取文件，之后在内存中维护；内容变化时标记为 dirty，
+    调用 flush() 时一次性原子写盘，没有变化时不写。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dirty = False
+        self._cookies = {}  # (name, domain, path) -> cookie
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(cookie):
+        return (cookie['name'], cookie.get('domain', ''), cookie.get('path', '/'))
+
+    @staticmethod
+    def _normalize(cookie):
+        cookie = dict(cookie)
+        # 确保cookies包含必要的字段
+        cookie.setdefault('domain', '.xiaohongshu.com')
+        cookie.setdefault('path', '/')
+        return cookie
+
+    def load(self):
+        """从文件加载（只加载一次）"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for cookie in json.load(f):
+                        cookie = self._normalize(cookie)
+                        self._cookies[self._key(cookie)] = cookie
+            except Exception as e:
+                logging.debug(f"加载cookies失败: {str(e)}")
+
+    def cookies(self):
+        """当前所有 cookie 的副本"""
+        self.load()
+        with self._lock:
+            return [dict(cookie) for cookie in self._cookies.values()]
+
+    def get(self, name):
+        for cookie in self.cookies():
+            if cookie['name'] == name:
+                return cookie['value']
+        return None
+
+    def header(self, names=None, domain_suffix=None):
+        return cookie_header(self.cookies(), names, domain_suffix)
+
+    def replace(self, cookies):
+        """用浏览器中的完整 cookie 列表替换，内容变化时标记为 dirty"""
+        self.load()
+        new_cookies = {}
+        for cookie in cookies:
+            cookie = self._normalize(cookie)
+            new_cookies[self._key(cookie)] = cookie
+        with self._lock:
+            if new_cookies != self._cookies:
+                self._cookies = new_cookies
+                self.dirty = True
+
+    def update(self, cookies):
+        """合并部分 cookie"""
+        self.load()
+        with self._lock:
+            for cookie in cookies:
+                cookie = self._normalize(cookie)
+                key = self._key(cookie)
+                if self._cookies.get(key) != cookie:
+                    self._cookies[key] = cookie
+                    self.dirty = True
+
+    def clear(self):
+        self.load()
+        with self._lock:
+            if self._cookies:
+                self._cookies = {}
+                self.dirty = True
+
+    def flush(self):
+        """有修改时原子写入文件，返回是否写入"""
+        with self._lock:
+            if not self.dirty:
+                return False
+            try:
+                write_json_atomic(self.path, list(self._cookies.values()))
+                self.dirty = False
+                return True
+            except Exception as e:
+                logging.debug(f"保存cookies失败: {str(e)}")
+                return False
+
+
+_jars = {}
+_jars_lock = threading.Lock()
+
+
+def get_cookie_jar(path):
+    """获取文件对应的 CookieJar，同一个文件在进程内只有一个实例"""
+    path = os.path.abspath(path)
+    with _jars_lock:
+        if path not in _jars:
+            _jars[path] = CookieJar(path)
+        return _jars[path]
+
+
+def flush_all():
+    """写入所有有修改的 CookieJar"""
+    with _jars_lock:
+        jars = list(_jars.values())
+    for jar in jars:
+        jar.flush()
@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+
+from src.config.config import Config
+from src.core.memory import available_memory_mb
+
+# 优先级：数值越小越先执行，交互操作排在后台定时发布之前
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# 各类动作默认的截止时间（秒），从提交时开始计算，包括排队时间
+DEFAULT_DEADLINES = {
+    'login': 300,  # 需要等待用户输入验证码
+    'preview': 180,
+    'video': 900,
+}
+DEFAULT_DEADLINE = 300
+
+
+class ActionTimeout(Exception):
+    """动作超过截止时间"""
+
+
+def default_concurrency(memory_per_context_mb=300, max_concurrency=0):
+    """根据 CPU 核数和可用内存估算同时执行的浏览器操作数
+
+    每个操作大约占用一个浏览器上下文的内存；max_concurrency 大于 0 时作为上限。
+    """
+    limit = os.cpu_count() or 2
+    free_mb = available_memory_mb()
+    if free_mb is not None and memory_per_context_mb:
+        limit = min(limit, int(free_mb // memory_per_context_mb))
+    if max_concurrency:
+        limit = min(limit, max_concurrency)
+    return max(1, limit)
+
+
+class PriorityGate:
+    """按优先级放行的信号量，同优先级先到先得"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters = []  # (priority, seq, future)
+        self._seq = itertools.count()
+
+    async def acquire(self, priority):
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已经分到名额但被取消，交给下一个等待者
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        while self._waiters and self.in_use < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_use += 1
+                future.set_result(True)
+
+    def waiting(self):
+        return len(self._waiters)
+
+    def idle(self):
+        """没有占用也没有等待者"""
+        return self.in_use == 0 and not self._waiters
+
+
+class ActionDispatcher:
+    """浏览器动作调度
+
+    不同账号的动作并发执行，同一账号的动作串行执行，
+    同时执行的动作总数受全局并发上限限制。
+    排队时按优先级放行（action['priority']，默认交互操作优先，带 scheduled 标记的后台发布在后），
+    每个动作有截止时间（action['deadline'] 秒），超时或被取消时立即停止。
+    """
+
+    def __init__(self, handler, key_func, max_concurrency=None, on_done=None):
+        """
+        Args:
+            handler: 执行单个动作的协程函数 handler(action)
+            key_func: 返回动作所属账号的函数，同一账号的动作串行执行
+            max_concurrency: 全局并发上限，为空时按机器配置计算
+            on_done: 动作结束回调 on_done(action, status, error)，
+                     status 为 done / failed / timeout / cancelled
+        """
+        if max_concurrency is None:
+            browser_config = Config().get_browser_config()
+            max_concurrency = default_concurrency(
+                browser_config.get('memory_per_context_mb', 300),
+                browser_config.get('max_concurrent_actions', 0))
+        self.handler = handler
+        self.key_func = key_func
+        self.max_concurrency = max_concurrency
+        self.on_done = on_done
+        self._gate = PriorityGate(max_concurrency)
+        self._account_gates = {}
+        self._tasks = {}  # action_id -> Task
+        self.running = 0
+        logging.debug(f"浏览器动作并发上限: {max_concurrency}")
+
+    @staticmethod
+    def priority_of(action):
+        if 'priority' in action:
+            return action['priority']
+        return PRIORITY_BACKGROUND if action.get('scheduled') else PRIORITY_INTERACTIVE
+
+    @staticmethod
+    def deadline_of(action):
+        return action.get('deadline') or DEFAULT_DEADLINES.get(action['type'], DEFAULT_DEADLINE)
+
+    def dispatch(self, action):
+        """在当前事件循环中调度动作，返回对应的 Task"""
+        action.setdefault('submitted_at', time.time())
+        task = asyncio.create_task(self._run(action))
+        action_id = action.get('action_id') or id(task)
+        self._tasks[action_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(action_id, None))
+        return task
+
+    def cancel(self, action_id):
+        """取消排队中或执行中的动作，返回是否找到该动作"""
+        task = self._tasks.get(action_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def _run(self, action):
+        remaining = action['submitted_at'] + self.deadline_of(action) - time.time()
+        status, error = "done", None
+        try:
+            await asyncio.wait_for(self._run_gated(action), max(remaining, 0))
+        except asyncio.TimeoutError:
+            status, error = "timeout", ActionTimeout(f"操作超时（{self.deadline_of(action)}秒）")
+        except asyncio.CancelledError:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "failed", e
+        if status != "done":
+            logging.debug(f"动作 {action.get('action_id')} ({action['type']}) {status}: {error}")
+        if self.on_done:
+            self.on_done(action, status, error)
+
+    async def _run_gated(self, action):
+        key = self.key_func(action)
+        priority = self.priority_of(action)
+        account_gate = self._account_gates.get(key)
+        if account_gate is None:
+            account_gate = self._account_gates[key] = PriorityGate(1)
+        try:
+            # 先按账号排队再占用全局名额，排队中的动作不占用名额
+            await account_gate.acquire(priority)
+            try:
+                await self._gate.acquire(priority)
+                try:
+                    self.running += 1
+                    try:
+                        await self.handler(action)
+                    finally:
+                        self.running -= 1
+                finally:
+                    self._gate.release()
+            finally:
+                account_gate.release()
+        finally:
+            # 账号没有其他动作时移除它的队列，避免账号越来越多时一直占用内存
+            if account_gate.idle() and self._account_gates.get(key) is account_gate:
+                del self._account_gates[key]
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "waiting": len(self._tasks) - self.running,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def close(self):
+        """取消所有未完成的动作"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+
+class BackgroundLoop:
+    """在后台守护线程中运行的 asyncio 事件循环
+
+    用于让同步代码（Qt 线程、xhs-sdk 的 sign 回调等）共享一组长期存活的异步资源，
+    例如签名浏览器池和 HTTP 连接池。
+    """
+
+    def __init__(self, name="background-loop"):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动事件循环线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self.loop
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self._started.wait()
+        return self.loop
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro):
+        """提交协程，返回 concurrent.futures.Future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """提交协程并阻塞等待结果"""
+        if self.in_loop_thread():
+            raise RuntimeError("不能在后台事件循环线程内同步等待协程")
+        return self.submit(coro).result(timeout)
+
+    def in_loop_thread(self):
+        """当前是否处于后台事件循环线程"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def stop(self):
+        """停止事件循环"""
+        with self._lock:
+            if self.loop is not None and self._thread is not None and self._thread.is_alive():
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self._thread.join(timeout=5)
+            self._thread = None
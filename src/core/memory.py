@@ -0,0 +1,123 @@
+import logging
+import os
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_psutil_warned = False
+_psutil_warn_lock = threading.Lock()
+
+
+def psutil_missing():
+    """psutil 不可用时返回 True，并且只在第一次提示哪些功能因此失效"""
+    global _psutil_warned
+    if psutil is not None:
+        return False
+    with _psutil_warn_lock:
+        if not _psutil_warned:
+            _psutil_warned = True
+            message = ("未安装 psutil，无法跟踪浏览器进程：按内存回收浏览器、结束残留的浏览器进程均不会执行，"
+                       "请执行 pip install psutil")
+            print(message)
+            logging.warning(message)
+    return True
+
+
+def available_memory_mb():
+    """系统可用内存（MB），无法获取时返回 None"""
+    if psutil is not None:
+        try:
+            return psutil.virtual_memory().available / 1024 / 1024
+        except Exception:
+            pass
+    # 没有 psutil 时在 Linux 上读取 /proc/meminfo
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def total_memory_mb():
+    """系统总内存（MB），无法获取时返回 None"""
+    if psutil is not None:
+        try:
+            return psutil.virtual_memory().total / 1024 / 1024
+        except Exception:
+            pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 / 1024
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def root_pids_with_arg(marker):
+    """命令行包含 marker 的子进程中最上层的 PID（需要 psutil，否则返回空集合）
+
+    启动浏览器时加上唯一的命令行参数，用来准确找到这次启动的浏览器主进程，
+    不会误认同一进程下其他组件（例如签名浏览器池）启动的 Chromium。
+    """
+    if psutil_missing():
+        return set()
+
+    def has_marker(proc):
+        try:
+            return marker in proc.cmdline()
+        except Exception:
+            return False
+
+    roots = set()
+    try:
+        for proc in psutil.Process().children(recursive=True):
+            if not has_marker(proc):
+                continue
+            parent = proc.parent()
+            if parent is None or not has_marker(parent):
+                roots.add(proc.pid)
+    except Exception:
+        pass
+    return roots
+
+
+def _process_tree(pid):
+    proc = psutil.Process(pid)
+    return [proc] + proc.children(recursive=True)
+
+
+def process_tree_rss_mb(pids):
+    """进程及其所有子进程的常驻内存（MB），无法获取时返回 None"""
+    if psutil_missing():
+        return None
+    total = 0
+    for pid in pids:
+        try:
+            for proc in _process_tree(pid):
+                total += proc.memory_info().rss
+        except Exception:
+            continue
+    return total / 1024 / 1024
+
+
+def kill_process_trees(pids):
+    """强制结束仍在运行的进程及其子进程，返回结束的进程数"""
+    if psutil_missing():
+        return 0
+    killed = 0
+    for pid in pids:
+        try:
+            procs = _process_tree(pid)
+        except Exception:
+            continue
+        for proc in reversed(procs):
+            try:
+                proc.kill()
+                killed += 1
+            except Exception:
+                pass
+    return killed
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import Counter
+
+# 延迟直方图的桶上限（毫秒），最后一个桶收集超过上限的请求
+LATENCY_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class BackendStats:
+    """单个后端的延迟和失败统计
+
+    ewma_ms 是成功请求延迟的指数滑动平均，用于选择最快的后端；
+    连续失败达到阈值后进入冷却期，冷却期内视为不健康。
+    """
+
+    def __init__(self, name, alpha=0.3, failure_threshold=3, cooldown=30):
+        self.name = name
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_ms = None
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.failure_kinds = Counter()
+        self.cooldown_until = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(latency_ms):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                return i
+        return len(LATENCY_BUCKETS_MS)
+
+    def record_success(self, latency_ms):
+        with self._lock:
+            self.calls += 1
+            self.consecutive_failures = 0
+            self.cooldown_until = 0
+            self.latency_histogram[self._bucket(latency_ms)] += 1
+            if self.ewma_ms is None:
+                self.ewma_ms = latency_ms
+            else:
+                self.ewma_ms = self.alpha * latency_ms + (1 - self.alpha) * self.ewma_ms
+
+    def record_failure(self, latency_ms, kind="error"):
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.failure_kinds[kind] += 1
+            self.latency_histogram[self._bucket(latency_ms)] += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.cooldown_until = time.time() + self.cooldown
+
+    def mark_unhealthy(self):
+        """立即进入冷却期（例如健康检查失败）"""
+        with self._lock:
+            self.cooldown_until = time.time() + self.cooldown
+
+    def healthy(self):
+        return time.time() >= self.cooldown_until
+
+    def snapshot(self):
+        with self._lock:
+            histogram = {}
+            for i, count in enumerate(self.latency_histogram):
+                label = f"<={LATENCY_BUCKETS_MS[i]}ms" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]}ms"
+                histogram[label] = count
+            return {
+                "name": self.name,
+                "calls": self.calls,
+                "failures": self.failures,
+                "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+                "healthy": self.healthy(),
+                "latency_histogram": histogram,
+                "failure_kinds": dict(self.failure_kinds),
+            }
+
+    def summary(self):
+        """一行文字摘要，便于写入日志"""
+        snap = self.snapshot()
+        buckets = ", ".join(f"{k}:{v}" for k, v in snap["latency_histogram"].items() if v)
+        failures = ", ".join(f"{k}:{v}" for k, v in snap["failure_kinds"].items())
+        ewma = f"{snap['ewma_ms']}ms" if snap["ewma_ms"] is not None else "-"
+        return (f"{self.name}: 调用 {snap['calls']} 次, 失败 {snap['failures']} 次, "
+                f"平均延迟 {ewma}, {'健康' if snap['healthy'] else '冷却中'}"
+                f" | 延迟分布 [{buckets}] | 失败原因 [{failures}]")
+
+
+def order_by_latency(stats_list):
+    """健康的后端按平均延迟升序排在前面，还没有测量过的按传入顺序（配置顺序）排在已测量的之后，
+    不拿用户的请求去试探未知后端；刚失败过的排在其后，冷却中的排在最后"""
+    def key(stats):
+        return (not stats.healthy(), stats.consecutive_failures > 0,
+                stats.ewma_ms is None, stats.ewma_ms or 0)
+    # sorted 是稳定排序，相同键保持传入顺序
+    return sorted(stats_list, key=key)
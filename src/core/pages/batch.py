@@ -0,0 +1,134 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QDialog, QFileDialog, QHBoxLayout, QLabel, QListWidget,
+                             QListWidgetItem, QPushButton, QSpinBox, QTextEdit, QVBoxLayout)
+
+from src.core.alert import TipWindow
+from src.core.processor.content import BatchGeneratorThread, load_topics
+
+
+class BatchGenerateDialog(QDialog):
+    """批量生成窗口：输入或导入主题，结果按完成顺序进入待审核列表"""
+
+    def __init__(self, home_page, parent=None):
+        super().__init__(parent)
+        self.home_page = home_page
+        self.thread = None
+        self.topics = []
+        self.setWindowTitle("批量生成")
+        self.resize(640, 560)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel("主题（每行一个，或导入 CSV / JSONL 文件）"))
+        self.topics_input = QTextEdit()
+        self.topics_input.setMinimumHeight(120)
+        layout.addWidget(self.topics_input)
+
+        control_layout = QHBoxLayout()
+        import_btn = QPushButton("📂 导入文件")
+        import_btn.clicked.connect(self.import_topics)
+        control_layout.addWidget(import_btn)
+
+        control_layout.addWidget(QLabel("并发数"))
+        self.concurrency_input = QSpinBox()
+        self.concurrency_input.setRange(1, 16)
+        self.concurrency_input.setValue(self.home_page.parent.config.get_generation_config().get('batch_concurrency', 3))
+        control_layout.addWidget(self.concurrency_input)
+        control_layout.addStretch()
+
+        self.start_btn = QPushButton("✨ 开始生成")
+        self.start_btn.clicked.connect(self.start_or_stop)
+        control_layout.addWidget(self.start_btn)
+        layout.addLayout(control_layout)
+
+        self.progress_label = QLabel("")
+        layout.addWidget(self.progress_label)
+
+        layout.addWidget(QLabel("待审核（双击载入编辑区）"))
+        self.result_list = QListWidget()
+        self.result_list.setStyleSheet("""
+            QListWidget::item {
+                padding: 8px;
+                border-bottom: 1px solid #eee;
+            }
+            QListWidget::item:selected {
+                background-color: #e3f2fd;
+                color: #1976d2;
+            }
+        """)
+        self.result_list.itemDoubleClicked.connect(self.review_item)
+        layout.addWidget(self.result_list)
+
+    def import_topics(self):
+        """从 CSV / JSONL / 文本文件导入主题"""
+        path, _ = QFileDialog.getOpenFileName(self, "导入主题", "", "主题文件 (*.csv *.jsonl *.txt)")
+        if not path:
+            return
+        try:
+            topics = load_topics(path=path)
+            self.topics_input.setPlainText("\n".join(item['topic'] for item in topics))
+            self.topics = topics
+        except Exception as e:
+            TipWindow(self, f"❌ 导入失败: {str(e)}").show()
+
+    def _collect_topics(self):
+        header_title = self.home_page.header_input.text()
+        author = self.home_page.author_input.text()
+        text_topics = load_topics(text=self.topics_input.toPlainText(),
+                                  header_title=header_title, author=author)
+        # 文本框未修改时保留导入文件中每行的标题和作者
+        if [item['topic'] for item in self.topics] == [item['topic'] for item in text_topics]:
+            return [dict(item, header_title=item['header_title'] or header_title,
+                         author=item['author'] or author) for item in self.topics]
+        return text_topics
+
+    def start_or_stop(self):
+        if self.thread is not None and self.thread.isRunning():
+            self.thread.stop()
+            self.start_btn.setEnabled(False)
+            return
+
+        topics = self._collect_topics()
+        if not topics:
+            TipWindow(self, "❌ 请输入主题").show()
+            return
+
+        self.thread = BatchGeneratorThread(topics, self.concurrency_input.value())
+        self.thread.item_finished.connect(self.handle_item_finished)
+        self.thread.item_failed.connect(self.handle_item_failed)
+        self.thread.progress.connect(self.handle_progress)
+        self.thread.all_done.connect(self.handle_all_done)
+        self.progress_label.setText(f"0 / {len(topics)}")
+        self.start_btn.setText("⏹ 停止")
+        self.thread.start()
+
+    def handle_item_finished(self, index, result):
+        item = QListWidgetItem(f"✅ {result['title']}（{result['input_text']}）")
+        item.setData(Qt.ItemDataRole.UserRole, result)
+        self.result_list.addItem(item)
+
+    def handle_item_failed(self, index, topic, error):
+        item = QListWidgetItem(f"❌ {topic}: {error}" if topic else f"❌ {error}")
+        self.result_list.addItem(item)
+
+    def handle_progress(self, done, total):
+        self.progress_label.setText(f"{done} / {total}")
+
+    def handle_all_done(self):
+        self.start_btn.setText("✨ 开始生成")
+        self.start_btn.setEnabled(True)
+
+    def review_item(self, item):
+        """把选中的结果载入主页编辑区"""
+        result = item.data(Qt.ItemDataRole.UserRole)
+        if not result:
+            return
+        self.home_page.handle_generation_result(result)
+
+    def closeEvent(self, event):
+        if self.thread is not None and self.thread.isRunning():
+            self.thread.stop()
+            self.thread.wait(5000)
+        super().closeEvent(event)
@@ -7,10 +7,12 @@ from PyQt6.QtWidgets import (QFrame, QHBoxLayout, QLabel, QLineEdit,
                              QPushButton, QTextEdit, QVBoxLayout, QWidget)
 
 from src.core.alert import TipWindow
+from src.core.pages.batch import BatchGenerateDialog
 from src.core.processor.content import ContentGeneratorThread
 from src.core.processor.img import ImageProcessorThread
 from src.core.config.accounts import AccountManager
 from src.core.xhs.xhs_client import XhsClient
+from src.core.signer.router import get_signer
 from playwright.sync_api import sync_playwright
 import threading
 import time
@@ -31,6 +33,8 @@ class HomePage(QWidget):
         self.images = []
         self.image_list = []
         self.current_image_index = 0
+        # 正在执行的预览发布动作，用于取消
+        self.preview_action_id = None
         
         # 创建占位图
         self.placeholder_photo = QPixmap(200, 200)
@@ -293,9 +297,20 @@ class HomePage(QWidget):
 
         # 将生成按钮保存为类属性
         self.generate_btn = QPushButton("✨ 生成内容")
-        self.generate_btn.clicked.connect(self.generate_content)
+        # clicked 会传入 checked 参数，不能直接连接带默认参数的槽
+        self.generate_btn.clicked.connect(lambda: self.generate_content())
         button_layout.addWidget(self.generate_btn)
 
+        # 跳过缓存重新生成
+        self.regenerate_btn = QPushButton("🔄 重新生成")
+        self.regenerate_btn.clicked.connect(lambda: self.generate_content(use_cache=False))
+        button_layout.addWidget(self.regenerate_btn)
+
+        # 批量生成入口
+        batch_btn = QPushButton("📚 批量生成")
+        batch_btn.clicked.connect(self.open_batch_dialog)
+        button_layout.addWidget(batch_btn)
+
         input_container_layout.addLayout(button_layout)
         input_layout.addWidget(input_container)
 
@@ -449,9 +464,10 @@ class HomePage(QWidget):
             self.parent.update_login_button("⏳ 登录中...", False)
 
             # 添加登录任务到浏览器线程
-            self.parent.browser_thread.action_queue.append({
+            self.parent.browser_thread.submit({
                 'type': 'login',
-                'phone': phone
+                'phone': phone,
+                'account_id': phone
             })
 
         except Exception as e:
@@ -501,32 +517,52 @@ class HomePage(QWidget):
             print(f"登录处理失败: {str(e)}")
             TipWindow(self.parent, f"❌ 登录失败: {str(e)}").show()
 
-    def generate_content(self):
+    def generate_content(self, use_cache=True):
+        # 上一次生成还在进行时不再启动新的线程，避免替换掉仍在运行的 QThread
+        running = getattr(self.parent, 'generator_thread', None)
+        if running is not None and running.isRunning():
+            return
         try:
             input_text = self.input_text.toPlainText().strip()
             if not input_text:
                 TipWindow(self.parent, "❌ 请输入内容").show()
                 return
 
+            self.regenerate_btn.setEnabled(False)
             # 创建并启动生成线程
             self.parent.generator_thread = ContentGeneratorThread(
                 input_text,
                 self.header_input.text(),
                 self.author_input.text(),
-                self.generate_btn  # 传递按钮引用
+                self.generate_btn,  # 传递按钮引用
+                use_cache=use_cache
             )
             self.parent.generator_thread.finished.connect(
                 self.handle_generation_result)
             self.parent.generator_thread.error.connect(
                 self.handle_generation_error)
+            self.parent.generator_thread.finished.connect(
+                lambda _: self.regenerate_btn.setEnabled(True))
+            self.parent.generator_thread.error.connect(
+                lambda _: self.regenerate_btn.setEnabled(True))
             self.parent.generator_thread.start()
 
         except Exception as e:
             self.generate_btn.setText("✨ 生成内容")  # 恢复按钮文字
             self.generate_btn.setEnabled(True)  # 恢复按钮可点击状态
+            self.regenerate_btn.setEnabled(True)
             TipWindow(self.parent, f"❌ 生成内容失败: {str(e)}").show()
 
+    def open_batch_dialog(self):
+        """打开批量生成窗口（关闭后保留，已生成的结果不会丢失）"""
+        if getattr(self, 'batch_dialog', None) is None:
+            self.batch_dialog = BatchGenerateDialog(self, self)
+        self.batch_dialog.show()
+        self.batch_dialog.raise_()
+
     def handle_generation_result(self, result):
+        if result.get('degraded'):
+            TipWindow(self.parent, "⚠️ 内容生成服务暂不可用，已使用本地模型生成（没有配图）").show()
         self.update_ui_after_generate(
             result['title'],
             result['content'],
@@ -540,14 +576,16 @@ class HomePage(QWidget):
 
     def update_ui_after_generate(self, title, content, cover_image_url, content_image_urls, input_text):
         try:
-            # 创建并启动图片处理线程
-            self.parent.image_processor = ImageProcessorThread(
-                cover_image_url, content_image_urls)
-            self.parent.image_processor.finished.connect(
-                self.handle_image_processing_result)
-            self.parent.image_processor.error.connect(
-                self.handle_image_processing_error)
-            self.parent.image_processor.start()
+            # 创建并启动图片处理线程（本地模型生成的结果没有配图）
+            has_images = bool(cover_image_url or content_image_urls)
+            if has_images:
+                self.parent.image_processor = ImageProcessorThread(
+                    cover_image_url, content_image_urls)
+                self.parent.image_processor.finished.connect(
+                    self.handle_image_processing_result)
+                self.parent.image_processor.error.connect(
+                    self.handle_image_processing_error)
+                self.parent.image_processor.start()
 
             # 更新标题和内容
             self.title_input.setText(title if title else "")
@@ -568,7 +606,7 @@ class HomePage(QWidget):
 
             # 显示占位图
             self.image_label.setPixmap(self.placeholder_photo)
-            self.image_title.setText("正在加载图片...")
+            self.image_title.setText("正在加载图片..." if has_images else "本次生成没有配图")
 
         except Exception as e:
             print(f"更新UI时出错: {str(e)}")
@@ -653,12 +691,18 @@ class HomePage(QWidget):
             title = self.title_input.text()
             content = self.subtitle_input.toPlainText()
 
-            # 更新预览按钮状态
-            self.parent.update_preview_button("⏳ 发布中...", False)
+            # 发布中再次点击按钮取消发布
+            if self.preview_action_id:
+                self.parent.browser_thread.cancel(self.preview_action_id)
+                return
+
+            # 更新预览按钮状态，发布过程中可以点击取消
+            self.parent.update_preview_button("⏹ 取消发布", True)
 
             # 添加预览任务到浏览器线程
-            self.parent.browser_thread.action_queue.append({
+            self.preview_action_id = self.parent.browser_thread.submit({
                 'type': 'preview',
+                'account_id': self.parent.browser_thread.current_account,
                 'title': title,
                 'content': content,
                 'images': self.images
@@ -668,11 +712,21 @@ class HomePage(QWidget):
             TipWindow(self.parent, f"❌ 预览发布失败: {str(e)}").show()
 
     def handle_preview_result(self):
+        self.preview_action_id = None
         # 恢复预览按钮状态
         self.parent.update_preview_button("🎯 预览发布", True)
         TipWindow(self.parent, "🎉 文章已准备好，请在浏览器中检查并发布").show()
 
+    def handle_action_cancelled(self, action_id):
+        """处理动作被取消"""
+        if action_id != self.preview_action_id:
+            return
+        self.preview_action_id = None
+        self.parent.update_preview_button("🎯 预览发布", True)
+        TipWindow(self.parent, "已取消发布").show()
+
     def handle_preview_error(self, error_msg):
+        self.preview_action_id = None
         # 恢复预览按钮状态
         self.parent.update_preview_button("🎯 预览发布", True)
         TipWindow(self.parent, f"❌ 预览发布失败: {error_msg}").show()
@@ -729,7 +783,7 @@ class HomePage(QWidget):
         """处理手机号登录成功"""
         try:
             # 使用手机号和验证码登录
-            xhs_client = XhsClient(sign=sign_local, timeout=60)
+            xhs_client = XhsClient(sign=get_signer(), timeout=60)
             result = xhs_client.login_by_phone(phone, code)
             
             if result.get('success'):
@@ -5,18 +5,19 @@ from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QImage, QPixmap
 import cv2
 import os
-import requests
 import json
 import configparser
 from time import sleep
 from src.config.config import Config
 from src.core.alert import TipWindow
+from src.core.processor.llm import GenerationThread
 from src.core.config.accounts import AccountManager
 from src.core.xhs.client import XhsClientManager
 from datetime import datetime, timedelta
 from pathlib import Path
 from xhs import XhsClient
-from src.core.uploader.xhs_uploader.main import sign_local, beauty_print
+from src.core.uploader.xhs_uploader.main import beauty_print
+from src.core.signer.router import get_signer
 
 from conf import BASE_DIR
 
@@ -76,6 +77,8 @@ class VideoPage(QWidget):
         super().__init__(parent)
         self.parent = parent
         self.config = Config()
+        # 浏览器线程中正在执行的视频发布动作
+        self.publish_action_id = None
         self.init_video()
         self.init_ui()
         self.load_default_author()
@@ -90,6 +93,13 @@ class VideoPage(QWidget):
         except Exception as e:
             print(f"加载默认作者失败: {str(e)}")
 
+    def get_account_cookies(self):
+        """获取视频发布使用的账号 cookie"""
+        try:
+            return config['account1']['cookies']
+        except KeyError:
+            return ""
+
     def update_author_config(self, author):
         """更新作者配置"""
         try:
@@ -370,7 +380,14 @@ class VideoPage(QWidget):
         super().closeEvent(event)
 
     def publish_video(self):
-        """发布视频"""
+        """发布视频：立即发布在浏览器中上传并填好发布页，定时发布通过接口提交"""
+        # 发布中再次点击按钮取消发布
+        if self.publish_action_id:
+            self.parent.browser_thread.cancel(self.publish_action_id)
+            return
+        if not self.schedule_checkbox.isChecked():
+            self.publish_in_browser()
+            return
         try:
             # 显示进度条并禁用发布按钮
             # self.progress.setRange(0, 100)
@@ -391,12 +408,12 @@ class VideoPage(QWidget):
             # self.update_progress(20, "验证输入完成")
 
             # 3. 获取 cookie
-            cookies = config['account1']['cookies']
+            cookies = self.get_account_cookies()
             if not cookies:
                 raise ValueError("请先配置账号Cookie")
 
             # 4. 初始化客户端并验证 cookie
-            xhs_client = XhsClient(cookies, sign=sign_local, timeout=60)
+            xhs_client = XhsClient(cookies, sign=get_signer(), timeout=60)
             try:
                 xhs_client.get_video_first_frame_image_id("3214")
             except:
@@ -482,6 +499,74 @@ class VideoPage(QWidget):
         #     self.publish_btn.setEnabled(True)
         #     self.publish_btn.setText("发布视频")
 
+    def publish_in_browser(self):
+        """提交到浏览器线程上传视频，上传进度显示在进度条上"""
+        try:
+            title = self.title_input.text().strip()
+            content = self.content_input.toPlainText().strip()
+            video_path = getattr(self, 'video_path', None)
+            tags = [tag.strip() for tag in self.tags_input.text().split(',') if tag.strip()]
+            if not all([title, content, video_path]):
+                raise ValueError("请填写完整信息")
+            if tags:
+                content += "\n\n" + " ".join(f"#{tag}" for tag in tags)
+
+            self.progress.setRange(0, 100)
+            self.progress.setValue(0)
+            self.progress.show()
+            self.publish_btn.setText("⏹ 取消发布")
+            self.publish_action_id = self.parent.browser_thread.submit({
+                'type': 'video',
+                'account_id': self.parent.browser_thread.current_account,
+                'title': title[:20],
+                'content': content,
+                'video_path': str(video_path)
+            })
+        except Exception as e:
+            TipWindow(self.parent, f"❌ 发布失败: {str(e)}").show()
+
+    def reset_publish_button(self):
+        self.publish_action_id = None
+        self.progress.hide()
+        self.publish_btn.setText("发布视频")
+
+    def handle_upload_progress(self, account_id, percent, speed):
+        """浏览器线程上报的视频上传进度"""
+        if self.publish_action_id:
+            self.progress.setValue(int(percent))
+            self.info_label.setText(f"上传中 {percent:.0f}%，{speed / 1024 / 1024:.2f}MB/s")
+
+    def handle_publish_result(self):
+        title = self.title_input.text().strip()
+        self.reset_publish_button()
+        self.info_label.setText("视频上传完成")
+        TipWindow(self.parent, "🎉 视频已上传，请在浏览器中检查并发布").show()
+        self.save_publish_history({
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'title': title,
+            'status': '待确认',
+            'note': '已在浏览器中填好发布页',
+            'video_path': getattr(self, 'video_path', '')
+        })
+
+    def handle_publish_error(self, error_msg):
+        self.reset_publish_button()
+        TipWindow(self.parent, f"❌ 发布失败: {error_msg}").show()
+        self.save_publish_history({
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'title': self.title_input.text().strip(),
+            'status': '发布失败',
+            'note': error_msg,
+            'video_path': getattr(self, 'video_path', '')
+        })
+
+    def handle_action_cancelled(self, action_id):
+        """处理发布动作被取消"""
+        if action_id != self.publish_action_id:
+            return
+        self.reset_publish_button()
+        TipWindow(self.parent, "已取消发布").show()
+
     def extract_tags(self, content):
         """从内容中提取标签"""
         tags = []
@@ -530,115 +615,68 @@ class VideoPage(QWidget):
             self.generate_btn.setEnabled(False)
             self.generate_btn.setText("生成中...")
             
-            # 构建提示词
-            prompt = f"""
-                你是一个专业的小红书文案写手。请根据以下关键词直接生成一篇可以发布的小红书文案。
-                
-                关键词: {content}
-                
-                要求：
-                1. 直接生成标题、正文内容和标签，不要生成示例或模板
-                2. 标题要简短有力，最好带emoji，能吸引用户点击
-                3. 正文要活泼生动，适合视频内容展示
-                4. 使用"家人们"、"姐妹们"等亲和的称呼
-                5. 多用"啊啊啊"、"太太太"等语气词增加活力
-                6. 标签要相关且吸引人，5-10个即可
-                
-                返回格式：
-                {{
-                    "title": "标题（带emoji，15字以内）",
-                    "content": "正文内容（活泼生动，有吸引力）",
-                    "tags": "标签1,标签2,标签3,标签4,标签5"
-                }}
-                
-                请直接返回 JSON 格式的内容，不要有其他额外的文字。
-            """
-            
-            # 调用本地 Ollama API
-            url = "http://127.0.0.1:11434/api/generate"
-            payload = {
-                "model": "qwen2.5:14b",  # 更新为正确的模型名称
-                "prompt": prompt,
-                "stream": False
-            }
-            
-            try:
-                response = requests.post(url, json=payload, timeout=60)  # 增加超时时间
-                response.raise_for_status()
-            except requests.RequestException as e:
-                if "Connection refused" in str(e):
-                    TipWindow(self.parent, "❌ 无法连接到 Ollama 服务，请确保服务已启动").show()
-                elif "404" in str(e):
-                    TipWindow(self.parent, "❌ API 地址错误，请检查 Ollama 服务配置").show()
-                else:
-                    TipWindow(self.parent, f"❌ API 请求失败: {str(e)}").show()
-                raise
+            # 在后台线程中生成，选择最快的可用后端，支持流式的后端边生成边显示
+            self._stream_text = ""
+            self._stream_has_fields = False
+            self.ollama_thread = GenerationThread({'kind': 'video', 'topic': content})
+            self.ollama_thread.token.connect(self.handle_generation_token)
+            self.ollama_thread.field_updated.connect(self.handle_generation_field)
+            self.ollama_thread.first_token.connect(self.handle_first_token)
+            self.ollama_thread.finished.connect(self.handle_generation_finished)
+            self.ollama_thread.error.connect(self.handle_generation_error)
+            self.ollama_thread.start()
             
-            # 解析返回的内容
-            response_text = response.json().get('response', '')
-            try:
-                # 尝试解析JSON
-                # 清理可能的多余字符
-                response_text = response_text.strip()
-                if response_text.startswith('```json'):
-                    response_text = response_text[7:]
-                if response_text.endswith('```'):
-                    response_text = response_text[:-3]
-                    
-                generated_data = json.loads(response_text)
-                generated_title = generated_data.get('title', '')
-                generated_content = generated_data.get('content', '')
-                generated_tags = generated_data.get('tags', '')  # 获取标签
-                
-                if not generated_title or not generated_content:
-                    raise ValueError("生成的内容格式不正确")
-                    
-                # 更新界面
-                self.title_input.setText(generated_title)
-                self.content_input.setPlainText(generated_content)
-                self.tags_input.setText(generated_tags)  # 设置标签
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                # 如果不是JSON格式，尝试智能分割文本
-                lines = response_text.split('\n')
-                generated_title = ""
-                generated_content = []
-                generated_tags = []
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    if not generated_title:
-                        generated_title = line
-                    elif line.startswith('#'):  # 识别标签
-                        generated_tags.append(line.strip('#'))
-                    else:
-                        generated_content.append(line)
-                
-                generated_content = '\n'.join(generated_content) if generated_content else response_text
-                if not generated_title:
-                    generated_title = "视频分享"
-                
-                # 更新界面
-                self.title_input.setText(generated_title)
-                self.content_input.setPlainText(generated_content)
-                self.tags_input.setText(', '.join(generated_tags))  # 设置标签
+        except Exception as e:
+            TipWindow(self.parent, f"❌ 生成失败: {str(e)}").show()
+            print(f"生成内容失败: {str(e)}")
+            self.reset_generate_button()
+
+    def reset_generate_button(self):
+        """恢复按钮状态"""
+        self.generate_btn.setEnabled(True)
+        self.generate_btn.setText("生成内容")
+
+    def handle_generation_token(self, token):
+        """模型输出不是 JSON 时直接显示原始文本"""
+        self._stream_text += token
+        if not self._stream_has_fields:
+            self.content_input.setPlainText(self._stream_text)
+
+    def handle_generation_field(self, field, value):
+        """JSON 字段解析出一部分就更新到对应的输入框"""
+        self._stream_has_fields = True
+        if field == 'title':
+            self.title_input.setText(value)
+        elif field == 'content':
+            self.content_input.setPlainText(value)
+        elif field == 'tags':
+            self.tags_input.setText(value)
+
+    def handle_first_token(self, seconds):
+        self.generate_btn.setText(f"生成中...（首字 {seconds:.1f}s）")
+        print(f"首个 token 耗时: {seconds:.2f}s")
+
+    def handle_generation_finished(self, result):
+        try:
+            # 用完整解析的结果更新界面
+            self.title_input.setText(result['title'])
+            self.content_input.setPlainText(result['content'])
+            self.tags_input.setText(result.get('tags', ""))  # 设置标签
             
             # 保存当前作者名称
             current_author = self.author_input.text().strip()
             if current_author:
                 self.update_author_config(current_author)
             
-            TipWindow(self.parent, "✅ 内容生成成功").show()
-            
-        except Exception as e:
-            TipWindow(self.parent, f"❌ 生成失败: {str(e)}").show()
-            print(f"生成内容失败: {str(e)}")
+            ttft = f"首字 {result['ttft']:.1f}s，" if result.get('ttft') is not None else ""
+            TipWindow(self.parent, f"✅ 内容生成成功（{ttft}总耗时 {result['total_seconds']:.1f}s）").show()
         finally:
-            # 恢复按钮状态
-            self.generate_btn.setEnabled(True)
-            self.generate_btn.setText("生成内容")
+            self.reset_generate_button()
+
+    def handle_generation_error(self, error_msg):
+        TipWindow(self.parent, f"❌ 生成失败: {error_msg}").show()
+        print(f"生成内容失败: {error_msg}")
+        self.reset_generate_button()
 
     def update_progress(self, value, status_text=None):
         """更新进度条和状态文本"""
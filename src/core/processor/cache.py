@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from src.config.config import Config
+from src.core.atomic_file import atomic_open
+
+
+class GenerationCache:
+    """内容生成结果的磁盘缓存
+
+    以 workflow_id 和参数的 sha256 为键，每个结果一个 JSON 文件。
+    超过 TTL 的结果视为未命中并删除；总大小超过上限时先删除最久未使用的结果。
+    """
+
+    def __init__(self, cache_dir=None, ttl=72 * 3600, max_bytes=50 * 1024 * 1024):
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser('~'), '.xhs_system', 'generation_cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        generation_config = Config().get_generation_config()
+        return cls(
+            ttl=generation_config.get('cache_ttl_hours', 72) * 3600,
+            max_bytes=generation_config.get('cache_max_mb', 50) * 1024 * 1024,
+        )
+
+    @staticmethod
+    def make_key(workflow_id, parameters):
+        payload = json.dumps({'workflow_id': workflow_id, 'parameters': parameters},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """返回缓存的结果，未命中或已过期时返回 None"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            if time.time() - entry.get('created_at', 0) > self.ttl:
+                self._remove(path)
+                self.misses += 1
+                return None
+            # 更新访问时间，淘汰时按最久未使用排序
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return entry.get('result')
+
+    def put(self, key, result):
+        path = self._path(key)
+        with self._lock:
+            try:
+                with atomic_open(path) as f:
+                    json.dump({'created_at': time.time(), 'result': result}, f, ensure_ascii=False)
+            except OSError as e:
+                logging.debug(f"写入生成缓存失败: {str(e)}")
+                return
+            self._evict(keep=path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self, keep=None):
+        entries = []
+        total = 0
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # 修改时间是最后一次访问时间，不会早于创建时间，超过 TTL 未访问的一定已过期
+            if now - stat.st_mtime > self.ttl:
+                self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                self._remove(os.path.join(self.cache_dir, name))
+
+
+async def get_or_generate(cache, key, generate, use_cache=True, store=None):
+    """优先返回缓存的结果，未命中时调用 generate() 生成并写入缓存
+
+    use_cache=False（重新生成）时跳过读取，生成后覆盖旧的缓存；
+    store(result) 返回 False 的结果不写入缓存。缓存的结果带 from_cache=True 标记。
+    """
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return dict(cached, from_cache=True)
+    result = await generate()
+    if store is None or store(result):
+        cache.put(key, result)
+    return result
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_generation_cache():
+    """获取全局生成缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache.from_config()
+        return _cache
@@ -1,54 +1,191 @@
+import asyncio
+import csv
+import io
 import json
+import os
+from concurrent.futures import CancelledError
 from PyQt6.QtCore import QThread, pyqtSignal
 
-import requests
+from src.config.config import Config
+from src.core.processor.http_client import run_http, submit_http
+
+WORKFLOW_URL = "http://8.137.103.115:8081/workflow/run"
+WORKFLOW_ID = "7431484143153070132"
+
+
+def workflow_parameters(input_text, header_title, author):
+    """工作流的输入参数"""
+    return {
+        "BOT_USER_INPUT": input_text,
+        "HEADER_TITLE": header_title,
+        "AUTHOR": author
+    }
+
+
+def parse_workflow_result(res, input_text):
+    """把工作流的返回值转换为页面使用的结果"""
+    output_data = json.loads(res['data'])
+    title = json.loads(output_data['output'])['title']
+
+    return {
+        'title': title,
+        'content': output_data['content'],
+        'cover_image': output_data['image'],
+        'content_images': output_data['image_content'],
+        'input_text': input_text
+    }
+
+
+async def generate_content(client, input_text, header_title, author):
+    """调用工作流生成一篇内容（复用客户端的连接池）
+
+    缓存由 llm.LLMRouter 统一处理，在选择后端之前查询。
+    """
+    res = await client.post_json(WORKFLOW_URL, {
+        "workflow_id": WORKFLOW_ID,
+        "parameters": workflow_parameters(input_text, header_title, author)
+    })
+    return parse_workflow_result(res, input_text)
+
+
+def load_topics(text=None, path=None, header_title="", author=""):
+    """读取批量生成的主题
+
+    支持每行一个主题的文本、CSV（topic 列或第一列）和 JSONL（topic 或 BOT_USER_INPUT 字段），
+    CSV / JSONL 中可以用 header_title、author 覆盖默认值。
+    返回 [{'topic', 'header_title', 'author'}, ...]
+    """
+    if path:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            text = f.read()
+        kind = os.path.splitext(path)[1].lower()
+    else:
+        kind = ".txt"
+    text = text or ""
+
+    rows = []
+    if kind == ".jsonl":
+        for line in text.splitlines():
+            if line.strip():
+                item = json.loads(line)
+                rows.append(item if isinstance(item, dict) else {'topic': str(item)})
+    elif kind == ".csv":
+        reader = list(csv.reader(io.StringIO(text)))
+        if reader and 'topic' in [cell.strip() for cell in reader[0]]:
+            header = [cell.strip() for cell in reader[0]]
+            rows = [dict(zip(header, row)) for row in reader[1:]]
+        else:
+            rows = [{'topic': row[0]} for row in reader if row]
+    else:
+        rows = [{'topic': line} for line in text.splitlines()]
+
+    topics = []
+    for row in rows:
+        topic = (row.get('topic') or row.get('BOT_USER_INPUT') or "").strip()
+        if topic:
+            topics.append({
+                'topic': topic,
+                'header_title': row.get('header_title') or header_title,
+                'author': row.get('author') or author,
+            })
+    return topics
+
+
+class BatchGeneratorThread(QThread):
+    """批量生成内容，并发数有上限，每完成一个立即发出结果（按完成顺序）"""
+    item_finished = pyqtSignal(int, dict)  # 序号、生成结果
+    item_failed = pyqtSignal(int, str, str)  # 序号、主题、错误信息
+    progress = pyqtSignal(int, int)  # 已完成数、总数
+    all_done = pyqtSignal()
+
+    def __init__(self, topics, concurrency=None):
+        super().__init__()
+        self.topics = topics
+        if concurrency is None:
+            concurrency = Config().get_generation_config().get('batch_concurrency', 3)
+        self.concurrency = max(1, concurrency)
+        self._future = None
+
+    async def _generate_one(self, client, router, semaphore, index, item):
+        async with semaphore:
+            try:
+                result = await router.generate(client, dict(item, kind='article'))
+                return index, item, result, None
+            except Exception as e:
+                return index, item, None, str(e)
+
+    async def _run_batch(self, client):
+        # 延迟导入，避免与 llm 模块循环依赖
+        from src.core.processor.llm import get_llm_router
+
+        router = get_llm_router()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._generate_one(client, router, semaphore, index, item))
+                 for index, item in enumerate(self.topics)]
+        done = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, item, result, error = await next_done
+                done += 1
+                if error is None:
+                    self.item_finished.emit(index, result)
+                else:
+                    self.item_failed.emit(index, item['topic'], error)
+                self.progress.emit(done, len(tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def run(self):
+        try:
+            self._future = submit_http(self._run_batch)
+            self._future.result()
+        except CancelledError:
+            pass
+        except Exception as e:
+            self.item_failed.emit(-1, "", str(e))
+        finally:
+            self.all_done.emit()
+
+    def stop(self):
+        """取消尚未完成的主题"""
+        if self._future is not None:
+            self._future.cancel()
+
 
 class ContentGeneratorThread(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
 
-    def __init__(self, input_text, header_title, author, generate_btn):
+    def __init__(self, input_text, header_title, author, generate_btn, use_cache=True):
         super().__init__()
         self.input_text = input_text
         self.header_title = header_title
         self.author = author
         self.generate_btn = generate_btn
+        # 重新生成时跳过缓存
+        self.use_cache = use_cache
 
     def run(self):
+        # 延迟导入，避免与 llm 模块循环依赖
+        from src.core.processor.llm import get_llm_router
+
         try:
             # 更新按钮状态
             self.generate_btn.setText("⏳ 生成中...")
             self.generate_btn.setEnabled(False)
 
-            workflow_id = "7431484143153070132"
-            parameters = {
-                "BOT_USER_INPUT": self.input_text,
-                "HEADER_TITLE": self.header_title,
-                "AUTHOR": self.author
-            }
-
-            response = requests.post(
-                "http://8.137.103.115:8081/workflow/run",
-                json={
-                    "workflow_id": workflow_id,
-                    "parameters": parameters
-                }
-            )
-
-            if response.status_code != 200:
-                raise Exception("API调用失败")
-
-            res = response.json()
-            output_data = json.loads(res['data'])
-            title = json.loads(output_data['output'])['title']
-
-            result = {
-                'title': title,
-                'content': output_data['content'],
-                'cover_image': json.loads(res['data'])['image'],
-                'content_images': json.loads(res['data'])['image_content'],
-                'input_text': self.input_text
+            request = {
+                'kind': 'article',
+                'topic': self.input_text,
+                'header_title': self.header_title,
+                'author': self.author,
+                'use_cache': self.use_cache,
             }
+            router = get_llm_router()
+            # 总超时包括排队、重试和切换后端，超时后取消请求
+            timeout = Config().get_generation_config().get('timeout', 300)
+            result = run_http(lambda client: router.generate(client, request), timeout)
 
             self.finished.emit(result)
         except Exception as e:
@@ -56,4 +193,4 @@ class ContentGeneratorThread(QThread):
         finally:
             # 恢复按钮状态
             self.generate_btn.setText("✨ 生成内容")
-            self.generate_btn.setEnabled(True)
\ No newline at end of file
+            self.generate_btn.setEnabled(True)
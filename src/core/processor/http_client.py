@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from src.config.config import Config
+from src.core.loop_thread import BackgroundLoop
+
+
+# 可以安全重复发送的请求方法；POST 等请求只在确认没有发出时重试（连接失败、5xx）
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def _request_not_sent(error):
+    """连接阶段的错误，请求还没有发到服务器"""
+    connect_errors = (aiohttp.ClientConnectorError,)
+    if hasattr(aiohttp, "ConnectionTimeoutError"):
+        connect_errors += (aiohttp.ConnectionTimeoutError,)
+    return isinstance(error, connect_errors)
+
+
+class HttpError(Exception):
+    """HTTP 请求失败（状态码错误或重试后仍无法连接）"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncHttpClient:
+    """共享连接池的异步 HTTP 客户端
+
+    连接保持复用；连接和读取分别有超时；5xx 响应和连接错误按指数退避重试。
+    POST 等非幂等请求读取超时或连接中断时不重试，避免重复执行耗时的生成任务。
+    """
+
+    def __init__(self, connect_timeout=10, read_timeout=180, retries=3, backoff=1.0,
+                 max_backoff=30, limit=20, limit_per_host=8):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._session = None
+
+    @classmethod
+    def from_config(cls):
+        http_config = Config().get_http_config()
+        return cls(
+            connect_timeout=http_config.get('connect_timeout', 10),
+            read_timeout=http_config.get('read_timeout', 180),
+            retries=http_config.get('retries', 3),
+            backoff=http_config.get('backoff', 1.0),
+        )
+
+    def _get_session(self):
+        if aiohttp is None:
+            raise ImportError("请先安装 aiohttp: pip install aiohttp")
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    def _delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        # 加一点随机抖动，避免多个请求同时重试
+        return delay * (0.5 + random.random() / 2)
+
+    async def request_json(self, method, url, retries=None, timeout=None, **kwargs):
+        """发送请求并返回解析后的 JSON，5xx 和连接错误会重试
+
+        timeout 为本次请求的总超时（秒），为空时使用连接和读取超时。
+        """
+        retries = self.retries if retries is None else retries
+        session = self._get_session()
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        last_error = None
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status >= 500:
+                        last_error = HttpError(f"服务器错误: HTTP {response.status}", response.status)
+                    elif response.status != 200:
+                        raise HttpError(f"API调用失败: HTTP {response.status}", response.status)
+                    else:
+                        result = await response.json(content_type=None)
+                        logging.debug(f"{method} {url} 耗时 {(time.perf_counter() - started) * 1000:.0f}ms")
+                        return result
+            except (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+                last_error = HttpError(f"请求超时或连接失败: {type(e).__name__} {str(e)}")
+                if method.upper() not in IDEMPOTENT_METHODS and not _request_not_sent(e):
+                    # 请求可能已经在服务器上执行，重试会重复执行
+                    raise last_error
+
+            if attempt < retries:
+                delay = self._delay(attempt)
+                logging.debug(f"{method} {url} 第 {attempt + 1} 次失败（{last_error}），{delay:.1f}s 后重试")
+                await asyncio.sleep(delay)
+        raise last_error
+
+    async def stream_lines(self, method, url, read_timeout=None, **kwargs):
+        """逐行读取响应（例如 NDJSON 流），读取超时作用于两行之间；开始读取后不再重试"""
+        session = self._get_session()
+        if read_timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=read_timeout)
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                if response.status != 200:
+                    raise HttpError(f"API调用失败: HTTP {response.status}", response.status)
+                async for line in response.content:
+                    line = line.strip()
+                    if line:
+                        yield line
+        except (aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+            raise HttpError(f"请求超时或连接失败: {type(e).__name__} {str(e)}")
+
+    async def post_json(self, url, payload, **kwargs):
+        return await self.request_json("POST", url, json=payload, **kwargs)
+
+    async def get_json(self, url, **kwargs):
+        return await self.request_json("GET", url, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# 所有同步调用方共享同一个事件循环和连接池
+_http_loop = BackgroundLoop("xhs-http")
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """获取全局 HTTP 客户端（只能在 HTTP 事件循环中使用）"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = AsyncHttpClient.from_config()
+        return _http_client
+
+
+def run_http(coro_factory, timeout=None):
+    """在 HTTP 事件循环中执行 coro_factory(client) 并等待结果（供 QThread 等同步代码调用）
+
+    timeout 为总的等待时间（秒），超时后取消请求并抛出 HttpError。
+    """
+    if _http_loop.in_loop_thread():
+        raise RuntimeError("不能在 HTTP 事件循环线程内同步等待请求")
+    future = submit_http(coro_factory)
+    try:
+        return future.result(timeout)
+    except FuturesTimeoutError:
+        future.cancel()
+        raise HttpError(f"请求超时（{timeout}秒）")
+
+
+def submit_http(coro_factory):
+    """在 HTTP 事件循环中执行 coro_factory(client)，立即返回 concurrent Future"""
+    client = get_http_client()
+    return _http_loop.submit(coro_factory(client))
+
+
+def post_json(url, payload, timeout=None, **kwargs):
+    """同步发送 JSON POST 请求，复用全局连接池"""
+    return run_http(lambda client: client.post_json(url, payload, **kwargs), timeout)
+
+
+def close_http_client(timeout=5):
+    """关闭连接池（程序退出时调用）"""
+    if _http_client is not None:
+        try:
+            _http_loop.run(_http_client.close(), timeout)
+        except Exception as e:
+            logging.debug(f"关闭 HTTP 连接池失败: {str(e)}")
+    _http_loop.stop()
@@ -0,0 +1,346 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import CancelledError
+from urllib.parse import urlparse
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from src.config.config import Config
+from src.core.metrics import BackendStats
+from src.core.processor.cache import GenerationCache, get_generation_cache, get_or_generate
+from src.core.processor.content import WORKFLOW_ID, WORKFLOW_URL, generate_content, workflow_parameters
+from src.core.processor.http_client import HttpError, submit_http
+from src.core.processor.ollama import (OLLAMA_MODEL, OLLAMA_URL, IncrementalJsonFields,
+                                       build_article_prompt, build_video_prompt,
+                                       parse_generated_text)
+
+
+def classify_generation_error(error):
+    """把生成异常归类，用于失败统计"""
+    if isinstance(error, HttpError) and error.status:
+        return f"http_{error.status}"
+    message = str(error)
+    if isinstance(error, asyncio.TimeoutError) or "超时" in message or "timeout" in message.lower():
+        return "timeout"
+    if isinstance(error, OSError) or "连接" in message or "connection" in message.lower():
+        return "connection"
+    return "error"
+
+
+class GenerationBackend(ABC):
+    """文案生成后端
+
+    request 为 {'kind': 'article' | 'video', 'topic', 'header_title', 'author', 'use_cache'}，
+    返回至少包含 title / content 的结果；on_token 用于支持流式输出的后端逐段回调。
+    cacheable 为 True 的后端结果写入生成缓存；degraded_kinds 中的类型只在其他后端都不可用时使用。
+    """
+
+    name = ""
+    cacheable = False
+    degraded_kinds = frozenset()
+
+    @abstractmethod
+    async def generate(self, client, request, on_token=None):
+        """生成一篇内容"""
+
+    async def health_check(self, client):
+        """后端可用时返回 True"""
+        return True
+
+
+class WorkflowBackend(GenerationBackend):
+    """远程工作流，图文内容带封面和配图"""
+
+    name = "workflow"
+    cacheable = True
+    # 视频文案需要标签和流式输出，工作流只作为本地模型不可用时的备用
+    degraded_kinds = frozenset({'video'})
+
+    def __init__(self, url=WORKFLOW_URL, connect_timeout=3):
+        self.url = url
+        self.connect_timeout = connect_timeout
+
+    async def generate(self, client, request, on_token=None):
+        return await generate_content(client, request['topic'], request.get('header_title', ""),
+                                      request.get('author', ""))
+
+    async def health_check(self, client):
+        # 工作流服务没有健康检查接口，只检查端口能否连通
+        parsed = urlparse(self.url)
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        _, writer = await asyncio.wait_for(asyncio.open_connection(parsed.hostname, port),
+                                           self.connect_timeout)
+        writer.close()
+        await writer.wait_closed()
+        return True
+
+
+class OllamaBackend(GenerationBackend):
+    """本地 Ollama 模型，流式输出，没有配图"""
+
+    name = "ollama"
+    # 图文内容没有配图，只作为工作流不可用时的备用
+    degraded_kinds = frozenset({'article'})
+
+    def __init__(self, url=OLLAMA_URL, model=OLLAMA_MODEL, read_timeout=60):
+        self.url = url.rstrip('/')
+        self.model = model
+        # 两个 token 之间的最长等待时间，而不是整次生成的时间
+        self.read_timeout = read_timeout
+
+    def _prompt(self, request):
+        if request.get('kind') == 'video':
+            return build_video_prompt(request['topic'])
+        return build_article_prompt(request['topic'], request.get('header_title', ""),
+                                    request.get('author', ""))
+
+    async def generate(self, client, request, on_token=None):
+        payload = {
+            "model": self.model,
+            "prompt": self._prompt(request),
+            "stream": True
+        }
+        text = []
+        try:
+            async for line in client.stream_lines("POST", f"{self.url}/api/generate",
+                                                  read_timeout=self.read_timeout, json=payload):
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise Exception(chunk['error'])
+                piece = chunk.get('response', '')
+                if piece:
+                    text.append(piece)
+                    if on_token:
+                        on_token(piece)
+                if chunk.get('done'):
+                    break
+        except HttpError as e:
+            if e.status == 404:
+                raise HttpError("API 地址错误或模型不存在，请检查 Ollama 服务配置", e.status)
+            if e.status is None:
+                raise HttpError("无法连接到 Ollama 服务，请确保服务已启动")
+            raise
+
+        result = parse_generated_text("".join(text))
+        if request.get('kind') == 'video':
+            return result
+        # 图文页面没有单独的标签输入框，标签追加到正文末尾
+        tags = [tag.strip() for tag in result['tags'].replace('，', ',').split(',') if tag.strip()]
+        content = result['content']
+        if tags:
+            content += "\n\n" + " ".join(f"#{tag}" for tag in tags)
+        return {
+            'title': result['title'],
+            'content': content,
+            'cover_image': None,
+            'content_images': [],
+            'input_text': request['topic']
+        }
+
+    async def health_check(self, client):
+        res = await client.get_json(f"{self.url}/api/tags", retries=0, timeout=5)
+        models = [model.get('name') for model in res.get('models', [])]
+        if self.model not in models:
+            raise Exception(f"Ollama 未安装模型 {self.model}")
+        return True
+
+
+class LLMRouter:
+    """统一的文案生成入口
+
+    先查生成缓存，未命中时按平均延迟把请求发给最快的健康后端，失败时切换到下一个。
+    还没有测量过延迟的后端排在已测量的后端之后（按配置顺序），不拿用户的请求去试探；
+    对某类内容只能降级生成的后端（例如没有配图的图文）只在其他后端都不可用时使用。
+    定期在后台做健康检查，检查失败的后端进入冷却期，请求不再先发给它。
+    """
+
+    def __init__(self, backends, health_interval=60, logger=None, log_interval=20, cache=None):
+        self.backends = {backend.name: backend for backend in backends}
+        self._order = {name: index for index, name in enumerate(self.backends)}
+        self.cache = cache
+        # 生成耗时长，连续两次失败就进入冷却期
+        self.stats = {name: BackendStats(name, failure_threshold=2, cooldown=60) for name in self.backends}
+        self.health_interval = health_interval
+        self.logger = logger or logging.getLogger('app')
+        self.log_interval = log_interval
+        self._calls = 0
+        self._last_health_check = 0
+        self._health_task = None
+        self._lock = threading.Lock()
+
+    async def _check_one(self, client, name):
+        try:
+            await self.backends[name].health_check(client)
+            return True
+        except Exception as e:
+            self.stats[name].mark_unhealthy()
+            logging.debug(f"生成后端 {name} 健康检查失败: {type(e).__name__} {str(e)}")
+            return False
+
+    async def check_health(self, client):
+        """检查所有后端，返回 {名称: 是否可用}"""
+        self._last_health_check = time.time()
+        names = list(self.backends)
+        results = await asyncio.gather(*(self._check_one(client, name) for name in names))
+        return dict(zip(names, results))
+
+    def _maybe_check_health(self, client):
+        if not self.health_interval or time.time() - self._last_health_check < self.health_interval:
+            return
+        if self._health_task is not None and not self._health_task.done():
+            return
+        self._last_health_check = time.time()
+        # 在后台检查，不阻塞本次生成
+        self._health_task = asyncio.ensure_future(self.check_health(client))
+
+    def ordered_stats(self, kind):
+        """本次请求尝试后端的顺序"""
+        def key(stats):
+            return (not stats.healthy(),
+                    kind in self.backends[stats.name].degraded_kinds,
+                    stats.consecutive_failures > 0,
+                    stats.ewma_ms is None,
+                    stats.ewma_ms or 0,
+                    self._order[stats.name])
+        return sorted(self.stats.values(), key=key)
+
+    @staticmethod
+    def cache_key(request):
+        """图文与工作流的缓存键一致；其他类型的内容加上类型区分，不与图文共用结果"""
+        parameters = workflow_parameters(request['topic'], request.get('header_title', ""),
+                                         request.get('author', ""))
+        kind = request.get('kind', 'article')
+        if kind != 'article':
+            parameters = dict(parameters, kind=kind)
+        return GenerationCache.make_key(WORKFLOW_ID, parameters)
+
+    def _cacheable(self, kind, result):
+        # 降级生成的结果不写入缓存，避免后端恢复后仍然命中降级结果
+        backend = self.backends[result['backend']]
+        return backend.cacheable and kind not in backend.degraded_kinds
+
+    async def generate(self, client, request, on_token=None):
+        """在 HTTP 事件循环中生成一篇内容，结果的 backend 字段为实际使用的后端
+
+        缓存命中的结果带 from_cache 标记；降级生成的结果带 degraded 标记。
+        """
+        self._maybe_check_health(client)
+        cache = self.cache or get_generation_cache()
+        result = await get_or_generate(
+            cache, self.cache_key(request), lambda: self._generate(client, request, on_token),
+            request.get('use_cache', True), store=lambda r: self._cacheable(request.get('kind'), r))
+        if request.get('kind') == 'video':
+            result.setdefault('tags', "")
+        result['degraded'] = request.get('kind') in self.backends.get(
+            result.get('backend'), GenerationBackend).degraded_kinds
+        return result
+
+    async def _generate(self, client, request, on_token=None):
+        errors = []
+        for stats in self.ordered_stats(request.get('kind')):
+            start = time.perf_counter()
+            try:
+                result = await self.backends[stats.name].generate(client, request, on_token)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                latency_ms = (time.perf_counter() - start) * 1000
+                stats.record_failure(latency_ms, classify_generation_error(e))
+                errors.append(f"{stats.name}: {str(e)}")
+                logging.debug(f"生成后端 {stats.name} 失败，切换下一个: {str(e)}")
+                continue
+            stats.record_success((time.perf_counter() - start) * 1000)
+            self._after_call()
+            return dict(result, backend=stats.name)
+        self._after_call()
+        raise Exception("所有生成后端均失败: " + "; ".join(errors))
+
+    def _after_call(self):
+        with self._lock:
+            self._calls += 1
+            should_log = self.log_interval and self._calls % self.log_interval == 0
+        if should_log:
+            self.log_stats()
+
+    def snapshot(self):
+        return [stats.snapshot() for stats in self.stats.values()]
+
+    def log_stats(self):
+        """把各后端的统计写入日志"""
+        for stats in self.stats.values():
+            self.logger.info(f"生成统计 {stats.summary()}")
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def _default_backends(names, llm_config):
+    available = {
+        "workflow": lambda: WorkflowBackend(),
+        "ollama": lambda: OllamaBackend(llm_config.get('ollama_url', OLLAMA_URL),
+                                        llm_config.get('ollama_model', OLLAMA_MODEL)),
+    }
+    return [available[name]() for name in names if name in available]
+
+
+def get_llm_router():
+    """获取全局文案生成路由，后端列表见 llm.backends 配置"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            llm_config = Config().get_llm_config()
+            names = llm_config.get('backends', ["workflow", "ollama"])
+            _router = LLMRouter(_default_backends(names, llm_config),
+                                health_interval=llm_config.get('health_interval', 60))
+        return _router
+
+
+class GenerationThread(QThread):
+    """在后台通过生成路由生成文案，支持流式输出的后端逐段发出并增量解析 JSON 字段"""
+    token = pyqtSignal(str)  # 新生成的文本
+    field_updated = pyqtSignal(str, str)  # 字段名、当前值
+    first_token = pyqtSignal(float)  # 首个 token 的耗时（秒）
+    finished = pyqtSignal(dict)  # 生成结果以及耗时、使用的后端
+    error = pyqtSignal(str)
+
+    def __init__(self, request):
+        super().__init__()
+        self.request = request
+        self._future = None
+        self._started = None
+        self._ttft = None
+        self._parser = IncrementalJsonFields()
+
+    def _on_token(self, piece):
+        if self._ttft is None:
+            self._ttft = time.perf_counter() - self._started
+            self.first_token.emit(self._ttft)
+        self.token.emit(piece)
+        for field, value in self._parser.feed(piece).items():
+            self.field_updated.emit(field, value)
+
+    def run(self):
+        self._started = time.perf_counter()
+        router = get_llm_router()
+        try:
+            self._future = submit_http(lambda client: router.generate(client, self.request, self._on_token))
+            result = self._future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+
+        result['ttft'] = self._ttft
+        result['total_seconds'] = time.perf_counter() - self._started
+        self.finished.emit(result)
+
+    def stop(self):
+        """取消正在进行的生成"""
+        if self._future is not None:
+            self._future.cancel()
@@ -0,0 +1,183 @@
+import json
+
+OLLAMA_URL = "http://127.0.0.1:11434"
+OLLAMA_MODEL = "qwen2.5:14b"
+
+# 流式解析的 JSON 字段
+STREAM_FIELDS = ("title", "content", "tags")
+
+def build_video_prompt(keywords):
+    """视频文案的提示词"""
+    return f"""
+                你是一个专业的小红书文案写手。请根据以下关键词直接生成一篇可以发布的小红书文案。
+
+                关键词: {keywords}
+
+                要求：
+                1. 直接生成标题、正文内容和标签，不要生成示例或模板
+                2. 标题要简短有力，最好带emoji，能吸引用户点击
+                3. 正文要活泼生动，适合视频内容展示
+                4. 使用"家人们"、"姐妹们"等亲和的称呼
+                5. 多用"啊啊啊"、"太太太"等语气词增加活力
+                6. 标签要相关且吸引人，5-10个即可
+
+                返回格式：
+                {{
+                    "title": "标题（带emoji，15字以内）",
+                    "content": "正文内容（活泼生动，有吸引力）",
+                    "tags": "标签1,标签2,标签3,标签4,标签5"
+                }}
+
+                请直接返回 JSON 格式的内容，不要有其他额外的文字。
+            """
+
+
+def build_article_prompt(topic, header_title="", author=""):
+    """图文文案的提示词（工作流不可用时由本地模型生成）"""
+    extra = ""
+    if header_title:
+        extra += f"\n                栏目: {header_title}"
+    if author:
+        extra += f"\n                作者: {author}"
+    return f"""
+                你是一个专业的小红书文案写手。请根据以下主题直接生成一篇可以发布的小红书图文笔记。
+
+                主题: {topic}{extra}
+
+                要求：
+                1. 标题简短有力，带emoji，20字以内
+                2. 正文分段清晰，内容实用，适合配图阅读
+                3. 标签相关且吸引人，5-10个即可
+
+                返回格式：
+                {{
+                    "title": "标题",
+                    "content": "正文内容",
+                    "tags": "标签1,标签2,标签3,标签4,标签5"
+                }}
+
+                请直接返回 JSON 格式的内容，不要有其他额外的文字。
+            """
+
+
+def parse_generated_text(response_text):
+    """把模型输出解析为 {'title', 'content', 'tags'}，不是 JSON 时按行拆分"""
+    # 清理可能的多余字符
+    response_text = response_text.strip()
+    if response_text.startswith('```json'):
+        response_text = response_text[7:]
+    if response_text.endswith('```'):
+        response_text = response_text[:-3]
+
+    try:
+        generated_data = json.loads(response_text)
+        generated_title = generated_data.get('title', '')
+        generated_content = generated_data.get('content', '')
+        generated_tags = generated_data.get('tags', '')
+        if not generated_title or not generated_content:
+            raise ValueError("生成的内容格式不正确")
+        if isinstance(generated_tags, list):
+            generated_tags = ','.join(generated_tags)
+        return {'title': generated_title, 'content': generated_content, 'tags': generated_tags}
+    except (json.JSONDecodeError, ValueError, AttributeError):
+        pass
+
+    # 如果不是JSON格式，尝试智能分割文本
+    generated_title = ""
+    generated_content = []
+    generated_tags = []
+    for line in response_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if not generated_title:
+            generated_title = line
+        elif line.startswith('#'):  # 识别标签
+            generated_tags.append(line.strip('#'))
+        else:
+            generated_content.append(line)
+
+    return {
+        'title': generated_title or "视频分享",
+        'content': '\n'.join(generated_content) if generated_content else response_text,
+        'tags': ', '.join(generated_tags),
+    }
+
+
+class IncrementalJsonFields:
+    """从不完整的 JSON 文本中逐步取出字符串字段的当前值
+
+    每个字段找到 "key": " 之后记住值的起始位置，之后只解码新增的字符。
+    """
+
+    _ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+
+    def __init__(self, fields=STREAM_FIELDS):
+        self.buffer = ""
+        # field -> [下一个待解码的位置, 已解码的值, 是否结束]
+        self._state = {field: None for field in fields}
+
+    def _find_start(self, field):
+        key = f'"{field}"'
+        index = self.buffer.find(key)
+        if index < 0:
+            return None
+        i = index + len(key)
+        while i < len(self.buffer) and self.buffer[i] in ' \t\r\n':
+            i += 1
+        if i >= len(self.buffer) or self.buffer[i] != ':':
+            return None
+        i += 1
+        while i < len(self.buffer) and self.buffer[i] in ' \t\r\n':
+            i += 1
+        if i >= len(self.buffer) or self.buffer[i] != '"':
+            return None
+        return i + 1
+
+    def _decode(self, state):
+        pos, value = state[0], state[1]
+        chars = []
+        while pos < len(self.buffer):
+            ch = self.buffer[pos]
+            if ch == '\\':
+                if pos + 1 >= len(self.buffer):
+                    break  # 转义序列还不完整，等待更多内容
+                nxt = self.buffer[pos + 1]
+                if nxt == 'u':
+                    if pos + 6 > len(self.buffer):
+                        break
+                    try:
+                        chars.append(chr(int(self.buffer[pos + 2:pos + 6], 16)))
+                    except ValueError:
+                        pass
+                    pos += 6
+                else:
+                    chars.append(self._ESCAPES.get(nxt, nxt))
+                    pos += 2
+                continue
+            if ch == '"':
+                state[2] = True
+                pos += 1
+                break
+            chars.append(ch)
+            pos += 1
+        state[0] = pos
+        state[1] = value + "".join(chars)
+        return bool(chars)
+
+    def feed(self, chunk):
+        """追加文本，返回本次有变化的字段 {field: 当前值}"""
+        self.buffer += chunk
+        changed = {}
+        for field, state in self._state.items():
+            if state is None:
+                start = self._find_start(field)
+                if start is None:
+                    continue
+                state = self._state[field] = [start, "", False]
+            if not state[2] and self._decode(state):
+                changed[field] = state[1]
+        return changed
+
+    def values(self):
+        return {field: state[1] for field, state in self._state.items() if state is not None}
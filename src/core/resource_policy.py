@@ -0,0 +1,335 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from src.config.config import Config
+from src.core.atomic_file import atomic_open
+
+# 发布流程不需要的资源类型
+DEFAULT_BLOCKED_TYPES = ["font", "media"]
+
+# 只拦截命中规则的 URL 时，按资源类型拦截改为按扩展名匹配
+TYPE_URL_PATTERNS = {
+    "font": r"\.(woff2?|ttf|otf|eot)(\?|$)",
+    "media": r"\.(mp4|webm|m3u8|mp3|m4a|ogg)(\?|$)",
+}
+
+# 统计、埋点和监控请求
+DEFAULT_BLOCKED_PATTERNS = [
+    r"apm-fe\.xiaohongshu\.com",
+    r"t2\.xiaohongshu\.com",
+    r"spltest\.xiaohongshu\.com",
+    r"lng\.xiaohongshu\.com",
+    r"google-analytics\.com|googletagmanager\.com|hm\.baidu\.com",
+    r"sentry",
+    r"/api/[^?]*/(track|tracker|report|collect)",
+]
+
+# 埋点请求直接返回空响应，避免页面脚本重试
+DEFAULT_STUB_PATTERNS = [
+    r"/api/[^?]*/(track|tracker|report|collect)",
+    r"apm-fe\.xiaohongshu\.com",
+]
+
+# 发布流程必须放行的请求，优先级高于拦截规则
+DEFAULT_ALLOWED_PATTERNS = [
+    r"ros-upload",
+    r"/api/media/",
+    r"/upload",
+    r"creator\.xiaohongshu\.com/api/",
+    r"edith\.xiaohongshu\.com/web_api/sns/v\d+/note",
+]
+
+# 没有实测数据时各类资源的估算大小（字节）
+DEFAULT_SIZE_ESTIMATES = {
+    "image": 60 * 1024,
+    "font": 80 * 1024,
+    "media": 512 * 1024,
+    "script": 30 * 1024,
+    "stylesheet": 20 * 1024,
+    "xhr": 2 * 1024,
+    "fetch": 2 * 1024,
+    "other": 5 * 1024,
+}
+
+# 每个页面至少采集这么多次不拦截的加载时间作为基线
+MIN_BASELINE_SAMPLES = 3
+
+# 多个 poster 共用同一个统计文件，读取合并和写入时互斥
+_stats_lock = threading.Lock()
+
+LOAD_TIME_JS = """
+() => {
+    const entry = performance.getEntriesByType('navigation')[0];
+    if (entry && entry.loadEventEnd > 0) {
+        return entry.loadEventEnd - entry.startTime;
+    }
+    const t = performance.timing;
+    return t.loadEventEnd > 0 ? t.loadEventEnd - t.navigationStart : null;
+}
+"""
+
+
+class NavigationStats:
+    """一次页面导航的拦截统计"""
+
+    def __init__(self, url):
+        self.url = url
+        self.started_at = time.time()
+        self.blocked = 0
+        self.stubbed = 0
+        self.bytes_saved = 0
+        self.load_ms = None
+        self.load_ms_saved = None
+        # 基线采样：本次导航不拦截任何请求，只测量加载时间
+        self.baseline = False
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "blocked": self.blocked,
+            "stubbed": self.stubbed,
+            "bytes_saved": self.bytes_saved,
+            "load_ms": self.load_ms,
+            "load_ms_saved": self.load_ms_saved,
+            "baseline": self.baseline,
+        }
+
+
+class ResourcePolicy:
+    """创作者页面的资源拦截策略
+
+    按资源类型和 URL 规则拦截或替换请求，放行名单优先。
+    每次导航统计拦截的请求数、估算节省的流量，以及相对未拦截时的加载时间差。
+    已注册路由的上下文中按 baseline_sample_rate 抽样（每个页面前 MIN_BASELINE_SAMPLES 次必定抽样）
+    放行整次导航的所有请求，测得的加载时间作为基线；基线和拦截时一样没有 HTTP 缓存，两者可以直接比较。
+
+    只对可能被拦截的 URL 注册路由，其余请求不经过 Python。注意只要注册了路由，
+    Playwright 就会关闭整个上下文的 HTTP 缓存，所以持久化用户目录默认不拦截（route_persistent），
+    这种上下文只记录加载时间，不计算节省。
+    """
+
+    def __init__(self, enabled=True, blocked_types=None, blocked_patterns=None,
+                 allowed_patterns=None, stub_patterns=None, stats_file=None, route_persistent=False,
+                 baseline_sample_rate=0.05):
+        self.enabled = enabled
+        self.route_persistent = route_persistent
+        self.baseline_sample_rate = baseline_sample_rate
+        # 是否真正注册了拦截路由
+        self.routed = False
+        self.blocked_types = set(blocked_types if blocked_types is not None else DEFAULT_BLOCKED_TYPES)
+        self.blocked_patterns = [re.compile(p) for p in (blocked_patterns if blocked_patterns is not None
+                                                         else DEFAULT_BLOCKED_PATTERNS)]
+        self.allowed_patterns = [re.compile(p) for p in (allowed_patterns if allowed_patterns is not None
+                                                         else DEFAULT_ALLOWED_PATTERNS)]
+        self.stub_patterns = [re.compile(p) for p in (stub_patterns if stub_patterns is not None
+                                                      else DEFAULT_STUB_PATTERNS)]
+        if stats_file is None:
+            stats_file = os.path.join(os.path.expanduser('~'), '.xhs_system', 'resource_stats.json')
+        self.stats_file = stats_file
+
+        self.navigations = []
+        self._current = {}  # page -> NavigationStats
+        persisted = self._load_stats()
+        # 各类资源实测的平均大小: type -> [总字节, 次数]
+        self._sizes = persisted.get("sizes", {})
+        # 未拦截时各页面的平均加载时间: path -> [总毫秒, 次数]
+        self._baseline = persisted.get("baseline_load_ms", {})
+        # 上次保存后新增的统计，保存时累加到文件中的最新数据上
+        self._pending = {"sizes": {}, "baseline_load_ms": {}}
+
+    @classmethod
+    def from_config(cls):
+        policy_config = Config().get_resource_policy_config()
+        return cls(
+            enabled=policy_config.get('enabled', True),
+            blocked_types=policy_config.get('blocked_types'),
+            blocked_patterns=policy_config.get('blocked_patterns'),
+            allowed_patterns=policy_config.get('allowed_patterns'),
+            stub_patterns=policy_config.get('stub_patterns'),
+            route_persistent=policy_config.get('route_persistent_profile', False),
+            baseline_sample_rate=policy_config.get('baseline_sample_rate', 0.05),
+        )
+
+    def _load_stats(self):
+        try:
+            if os.path.exists(self.stats_file):
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.debug(f"加载资源统计失败: {str(e)}")
+        return {}
+
+    def _record(self, table, key, value):
+        """累加一条 [总量, 次数] 统计，同时记入待保存的增量"""
+        current = self._sizes if table == "sizes" else self._baseline
+        for target in (current, self._pending[table]):
+            entry = target.setdefault(key, [0, 0])
+            entry[0] += value
+            entry[1] += 1
+
+    def _save_stats(self):
+        """把上次保存后的增量合并到文件中的最新统计，不覆盖其他 poster 写入的数据"""
+        with _stats_lock:
+            persisted = self._load_stats()
+            merged = {}
+            for table, delta in self._pending.items():
+                current = persisted.get(table)
+                current = current if isinstance(current, dict) else {}
+                for key, (total, count) in delta.items():
+                    entry = current.setdefault(key, [0, 0])
+                    entry[0] += total
+                    entry[1] += count
+                merged[table] = current
+            try:
+                with atomic_open(self.stats_file) as f:
+                    json.dump(merged, f, indent=2)
+            except Exception as e:
+                logging.debug(f"保存资源统计失败: {str(e)}")
+                return
+            self._pending = {"sizes": {}, "baseline_load_ms": {}}
+            self._sizes = merged["sizes"]
+            self._baseline = merged["baseline_load_ms"]
+
+    def decide(self, url, resource_type):
+        """返回 allow / block / stub"""
+        if any(p.search(url) for p in self.allowed_patterns):
+            return "allow"
+        if any(p.search(url) for p in self.stub_patterns):
+            return "stub"
+        if resource_type in self.blocked_types or any(p.search(url) for p in self.blocked_patterns):
+            return "block"
+        return "allow"
+
+    def route_pattern(self):
+        """可能被拦截或替换的 URL，只有这些请求会交给 _handle_route"""
+        patterns = [p.pattern for p in self.blocked_patterns + self.stub_patterns]
+        patterns += [TYPE_URL_PATTERNS[t] for t in sorted(self.blocked_types) if t in TYPE_URL_PATTERNS]
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+    async def install(self, context, persistent=False):
+        """在上下文上安装拦截规则和统计监听
+
+        persistent 为 True（持久化用户目录）且未开启 route_persistent 时只统计不拦截，保留 HTTP 缓存。
+        """
+        pattern = self.route_pattern()
+        if self.enabled and pattern is not None and (self.route_persistent or not persistent):
+            await context.route(pattern, self._handle_route)
+            self.routed = True
+        context.on("page", self._watch_page)
+        for page in context.pages:
+            self._watch_page(page)
+
+    def _estimate_size(self, resource_type):
+        total, count = self._sizes.get(resource_type, (0, 0))
+        if count:
+            return int(total / count)
+        return DEFAULT_SIZE_ESTIMATES.get(resource_type, DEFAULT_SIZE_ESTIMATES["other"])
+
+    async def _handle_route(self, route):
+        request = route.request
+        try:
+            stats = self._current.get(request.frame.page)
+        except Exception:
+            stats = None
+        decision = self.decide(request.url, request.resource_type)
+        if decision == "allow" or (stats is not None and stats.baseline):
+            await route.continue_()
+            return
+
+        if stats is not None:
+            stats.bytes_saved += self._estimate_size(request.resource_type)
+            if decision == "stub":
+                stats.stubbed += 1
+            else:
+                stats.blocked += 1
+
+        if decision == "stub":
+            await route.fulfill(status=204, body="")
+        else:
+            await route.abort("blockedbyclient")
+
+    @staticmethod
+    def _page_key(url):
+        parsed = urlparse(url)
+        return parsed.netloc + parsed.path
+
+    def _sample_baseline(self, url):
+        """本次导航是否作为基线不拦截"""
+        if not self.routed:
+            return False
+        _, count = self._baseline.get(self._page_key(url), (0, 0))
+        return count < MIN_BASELINE_SAMPLES or random.random() < self.baseline_sample_rate
+
+    def _watch_page(self, page):
+        def on_navigated(frame):
+            if frame == page.main_frame:
+                stats = NavigationStats(frame.url)
+                stats.baseline = self._sample_baseline(frame.url)
+                self._current[page] = stats
+
+        async def on_load():
+            await self._finish_navigation(page)
+
+        def on_response(response):
+            # 用放行请求的实际大小校准拦截请求的估算值
+            length = response.headers.get("content-length")
+            if length and length.isdigit():
+                self._record("sizes", response.request.resource_type, int(length))
+
+        def on_close():
+            self._current.pop(page, None)
+
+        page.on("framenavigated", on_navigated)
+        page.on("load", on_load)
+        page.on("response", on_response)
+        page.on("close", on_close)
+
+    async def _finish_navigation(self, page):
+        stats = self._current.get(page)
+        if stats is None:
+            return
+        try:
+            load_ms = await page.evaluate(LOAD_TIME_JS)
+        except Exception:
+            load_ms = None
+        if load_ms is not None:
+            stats.load_ms = round(load_ms, 1)
+            path = self._page_key(stats.url)
+            if stats.baseline:
+                self._record("baseline_load_ms", path, stats.load_ms)
+            elif self.routed:
+                total, count = self._baseline.get(path, (0, 0))
+                if count:
+                    stats.load_ms_saved = round(total / count - stats.load_ms, 1)
+        self.navigations.append(stats)
+        self._save_stats()
+
+        if not self.routed:
+            message = f"资源拦截未启用: {stats.url} 加载 {stats.load_ms}ms"
+        elif stats.baseline:
+            message = f"资源拦截基线采样: {stats.url} 未拦截，加载 {stats.load_ms}ms"
+        else:
+            saved = f"，节省 {stats.load_ms_saved}ms" if stats.load_ms_saved is not None else ""
+            message = (f"资源拦截: {stats.url} 拦截 {stats.blocked} 个、替换 {stats.stubbed} 个请求，"
+                       f"约节省 {stats.bytes_saved / 1024:.0f}KB，加载 {stats.load_ms}ms{saved}")
+        print(message)
+        logging.debug(message)
+
+    def summary(self):
+        """本次会话的累计统计"""
+        return {
+            "routed": self.routed,
+            "navigations": len(self.navigations),
+            "baseline_samples": sum(1 for n in self.navigations if n.baseline),
+            "blocked": sum(n.blocked + n.stubbed for n in self.navigations),
+            "bytes_saved": sum(n.bytes_saved for n in self.navigations),
+            "load_ms_saved": sum(n.load_ms_saved or 0 for n in self.navigations),
+        }
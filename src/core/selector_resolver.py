@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from src.core.atomic_file import atomic_open
+
+
+class SelectorResolver:
+    """同时尝试多个候选选择器，返回最先匹配的一个
+
+    胜出的选择器按页面类型缓存，下次优先使用，并持久化到
+    ~/.xhs_system/selector_cache.json，页面改版时无需逐个等待超时。
+    """
+
+    def __init__(self, cache_file=None):
+        if cache_file is None:
+            app_dir = os.path.join(os.path.expanduser('~'), '.xhs_system')
+            if not os.path.exists(app_dir):
+                os.makedirs(app_dir)
+            cache_file = os.path.join(app_dir, 'selector_cache.json')
+        self.cache_file = cache_file
+        self.cache = self._load_cache()
+
+    def _load_cache(self):
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.debug(f"加载选择器缓存失败: {str(e)}")
+        return {}
+
+    def _save_cache(self):
+        try:
+            with atomic_open(self.cache_file) as f:
+                json.dump(self.cache, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            logging.debug(f"保存选择器缓存失败: {str(e)}")
+
+    def _remember(self, page_type, key, selector):
+        if self.cache.get(page_type, {}).get(key) == selector:
+            return
+        self.cache.setdefault(page_type, {})[key] = selector
+        self._save_cache()
+
+    async def resolve(self, page, page_type, key, candidates, timeout=10, state="visible"):
+        """返回 (选择器, 元素)，所有候选都超时则抛出异常"""
+        cached = self.cache.get(page_type, {}).get(key)
+        if cached in candidates:
+            # 缓存的选择器通常直接命中，只给很短的等待时间
+            try:
+                handle = await page.wait_for_selector(cached, state=state, timeout=1000)
+                if handle:
+                    return cached, handle
+            except PlaywrightTimeoutError:
+                logging.debug(f"缓存的选择器失效: {page_type}.{key} = {cached}")
+
+        tasks = {
+            asyncio.create_task(page.wait_for_selector(selector, state=state, timeout=timeout * 1000)): selector
+            for selector in candidates
+        }
+        pending = set(tasks)
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result() is not None:
+                        winner = task
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None:
+            raise Exception(f"未找到元素: {page_type}.{key}")
+        selector = tasks[winner]
+        self._remember(page_type, key, selector)
+        return selector, winner.result()
+
+    async def click(self, page, page_type, key, candidates, timeout=10):
+        """点击最先匹配的候选元素，返回使用的选择器"""
+        selector, handle = await self.resolve(page, page_type, key, candidates, timeout)
+        await handle.click()
+        return selector
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_selector_resolver():
+    """获取全局选择器解析器（共享同一份缓存）"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = SelectorResolver()
+        return _resolver
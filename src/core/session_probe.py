@@ -0,0 +1,61 @@
+import logging
+import time
+
+# 创作者中心的当前用户接口，未登录时返回 401 或 success=false
+USER_INFO_URL = "https://creator.xiaohongshu.com/api/galaxy/user/info"
+
+
+class SessionProbe:
+    """用一次 API 请求检查上下文中的 cookies 是否仍然有效
+
+    结果按 TTL 缓存：有效的会话缓存 ttl 秒，失效的缓存 invalid_ttl 秒。
+    请求失败或返回无法判断时结果为 None，由调用方决定是否回退到页面检查。
+    """
+
+    def __init__(self, ttl=300, invalid_ttl=30, timeout=10, url=USER_INFO_URL):
+        self.ttl = ttl
+        self.invalid_ttl = invalid_ttl
+        self.timeout = timeout
+        self.url = url
+        self.user_info = None
+        self._result = None
+        self._expires_at = 0
+
+    def invalidate(self):
+        """登录状态变化后清除缓存"""
+        self._result = None
+        self._expires_at = 0
+
+    async def check(self, context):
+        """返回 True（已登录）/ False（未登录）/ None（无法判断）"""
+        if self._result is not None and time.time() < self._expires_at:
+            return self._result
+
+        started = time.perf_counter()
+        try:
+            response = await context.request.get(
+                self.url, timeout=self.timeout * 1000,
+                headers={"Referer": "https://creator.xiaohongshu.com/"})
+        except Exception as e:
+            logging.debug(f"会话检查请求失败: {str(e)}")
+            return None
+
+        result = None
+        if response.status in (401, 403):
+            result = False
+        elif response.ok:
+            try:
+                body = await response.json()
+            except Exception:
+                body = None
+            if isinstance(body, dict):
+                logged_in = (body.get("success") or body.get("code") == 0) and bool(body.get("data"))
+                result = bool(logged_in)
+                self.user_info = body.get("data") if logged_in else None
+        logging.debug(f"会话检查: {result}，状态码 {response.status}，"
+                      f"耗时 {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        if result is not None:
+            self._result = result
+            self._expires_at = time.time() + (self.ttl if result else self.invalid_ttl)
+        return result
@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import threading
+
+from src.config.config import Config
+
+try:
+    from py_mini_racer import MiniRacer
+except ImportError:
+    MiniRacer = None
+
+try:
+    import quickjs
+except ImportError:
+    quickjs = None
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+)
+
+# 签名脚本运行所需的最小 window/document 环境
+WINDOW_SHIM_JS = r"""
+var window = globalThis;
+window.window = window;
+window.self = window;
+window.top = window;
+window.parent = window;
+window.globalThis = window;
+
+var __cookies = {};
+var __noop = function () {};
+var __element = function (tag) {
+    return {
+        tagName: String(tag || '').toUpperCase(),
+        style: {},
+        children: [],
+        setAttribute: __noop,
+        getAttribute: function () { return null; },
+        appendChild: function (child) { this.children.push(child); return child; },
+        removeChild: function (child) { return child; },
+        addEventListener: __noop,
+        removeEventListener: __noop,
+        getContext: function () { return null; },
+        toDataURL: function () { return 'data:,'; }
+    };
+};
+
+window.document = {
+    get cookie() {
+        return Object.keys(__cookies).map(function (k) { return k + '=' + __cookies[k]; }).join('; ');
+    },
+    set cookie(value) {
+        var pair = String(value).split(';')[0];
+        var index = pair.indexOf('=');
+        if (index > 0) {
+            __cookies[pair.slice(0, index).trim()] = pair.slice(index + 1).trim();
+        }
+    },
+    referrer: '',
+    title: '小红书',
+    readyState: 'complete',
+    visibilityState: 'visible',
+    hidden: false,
+    documentElement: __element('html'),
+    head: __element('head'),
+    body: __element('body'),
+    createElement: __element,
+    getElementById: function () { return null; },
+    getElementsByTagName: function () { return []; },
+    querySelector: function () { return null; },
+    querySelectorAll: function () { return []; },
+    addEventListener: __noop,
+    removeEventListener: __noop
+};
+
+window.navigator = {
+    userAgent: __USER_AGENT__,
+    appVersion: __USER_AGENT__.replace('Mozilla/', ''),
+    platform: 'MacIntel',
+    vendor: 'Google Inc.',
+    language: 'zh-CN',
+    languages: ['zh-CN', 'zh'],
+    webdriver: false,
+    cookieEnabled: true,
+    hardwareConcurrency: 8,
+    plugins: [],
+    mimeTypes: []
+};
+
+window.location = {
+    href: 'https://www.xiaohongshu.com/explore',
+    protocol: 'https:',
+    host: 'www.xiaohongshu.com',
+    hostname: 'www.xiaohongshu.com',
+    origin: 'https://www.xiaohongshu.com',
+    pathname: '/explore',
+    search: '',
+    hash: ''
+};
+
+var __storage = function () {
+    var data = {};
+    return {
+        getItem: function (k) { return Object.prototype.hasOwnProperty.call(data, k) ? data[k] : null; },
+        setItem: function (k, v) { data[k] = String(v); },
+        removeItem: function (k) { delete data[k]; },
+        clear: function () { data = {}; }
+    };
+};
+window.localStorage = __storage();
+window.sessionStorage = __storage();
+window.screen = {width: 1920, height: 1080, availWidth: 1920, availHeight: 1050, colorDepth: 24};
+window.innerWidth = 1920;
+window.innerHeight = 1080;
+window.addEventListener = __noop;
+window.removeEventListener = __noop;
+window.setTimeout = window.setTimeout || function (fn) { return 0; };
+window.clearTimeout = window.clearTimeout || __noop;
+window.setInterval = window.setInterval || function () { return 0; };
+window.clearInterval = window.clearInterval || __noop;
+
+if (typeof window.btoa === 'undefined') {
+    var __b64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=';
+    window.btoa = function (input) {
+        var str = String(input), output = '';
+        for (var block, charCode, idx = 0, map = __b64;
+             str.charAt(idx | 0) || (map = '=', idx % 1);
+             output += map.charAt(63 & block >> 8 - idx % 1 * 8)) {
+            charCode = str.charCodeAt(idx += 3 / 4);
+            block = block << 8 | charCode;
+        }
+        return output;
+    };
+    window.atob = function (input) {
+        var str = String(input).replace(/=+$/, ''), output = '';
+        for (var bc = 0, bs, buffer, idx = 0;
+             buffer = str.charAt(idx++);
+             ~buffer && (bs = bc % 4 ? bs * 64 + buffer : buffer, bc++ % 4) ?
+                 output += String.fromCharCode(255 & bs >> (-2 * bc & 6)) : 0) {
+            buffer = __b64.indexOf(buffer);
+        }
+        return output;
+    };
+}
+"""
+
+
+class _MiniRacerEngine:
+    def __init__(self):
+        self.ctx = MiniRacer()
+
+    def eval(self, code):
+        return self.ctx.eval(code)
+
+
+class _QuickJsEngine:
+    def __init__(self):
+        self.ctx = quickjs.Context()
+
+    def eval(self, code):
+        return self.ctx.eval(code)
+
+
+def _create_engine():
+    if MiniRacer is not None:
+        return _MiniRacerEngine()
+    if quickjs is not None:
+        return _QuickJsEngine()
+    raise ImportError("请先安装 JS 引擎: pip install mini-racer（或 pip install quickjs）")
+
+
+class JsEngineSigner:
+    """在嵌入式 JS 引擎中执行签名脚本，不需要启动浏览器
+
+    script_path 指向一个定义了 window._webmsxyw 的脚本文件，
+    签名接口与 sign_local / sign 一致。
+    """
+
+    def __init__(self, script_path, user_agent=DEFAULT_USER_AGENT):
+        if not script_path or not os.path.exists(script_path):
+            raise FileNotFoundError(f"签名脚本不存在: {script_path}")
+        self.script_path = script_path
+        self._engine = _create_engine()
+        # JS 引擎上下文不是线程安全的
+        self._lock = threading.Lock()
+
+        with open(script_path, 'r', encoding='utf-8') as f:
+            script = f.read()
+        self._engine.eval(WINDOW_SHIM_JS.replace('__USER_AGENT__', json.dumps(user_agent)))
+        self._engine.eval(script)
+        if self._engine.eval("typeof window._webmsxyw") != "function":
+            raise Exception("签名脚本加载后 window._webmsxyw is not a function")
+
+    @staticmethod
+    def available():
+        """是否安装了可用的 JS 引擎"""
+        return MiniRacer is not None or quickjs is not None
+
+    def sign(self, uri, data=None, a1="", web_session=""):
+        call = "JSON.stringify(window._webmsxyw({uri}, {data}))".format(
+            uri=json.dumps(uri), data=json.dumps(data, ensure_ascii=False))
+        with self._lock:
+            self._engine.eval(f"document.cookie = {json.dumps('a1=' + a1)};")
+            encrypt_params = json.loads(self._engine.eval(call))
+        return {
+            "x-s": encrypt_params["X-s"],
+            "x-t": str(encrypt_params["X-t"])
+        }
+
+
+_js_signer = None
+_js_signer_lock = threading.Lock()
+
+
+def get_js_signer():
+    """获取全局 JS 引擎签名器（脚本路径见 signer.js_path 配置）"""
+    global _js_signer
+    with _js_signer_lock:
+        if _js_signer is None:
+            script_path = Config().get_signer_config().get('js_path', '')
+            _js_signer = JsEngineSigner(os.path.expanduser(script_path))
+            logging.debug(f"JS 引擎签名器已加载: {script_path}")
+        return _js_signer
+
+
+def js_sign(uri, data=None, a1="", web_session=""):
+    """同步签名入口，供 xhs-sdk 的 sign 回调使用"""
+    return get_js_signer().sign(uri, data, a1, web_session)
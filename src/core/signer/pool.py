@@ -0,0 +1,363 @@
+import asyncio
+import logging
+import pathlib
+import threading
+import time
+from collections import OrderedDict
+
+from playwright.async_api import async_playwright
+
+from conf import BASE_DIR
+from src.config.config import Config
+from src.core.loop_thread import BackgroundLoop
+from src.core.memory import available_memory_mb
+
+XHS_HOME_URL = "https://www.xiaohongshu.com"
+STEALTH_JS_PATH = pathlib.Path(BASE_DIR / "utils/stealth.min.js")
+
+SIGN_JS = "([url, data]) => window._webmsxyw(url, data)"
+READY_JS = "() => typeof window._webmsxyw === 'function'"
+
+
+class SignerPage:
+    """一个签名页面（独立的 BrowserContext）"""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.a1 = None
+        self.uses = 0
+        self.broken = False
+        self.busy = False
+        self.lock = asyncio.Lock()
+
+
+class SignerPool:
+    """预热的签名页面池
+
+    备用页面都已经打开小红书首页并且 window._webmsxyw 可用。
+    每个 a1 第一次签名时取走一个备用页面，注入 cookie 并刷新一次，
+    之后按 a1 复用该上下文（LRU），同一账号的签名只需要一次 page.evaluate。
+    """
+
+    def __init__(self, size=2, headless=True, max_uses=500, health_interval=60,
+                 max_contexts=8, min_free_memory_mb=512, ready_timeout=30,
+                 stealth_js_path=STEALTH_JS_PATH):
+        self.size = max(1, int(size))
+        self.headless = headless
+        self.max_uses = max_uses
+        self.health_interval = health_interval
+        self.max_contexts = max(1, int(max_contexts))
+        self.min_free_memory_mb = min_free_memory_mb
+        self.ready_timeout = ready_timeout
+        self.stealth_js_path = stealth_js_path
+
+        self._playwright = None
+        self._browser = None
+        # 尚未绑定 a1 的预热页面
+        self._spares = None
+        self._refilling = 0
+        # a1 -> SignerPage，按最近使用排序
+        self._contexts = OrderedDict()
+        self._binding = {}
+        self._start_lock = asyncio.Lock()
+        self._health_task = None
+        # 后台补充和绑定任务，关闭时一并取消
+        self._tasks = set()
+        self.started = False
+        # 正在排队等待页面的请求数
+        self.waiting = 0
+
+    async def start(self):
+        """启动浏览器并预热备用页面（重复调用无副作用）"""
+        if self.started:
+            return
+        async with self._start_lock:
+            if self.started:
+                return
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._spares = asyncio.Queue()
+
+            results = await asyncio.gather(
+                *[self._new_page() for _ in range(self.size)], return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    logging.debug(f"签名页面预热失败: {str(result)}")
+                    continue
+                self._spares.put_nowait(result)
+            if self._spares.empty():
+                await self.close()
+                raise Exception("签名页面预热失败，无可用页面")
+
+            if self.health_interval:
+                self._health_task = asyncio.create_task(self._health_loop())
+            self.started = True
+
+    async def _new_page(self):
+        """创建一个新的签名页面并等待签名函数就绪"""
+        context = await self._browser.new_context()
+        try:
+            await context.add_init_script(path=str(self.stealth_js_path))
+            page = await context.new_page()
+            await page.goto(XHS_HOME_URL)
+            await self._wait_ready(page)
+        except Exception:
+            await context.close()
+            raise
+        return SignerPage(context, page)
+
+    async def _wait_ready(self, page):
+        """就绪探测：每 100ms 检查一次 window._webmsxyw，可用即返回，代替固定 sleep"""
+        await page.wait_for_function(READY_JS, polling=100, timeout=self.ready_timeout * 1000)
+
+    async def _close_page(self, signer_page):
+        try:
+            await signer_page.context.close()
+        except Exception as e:
+            logging.debug(f"关闭签名页面时出错: {str(e)}")
+
+    def _spawn(self, coro):
+        """创建后台任务并保留引用，避免任务被回收，关闭时可以取消"""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _schedule_refill(self):
+        """后台补充一个备用页面"""
+        self._refilling += 1
+        self._spawn(self._refill())
+
+    async def _refill(self):
+        try:
+            self._spares.put_nowait(await self._new_page())
+        except Exception as e:
+            logging.debug(f"补充备用签名页面失败: {str(e)}")
+        finally:
+            self._refilling -= 1
+
+    async def _take_spare(self):
+        if self._spares.empty() and self._refilling == 0:
+            self._schedule_refill()
+        self.waiting += 1
+        try:
+            signer_page = await asyncio.wait_for(self._spares.get(), self.ready_timeout * 2)
+        finally:
+            self.waiting -= 1
+        self._schedule_refill()
+        return signer_page
+
+    async def _get_context(self, a1):
+        """获取绑定到 a1 的签名页面，没有则从备用页面创建"""
+        signer_page = self._contexts.get(a1)
+        if signer_page is not None:
+            if not signer_page.broken and signer_page.uses < self.max_uses:
+                self._contexts.move_to_end(a1)
+                return signer_page
+            await self._evict(a1)
+
+        # 同一 a1 的并发请求共享一次绑定过程
+        task = self._binding.get(a1)
+        if task is None:
+            task = self._spawn(self._bind_new_context(a1))
+            self._binding[a1] = task
+            task.add_done_callback(lambda _: self._binding.pop(a1, None))
+        return await asyncio.shield(task)
+
+    async def _bind_new_context(self, a1):
+        signer_page = await self._take_spare()
+        try:
+            await signer_page.context.add_cookies([
+                {'name': 'a1', 'value': a1, 'domain': ".xiaohongshu.com", 'path': "/"}
+            ])
+            await signer_page.page.reload()
+            await self._wait_ready(signer_page.page)
+        except Exception:
+            await self._close_page(signer_page)
+            raise
+        signer_page.a1 = a1
+        self._contexts[a1] = signer_page
+        await self._enforce_limits()
+        return signer_page
+
+    async def _evict(self, a1):
+        """关闭并移除 a1 对应的上下文"""
+        signer_page = self._contexts.pop(a1, None)
+        if signer_page is None:
+            return
+        async with signer_page.lock:
+            await self._close_page(signer_page)
+
+    def _memory_pressure(self):
+        if not self.min_free_memory_mb:
+            return False
+        available = available_memory_mb()
+        return available is not None and available < self.min_free_memory_mb
+
+    async def _enforce_limits(self):
+        """超出数量上限或内存紧张时淘汰最久未使用的上下文"""
+        while len(self._contexts) > self.max_contexts:
+            await self._evict(next(iter(self._contexts)))
+        if len(self._contexts) > 1 and self._memory_pressure():
+            oldest = next(iter(self._contexts))
+            logging.debug(f"内存紧张，淘汰签名上下文: {oldest}")
+            await self._evict(oldest)
+
+    async def warm_up(self, a1_values=()):
+        """启动浏览器并为已知账号提前建立签名上下文，返回耗时（秒）"""
+        start = time.perf_counter()
+        await self.start()
+        for a1 in a1_values:
+            try:
+                await self._get_context(a1)
+            except Exception as e:
+                logging.debug(f"预热签名上下文失败: {str(e)}")
+        return time.perf_counter() - start
+
+    def is_ready(self):
+        """是否已有可以立即签名的页面"""
+        return self.started and (bool(self._contexts) or not self._spares.empty())
+
+    async def _is_healthy(self, signer_page):
+        """检查页面是否仍然可以签名"""
+        if signer_page.broken or signer_page.page.is_closed():
+            return False
+        try:
+            return await signer_page.page.evaluate(READY_JS)
+        except Exception:
+            return False
+
+    async def sign(self, uri, data=None, a1="", web_session="", retries=1):
+        """签名，接口与 sign_local 一致"""
+        await self.start()
+        last_error = None
+        for _ in range(retries + 1):
+            signer_page = await self._get_context(a1)
+            self.waiting += 1
+            try:
+                await signer_page.lock.acquire()
+            finally:
+                self.waiting -= 1
+            signer_page.busy = True
+            try:
+                encrypt_params = await signer_page.page.evaluate(SIGN_JS, [uri, data])
+                signer_page.uses += 1
+                return {
+                    "x-s": encrypt_params["X-s"],
+                    "x-t": str(encrypt_params["X-t"])
+                }
+            except Exception as e:
+                # 常见的是 window._webmsxyw is not a function 或页面跳转，标记后下次使用前重建
+                last_error = e
+                signer_page.broken = True
+                logging.debug(f"签名失败，上下文将被回收: {str(e)}")
+            finally:
+                signer_page.busy = False
+                signer_page.lock.release()
+        raise Exception(f"签名失败: {str(last_error)}")
+
+    def stats(self):
+        """池的当前状态"""
+        contexts = list(self._contexts.values())
+        return {
+            "spares": self._spares.qsize() if self._spares else 0,
+            "contexts": len(contexts),
+            "busy": sum(1 for p in contexts if p.busy),
+            "broken": sum(1 for p in contexts if p.broken),
+            "queue_depth": self.waiting,
+        }
+
+    async def health_check(self):
+        """检查空闲的上下文，移除损坏的上下文"""
+        for a1, signer_page in list(self._contexts.items()):
+            if signer_page.busy:
+                continue
+            if not await self._is_healthy(signer_page):
+                await self._evict(a1)
+        await self._enforce_limits()
+        return len(self._contexts)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                healthy = await self.health_check()
+                logging.debug(f"签名上下文健康检查: {healthy} 个可用")
+            except Exception as e:
+                logging.debug(f"签名上下文健康检查失败: {str(e)}")
+
+    async def close(self):
+        """关闭所有页面和浏览器"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for a1 in list(self._contexts):
+            await self._evict(a1)
+        while self._spares is not None and not self._spares.empty():
+            await self._close_page(self._spares.get_nowait())
+        try:
+            if self._browser:
+                await self._browser.close()
+            if self._playwright:
+                await self._playwright.stop()
+        except Exception as e:
+            logging.debug(f"关闭签名浏览器时出错: {str(e)}")
+        self._browser = None
+        self._playwright = None
+        self.started = False
+
+
+_signer_loop = BackgroundLoop("xhs-signer")
+_signer_pool = None
+_signer_pool_lock = threading.Lock()
+
+
+def get_signer_pool():
+    """获取全局签名池（按配置创建）"""
+    global _signer_pool
+    with _signer_pool_lock:
+        if _signer_pool is None:
+            signer_config = Config().get_signer_config()
+            _signer_pool = SignerPool(
+                size=signer_config.get('pool_size', 2),
+                headless=signer_config.get('headless', True),
+                max_uses=signer_config.get('max_uses', 500),
+                health_interval=signer_config.get('health_interval', 60),
+                max_contexts=signer_config.get('max_contexts', 8),
+                min_free_memory_mb=signer_config.get('min_free_memory_mb', 512),
+            )
+        return _signer_pool
+
+
+def pool_sign(uri, data=None, a1="", web_session="", timeout=60):
+    """同步签名入口，供 xhs-sdk 的 sign 回调使用"""
+    start = time.time()
+    result = _signer_loop.run(get_signer_pool().sign(uri, data, a1, web_session), timeout)
+    logging.debug(f"签名耗时: {(time.time() - start) * 1000:.1f}ms")
+    return result
+
+
+def a1_from_cookie(cookie):
+    """从 cookie 字符串中取出 a1"""
+    for item in (cookie or "").split(';'):
+        name, _, value = item.strip().partition('=')
+        if name == 'a1':
+            return value
+    return ""
+
+
+def warm_up_signer_pool(a1_values=()):
+    """在后台预热全局签名池，立即返回 Future，结果为预热耗时（秒）"""
+    a1_values = [a1 for a1 in dict.fromkeys(a1_values) if a1]
+    return _signer_loop.submit(get_signer_pool().warm_up(a1_values))
+
+
+def close_signer_pool(timeout=10):
+    """关闭全局签名池"""
+    if _signer_pool is not None and _signer_pool.started:
+        _signer_loop.run(_signer_pool.close(), timeout)
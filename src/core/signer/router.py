@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+
+from src.config.config import Config
+from src.core.metrics import BackendStats, order_by_latency
+
+NOT_A_FUNCTION_ERROR = "_webmsxyw is not a function"
+
+
+def classify_error(error):
+    """把签名异常归类，用于失败统计"""
+    message = str(error)
+    if NOT_A_FUNCTION_ERROR in message:
+        return "not_a_function"
+    if "timeout" in message.lower() or "超时" in message:
+        return "timeout"
+    if "connection" in message.lower():
+        return "connection"
+    return "error"
+
+
+class Signer:
+    """统一的签名入口
+
+    按平均延迟把每次签名发给最快的健康后端，还没有测量过的后端按配置顺序排在后面，
+    失败（包括 window._webmsxyw is not a function）时直接切换到下一个后端，不做盲目重试。
+    接口与 sign_local / sign 一致，可以直接作为 XhsClient 的 sign 参数。
+    """
+
+    def __init__(self, backends, logger=None, log_interval=100):
+        # backends: [(名称, 签名函数), ...]
+        self.backends = dict(backends)
+        self.stats = {name: BackendStats(name) for name in self.backends}
+        self.logger = logger or logging.getLogger('app')
+        self.log_interval = log_interval
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, uri, data=None, a1="", web_session=""):
+        return self.sign(uri, data, a1, web_session)
+
+    def sign(self, uri, data=None, a1="", web_session=""):
+        errors = []
+        for stats in order_by_latency(self.stats.values()):
+            start = time.perf_counter()
+            try:
+                result = self.backends[stats.name](uri, data, a1, web_session)
+            except Exception as e:
+                latency_ms = (time.perf_counter() - start) * 1000
+                stats.record_failure(latency_ms, classify_error(e))
+                errors.append(f"{stats.name}: {str(e)}")
+                logging.debug(f"签名后端 {stats.name} 失败，切换下一个: {str(e)}")
+                continue
+            stats.record_success((time.perf_counter() - start) * 1000)
+            self._after_call()
+            return result
+        self._after_call()
+        raise Exception("所有签名后端均失败: " + "; ".join(errors))
+
+    def _after_call(self):
+        with self._lock:
+            self._calls += 1
+            should_log = self.log_interval and self._calls % self.log_interval == 0
+        if should_log:
+            self.log_stats()
+
+    def snapshot(self):
+        return [stats.snapshot() for stats in self.stats.values()]
+
+    def log_stats(self):
+        """把各后端的统计写入日志"""
+        for stats in self.stats.values():
+            self.logger.info(f"签名统计 {stats.summary()}")
+
+
+_signer = None
+_signer_lock = threading.Lock()
+
+
+def _default_backends(names):
+    # 延迟导入，避免与 xhs_uploader.main 循环依赖
+    from src.core.signer.js_engine import JsEngineSigner
+    from src.core.uploader.xhs_uploader.main import sign, sign_js, sign_local
+
+    signer_config = Config().get_signer_config()
+    available = {
+        "pool": sign_local,
+        "remote": sign,
+    }
+    if signer_config.get('js_path') and JsEngineSigner.available():
+        available["js"] = sign_js
+    return [(name, available[name]) for name in names if name in available]
+
+
+def get_signer(logger=None):
+    """获取全局统一签名器，后端列表见 signer.backends 配置"""
+    global _signer
+    with _signer_lock:
+        if _signer is None:
+            names = Config().get_signer_config().get('backends', ["pool", "remote", "js"])
+            _signer = Signer(_default_backends(names), logger=logger)
+        elif logger is not None:
+            _signer.logger = logger
+        return _signer
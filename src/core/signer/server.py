@@ -0,0 +1,256 @@
+"""小红书签名服务
+
+实现 conf.XHS_SERVER 约定的 /sign 接口，多个客户端（GUI、示例脚本、定时任务）
+共享同一组预热的签名浏览器页面。
+
+启动方式:
+    python -m src.core.signer.server --port 11901 --pool-size 4
+
+接口:
+    POST /sign   {"uri": ..., "data": ..., "a1": ..., "web_session": ...}
+                 -> {"x-s": ..., "x-t": ...}
+    GET  /stats  -> 队列深度、池状态和请求延迟统计
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from conf import XHS_SERVER
+
+MAX_BODY_SIZE = 1024 * 1024
+# 请求行和单个请求头的最大长度，以及请求头的最大数量
+MAX_LINE_SIZE = 8192
+MAX_HEADERS = 100
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class BadRequest(Exception):
+    """请求无法解析，按 status 返回错误响应后关闭连接"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SignServer:
+    """基于 asyncio 的签名 HTTP 服务"""
+
+    def __init__(self, pool, host="127.0.0.1", port=11901, latency_window=1000):
+        self.pool = pool
+        self.host = host
+        self.port = port
+        self.server = None
+        self.in_flight = 0
+        self.total_requests = 0
+        self.total_errors = 0
+        # 最近若干次请求的延迟（毫秒）
+        self.latencies = deque(maxlen=latency_window)
+
+    async def start(self):
+        """预热签名池并开始监听"""
+        await self.pool.start()
+        await self.listen()
+        logging.info(f"签名服务已启动: http://{self.host}:{self.port}")
+        print(f"签名服务已启动: http://{self.host}:{self.port}")
+
+    async def listen(self):
+        """开始监听，port 为 0 时使用系统分配的端口"""
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                 limit=MAX_LINE_SIZE)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.pool.close()
+
+    async def _handle_connection(self, reader, writer):
+        """处理一个连接，支持 keep-alive"""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except BadRequest as e:
+                    # 请求体没有读取，连接上的后续数据无法解析，回复后关闭连接
+                    await self._write_response(writer, e.status, {"error": str(e)}, {}, False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, extra_headers = await self._dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, status, payload, extra_headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logging.debug(f"处理签名连接时出错: {str(e)}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _read_line(self, reader, status):
+        try:
+            return await reader.readline()
+        except ValueError:
+            # 超过 MAX_LINE_SIZE 仍没有换行
+            raise BadRequest(status, f"请求行或请求头过长（上限 {MAX_LINE_SIZE} 字节）")
+
+    async def _read_request(self, reader):
+        request_line = await self._read_line(reader, 400)
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").strip().split()
+        if len(parts) < 2:
+            raise BadRequest(400, "请求行格式错误")
+        method, target = parts[0].upper(), parts[1]
+
+        headers = {}
+        while True:
+            line = await self._read_line(reader, 431)
+            if not line or line in (b"\r\n", b"\n"):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise BadRequest(431, f"请求头过多（上限 {MAX_HEADERS} 个）")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise BadRequest(400, "Content-Length 无效")
+        if length < 0:
+            raise BadRequest(400, "Content-Length 无效")
+        if length > MAX_BODY_SIZE:
+            raise BadRequest(413, f"请求体过大（上限 {MAX_BODY_SIZE} 字节）")
+        body = await reader.readexactly(length) if length else b""
+        return method, urlparse(target).path, headers, body
+
+    async def _dispatch(self, method, path, body):
+        if path == "/sign":
+            if method != "POST":
+                return 405, {"error": "仅支持 POST"}, {}
+            return await self._handle_sign(body)
+        if path == "/stats":
+            return 200, self.stats(), {}
+        return 404, {"error": "not found"}, {}
+
+    async def _handle_sign(self, body):
+        try:
+            params = json.loads(body or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("请求体不是 JSON 对象")
+            uri = params["uri"]
+        except (ValueError, KeyError):
+            return 400, {"error": "需要 JSON 请求体且包含 uri"}, {}
+
+        self.total_requests += 1
+        self.in_flight += 1
+        queue_depth = self.pool.waiting
+        start = time.perf_counter()
+        try:
+            result = await self.pool.sign(
+                uri, params.get("data"), params.get("a1", ""), params.get("web_session", ""))
+            status = 200
+        except Exception as e:
+            self.total_errors += 1
+            result = {"error": str(e)}
+            status = 500
+        finally:
+            self.in_flight -= 1
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.latencies.append(latency_ms)
+        logging.info(f"sign {uri} status={status} latency={latency_ms:.1f}ms queue_depth={queue_depth}")
+        return status, result, {"X-Sign-Latency-Ms": f"{latency_ms:.1f}"}
+
+    async def _write_response(self, writer, status, payload, extra_headers, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        headers.update(extra_headers)
+        head = f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    def stats(self):
+        """服务和签名池的统计信息"""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 1)
+
+        stats = self.pool.stats()
+        stats.update({
+            "in_flight": self.in_flight,
+            "requests": self.total_requests,
+            "errors": self.total_errors,
+            "latency_ms": {
+                "avg": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 1) if latencies else 0.0,
+            },
+        })
+        return stats
+
+
+def main():
+    default = urlparse(XHS_SERVER)
+    parser = argparse.ArgumentParser(description="小红书签名服务")
+    parser.add_argument("--host", default=default.hostname or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=default.port or 11901)
+    parser.add_argument("--pool-size", type=int, default=4, help="预热的备用签名页面数量")
+    parser.add_argument("--max-contexts", type=int, default=32, help="按 a1 缓存的签名上下文上限")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口，便于排查问题")
+    args = parser.parse_args()
+
+    # 延迟导入，只有启动服务时才需要 Playwright
+    from src.core.signer.pool import SignerPool
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    pool = SignerPool(size=args.pool_size, max_contexts=args.max_contexts, headless=not args.headed)
+    server = SignServer(pool, host=args.host, port=args.port)
+
+    async def run():
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n签名服务已停止")
+
+
+if __name__ == "__main__":
+    main()
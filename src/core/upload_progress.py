@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+
+# 上传分片请求
+UPLOAD_URL_PATTERN = re.compile(r"ros-upload|/upload")
+
+# 读取页面上进度条显示的百分比
+PAGE_PROGRESS_JS = """
+() => {
+    const nodes = document.querySelectorAll('[class*="progress"], [class*="percent"], .upload-status');
+    let best = null;
+    for (const node of nodes) {
+        const match = (node.textContent || '').match(/(\\d+(?:\\.\\d+)?)\\s*%/);
+        if (match) {
+            const value = parseFloat(match[1]);
+            if (best === null || value > best) best = value;
+        }
+        const now = node.getAttribute('aria-valuenow');
+        if (now !== null && !isNaN(parseFloat(now))) {
+            const value = parseFloat(now);
+            if (best === null || value > best) best = value;
+        }
+    }
+    return best;
+}
+"""
+
+
+class UploadStalled(Exception):
+    """上传在停滞阈值内没有任何进展"""
+
+
+class UploadProgressTracker:
+    """跟踪浏览器中的文件上传进度
+
+    进度来自两处：上传分片请求完成时的请求体大小，以及页面进度条上的百分比，取两者中较大的值。
+    吞吐量按最近 window 秒内的上传字节数计算。
+    没有进行中的上传请求时，超过 stall_timeout 秒没有进展视为停滞；
+    有上传请求正在进行时（大分片在慢速网络上可能很久才完成，进度只在请求完成时更新），
+    改用更长的 in_flight_stall_timeout，请求挂起不返回时仍能判定停滞。
+    """
+
+    def __init__(self, page, total_bytes, callback=None, stall_timeout=30, window=5,
+                 poll_interval=1, url_pattern=UPLOAD_URL_PATTERN, in_flight_stall_timeout=120):
+        self.page = page
+        self.total_bytes = max(total_bytes, 1)
+        self.callback = callback
+        self.stall_timeout = stall_timeout
+        self.in_flight_stall_timeout = max(in_flight_stall_timeout, stall_timeout)
+        self.window = window
+        self.poll_interval = poll_interval
+        self.url_pattern = url_pattern
+        self.reset()
+
+    def reset(self):
+        """重新上传前清空进度"""
+        self.uploaded_bytes = 0
+        self.page_percent = 0.0
+        self.started_at = time.time()
+        self.last_progress_at = self.started_at
+        self._last_percent = 0.0
+        self._samples = deque([(self.started_at, 0)])
+        self._in_flight = set()
+
+    @property
+    def percent(self):
+        network_percent = self.uploaded_bytes * 100 / self.total_bytes
+        return min(100.0, max(network_percent, self.page_percent))
+
+    @property
+    def throughput(self):
+        """最近一段时间的上传速度（字节/秒）"""
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+        return (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+
+    @property
+    def in_flight(self):
+        """正在进行的上传请求数"""
+        return len(self._in_flight)
+
+    def start(self):
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_finished)
+        self.page.on("requestfailed", self._on_request_failed)
+
+    def stop(self):
+        for event, handler in (("request", self._on_request),
+                               ("requestfinished", self._on_request_finished),
+                               ("requestfailed", self._on_request_failed)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+    def _is_upload(self, request):
+        return request.method in ("POST", "PUT") and self.url_pattern.search(request.url)
+
+    def _on_request(self, request):
+        if self._is_upload(request):
+            self._in_flight.add(request)
+            # 新的上传请求开始也算进展
+            self.last_progress_at = time.time()
+
+    def _on_request_failed(self, request):
+        if request in self._in_flight:
+            self._in_flight.discard(request)
+            self.last_progress_at = time.time()
+
+    async def _on_request_finished(self, request):
+        if not self._is_upload(request):
+            return
+        self._in_flight.discard(request)
+        self.last_progress_at = time.time()
+        try:
+            sizes = await request.sizes()
+            body_size = sizes.get("requestBodySize", 0)
+        except Exception:
+            body_size = len(request.post_data_buffer or b"")
+        if body_size > 0:
+            self.uploaded_bytes += body_size
+            self._update()
+
+    async def _poll_page(self):
+        try:
+            value = await self.page.evaluate(PAGE_PROGRESS_JS)
+        except Exception:
+            return
+        if value is not None and value > self.page_percent:
+            self.page_percent = float(value)
+            self._update()
+
+    def _update(self):
+        now = time.time()
+        self._samples.append((now, self.uploaded_bytes))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+        percent = self.percent
+        if percent > self._last_percent:
+            self._last_percent = percent
+            self.last_progress_at = now
+            if self.callback:
+                try:
+                    self.callback(percent, self.throughput)
+                except Exception as e:
+                    logging.debug(f"上传进度回调出错: {str(e)}")
+
+    async def wait(self, done):
+        """等待 done 完成，期间轮询页面进度；停滞时抛出 UploadStalled"""
+        done_task = asyncio.ensure_future(done)
+        try:
+            while not done_task.done():
+                await asyncio.wait({done_task}, timeout=self.poll_interval)
+                if done_task.done():
+                    break
+                await self._poll_page()
+                # 请求体仍在发送时页面进度条可能照常更新，但网络进度要等请求完成，放宽停滞阈值
+                limit = self.in_flight_stall_timeout if self._in_flight else self.stall_timeout
+                idle = time.time() - self.last_progress_at
+                if idle > limit:
+                    raise UploadStalled(f"上传停滞 {idle:.0f}s，进度 {self.percent:.1f}%，"
+                                        f"进行中的上传请求 {self.in_flight} 个")
+            result = done_task.result()
+        finally:
+            if not done_task.done():
+                done_task.cancel()
+                await asyncio.gather(done_task, return_exceptions=True)
+
+        if self.callback and self._last_percent < 100:
+            self.callback(100.0, self.throughput)
+        return result
@@ -1,53 +1,38 @@
 import configparser
 import json
-import pathlib
-from time import sleep
 
 import requests
-from playwright.sync_api import sync_playwright
 
-from conf import BASE_DIR, XHS_SERVER
+from conf import XHS_SERVER
+from src.core.signer.js_engine import js_sign
+from src.core.signer.pool import pool_sign
 
 config = configparser.RawConfigParser()
 config.read('accounts.ini')
 
 
 def sign_local(uri, data=None, a1="", web_session=""):
-    for _ in range(10):
-        try:
-            with sync_playwright() as playwright:
-                stealth_js_path = pathlib.Path(BASE_DIR / "utils/stealth.min.js")
-                print(f'stealth_js_path:{stealth_js_path}\n')
-                chromium = playwright.chromium
-
-                # 如果一直失败可尝试设置成 False 让其打开浏览器，适当添加 sleep 可查看浏览器状态
-                browser = chromium.launch(headless=True)
-
-                browser_context = browser.new_context()
-                browser_context.add_init_script(path=stealth_js_path)
-                context_page = browser_context.new_page()
-                context_page.goto("https://www.xiaohongshu.com")
-                browser_context.add_cookies([
-                    {'name': 'a1', 'value': a1, 'domain': ".xiaohongshu.com", 'path': "/"}]
-                )
-                context_page.reload()
-                # 这个地方设置完浏览器 cookie 之后，如果这儿不 sleep 一下签名获取就失败了，如果经常失败请设置长一点试试
-                sleep(2)
-                encrypt_params = context_page.evaluate("([url, data]) => window._webmsxyw(url, data)", [uri, data])
-                return {
-                    "x-s": encrypt_params["X-s"],
-                    "x-t": str(encrypt_params["X-t"])
-                }
-        except Exception:
-            # 这儿有时会出现 window._webmsxyw is not a function 或未知跳转错误，因此加一个失败重试趴
-            pass
-    raise Exception("重试了这么多次还是无法签名成功，寄寄寄")
+    # 使用常驻的预热签名页面池，每次签名只需要一次 page.evaluate
+    # 池大小等参数见 ~/.xhs_system/settings.json 中的 signer 配置
+    return pool_sign(uri, data, a1, web_session)
+
+
+def sign_js(uri, data=None, a1="", web_session=""):
+    # 在嵌入式 JS 引擎中签名，不启动浏览器
+    # 需要安装 mini-racer 或 quickjs，并在 signer 配置的 js_path 中指定签名脚本
+    return js_sign(uri, data, a1, web_session)
+
+
+# 复用到签名服务的连接
+_sign_session = requests.Session()
 
 
 def sign(uri, data=None, a1="", web_session=""):
-    # 填写自己的 flask 签名服务端口地址
-    res = requests.post(f"{XHS_SERVER}/sign",
-                        json={"uri": uri, "data": data, "a1": a1, "web_session": web_session})
+    # 签名服务地址见 conf.XHS_SERVER，可用 python -m src.core.signer.server 启动
+    res = _sign_session.post(f"{XHS_SERVER}/sign",
+                             json={"uri": uri, "data": data, "a1": a1, "web_session": web_session},
+                             timeout=60)
+    res.raise_for_status()
     signs = res.json()
     return {
         "x-s": signs["x-s"],
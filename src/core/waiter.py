@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# 等待 DOM 在 quiet_ms 内不再变化
+DOM_SETTLED_JS = """
+([selector, quietMs]) => new Promise((resolve) => {
+    const target = document.querySelector(selector) || document.body;
+    let timer = setTimeout(done, quietMs);
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    function done() {
+        observer.disconnect();
+        resolve(true);
+    }
+    observer.observe(target, {childList: true, subtree: true, attributes: true, characterData: true});
+})
+"""
+
+
+class StepTiming:
+    """一个等待步骤的实际耗时"""
+
+    def __init__(self, step, waited_ms, ok):
+        self.step = step
+        self.waited_ms = waited_ms
+        self.ok = ok
+
+    def __repr__(self):
+        return f"{self.step}: {self.waited_ms:.0f}ms{'' if self.ok else ' (超时)'}"
+
+
+class PageWaiter:
+    """基于具体条件的等待，代替固定 sleep
+
+    每一步都有自己的超时，并记录实际等待的时间。
+    required=False 的步骤超时后返回 None 而不是抛出异常。
+    """
+
+    def __init__(self, page, default_timeout=10):
+        self.page = page
+        self.default_timeout = default_timeout
+        self.timings = []
+
+    def _timeout_ms(self, timeout):
+        return (timeout if timeout is not None else self.default_timeout) * 1000
+
+    def _record(self, step, start, ok):
+        timing = StepTiming(step, (time.perf_counter() - start) * 1000, ok)
+        self.timings.append(timing)
+        logging.debug(f"等待步骤 {timing}")
+        return timing
+
+    async def _run(self, step, coro, required):
+        start = time.perf_counter()
+        try:
+            result = await coro
+        except (PlaywrightTimeoutError, asyncio.TimeoutError):
+            self._record(step, start, False)
+            if required:
+                raise Exception(f"等待超时: {step}")
+            return None
+        self._record(step, start, True)
+        return result
+
+    async def visible(self, selector, step=None, timeout=None, required=True):
+        """等待元素可见"""
+        return await self._run(
+            step or f"可见 {selector}",
+            self.page.wait_for_selector(selector, state="visible", timeout=self._timeout_ms(timeout)),
+            required)
+
+    async def attached(self, selector, step=None, timeout=None, required=True):
+        """等待元素出现在 DOM 中（例如隐藏的文件输入框）"""
+        return await self._run(
+            step or f"出现 {selector}",
+            self.page.wait_for_selector(selector, state="attached", timeout=self._timeout_ms(timeout)),
+            required)
+
+    async def hidden(self, selector, step=None, timeout=None, required=True):
+        """等待元素消失"""
+        return await self._run(
+            step or f"消失 {selector}",
+            self.page.wait_for_selector(selector, state="hidden", timeout=self._timeout_ms(timeout)),
+            required)
+
+    async def url(self, predicate, step=None, timeout=None, required=True):
+        """等待页面 URL 满足条件"""
+        return await self._run(
+            step or "URL 变化",
+            self.page.wait_for_url(predicate, timeout=self._timeout_ms(timeout)),
+            required)
+
+    async def response(self, url_pattern, step=None, timeout=None, required=True):
+        """等待指定的网络响应（已经发出的请求不会被捕获，通常应使用 expect_response）"""
+        return await self._run(
+            step or f"响应 {url_pattern}",
+            self.page.wait_for_event(
+                "response", predicate=self._matcher(url_pattern), timeout=self._timeout_ms(timeout)),
+            required)
+
+    @asynccontextmanager
+    async def expect_response(self, url_pattern, step=None, timeout=None):
+        """在执行触发动作之前开始监听响应
+
+        用法:
+            async with waiter.expect_response(pattern, "上传完成") as response_info:
+                await do_upload()
+            response = await response_info.value
+        """
+        step = step or f"响应 {url_pattern}"
+        start = time.perf_counter()
+        try:
+            async with self.page.expect_response(self._matcher(url_pattern),
+                                                 timeout=self._timeout_ms(timeout)) as response_info:
+                yield response_info
+        except PlaywrightTimeoutError:
+            self._record(step, start, False)
+            raise Exception(f"等待超时: {step}")
+        self._record(step, start, True)
+
+    async def dom_settled(self, selector="body", quiet_ms=300, step=None, timeout=None, required=False):
+        """等待 DOM 在 quiet_ms 内没有变化"""
+        return await self._run(
+            step or f"DOM 稳定 {selector}",
+            asyncio.wait_for(self.page.evaluate(DOM_SETTLED_JS, [selector, quiet_ms]),
+                             self._timeout_ms(timeout) / 1000),
+            required)
+
+    @staticmethod
+    def _matcher(url_pattern):
+        if callable(url_pattern):
+            return url_pattern
+        regex = re.compile(url_pattern) if isinstance(url_pattern, str) else url_pattern
+        return lambda response: bool(regex.search(response.url))
+
+    def total_ms(self):
+        return sum(t.waited_ms for t in self.timings)
+
+    def report(self):
+        """各步骤耗时摘要"""
+        steps = ", ".join(repr(t) for t in self.timings)
+        return f"共等待 {self.total_ms():.0f}ms [{steps}]"
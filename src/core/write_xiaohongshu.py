@@ -1,5 +1,4 @@
 # 小红书的自动发稿
-from playwright.async_api import async_playwright
 import time
 import json
 import os
@@ -9,42 +8,97 @@ import asyncio
 from PyQt6.QtWidgets import QInputDialog, QLineEdit, QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog
 from PyQt6.QtCore import QObject, pyqtSignal, QMetaObject, Qt, QThread, pyqtSlot
 from PyQt6.QtGui import QPixmap
+
+from src.config.config import Config
+from src.core.browser_manager import BrowserManager
+from src.core.cookie_jar import cookie_header, get_cookie_jar
+from src.core.resource_policy import ResourcePolicy
+from src.core.selector_resolver import get_selector_resolver
+from src.core.session_probe import SessionProbe
+from src.core.upload_progress import UploadProgressTracker, UploadStalled
+from src.core.waiter import PageWaiter
 log_path = os.path.expanduser('~/Desktop/xhsai_error.log')
 logging.basicConfig(filename=log_path, level=logging.DEBUG)
 
+# 发送验证码按钮的候选选择器，页面改版时在这里追加
+SEND_CODE_SELECTORS = [
+    ".css-uyobdj",
+    ".css-1vfl29",
+    "//button[text()='发送验证码']",
+]
+
+# 发布编辑器地址，以及各创作类型在 .creator-tab 中的位置
+PUBLISH_URL = "https://creator.xiaohongshu.com/publish/publish?source=official"
+PUBLISH_TAB_INDEX = {"article": 1, "video": 2}
+
+# 视频上传超过该秒数没有进展即重新上传，最多重试 UPLOAD_RETRIES 次
+UPLOAD_STALL_TIMEOUT = 30
+UPLOAD_RETRIES = 2
+# 有上传请求正在进行时的停滞阈值，请求挂起超过该秒数同样重新上传
+UPLOAD_IN_FLIGHT_STALL_TIMEOUT = 120
+
 class VerificationCodeHandler(QObject):
+    """在主线程弹出验证码输入框
+
+    从浏览器线程以非阻塞的队列调用显示对话框，通过 Future 等待输入结果，
+    等待验证码期间事件循环中其他账号的操作、截止时间和取消都照常进行。
+    """
     code_received = pyqtSignal(str)
     
     def __init__(self):
         super().__init__()
         self.code = None
         self.dialog = None
+        self._loop = None
+        self._future = None
         
     async def get_verification_code(self):
+        self._loop = asyncio.get_running_loop()
+        self._future = self._loop.create_future()
         # 确保在主线程中执行
         if QApplication.instance().thread() != QThread.currentThread():
             # 如果不在主线程，使用moveToThread移动到主线程
             self.moveToThread(QApplication.instance().thread())
-            # 使用invokeMethod确保在主线程中执行
-            QMetaObject.invokeMethod(self, "_show_dialog", Qt.ConnectionType.BlockingQueuedConnection)
+            # 排队到主线程执行，不阻塞当前事件循环
+            QMetaObject.invokeMethod(self, "_show_dialog", Qt.ConnectionType.QueuedConnection)
         else:
             # 如果已经在主线程，直接执行
             self._show_dialog()
-        
+
         # 等待代码输入完成
-        while self.code is None:
-            await asyncio.sleep(0.1)
-            
+        try:
+            self.code = await self._future
+        except asyncio.CancelledError:
+            # 操作被取消或超时，关闭仍在显示的对话框
+            QMetaObject.invokeMethod(self, "_close_dialog", Qt.ConnectionType.QueuedConnection)
+            raise
         return self.code
     
     @pyqtSlot()
     def _show_dialog(self):
-        code, ok = QInputDialog.getText(None, "验证码", "请输入验证码:", QLineEdit.EchoMode.Normal)
-        if ok:
-            self.code = code
+        self.dialog = QInputDialog()
+        self.dialog.setWindowTitle("验证码")
+        self.dialog.setLabelText("请输入验证码:")
+        self.dialog.setTextEchoMode(QLineEdit.EchoMode.Normal)
+        self.dialog.finished.connect(self._on_dialog_finished)
+        self.dialog.open()
+
+    def _on_dialog_finished(self, result):
+        dialog, self.dialog = self.dialog, None
+        if dialog is None:
+            return
+        code = dialog.textValue() if result == QInputDialog.DialogCode.Accepted else ""
+        dialog.deleteLater()
+        if code:
             self.code_received.emit(code)
-        else:
-            self.code = ""
+        future, loop = self._future, self._loop
+        if future is not None and loop is not None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(code))
+
+    @pyqtSlot()
+    def _close_dialog(self):
+        if self.dialog is not None:
+            self.dialog.reject()
 
 def filter_cookies(cookies):
     """
@@ -69,26 +123,52 @@ def filter_cookies(cookies):
         "x-user-id-creator.xiaohongshu.com"
     ]
     
-    # 筛选需要的cookie
-    filtered_cookies = {}
-    for cookie in cookies:
-        if cookie["name"] in required_cookie_names:
-            filtered_cookies[cookie["name"]] = cookie["value"]
-    
-    # 将筛选后的cookie转换为字符串格式
-    result = "; ".join([f"{name}={value}" for name, value in filtered_cookies.items()])
-    return result
+    # 筛选需要的cookie并转换为字符串格式
+    return cookie_header(cookies, names=required_cookie_names)
 
 class XiaohongshuPoster:
-    def __init__(self):
+    def __init__(self, persistent_profile=None, account_id=None, browser_manager=None):
+        """
+        Args:
+            persistent_profile: 是否使用持久化的浏览器用户目录，None 时读取 browser 配置
+            account_id: 账号标识（通常是手机号），用于区分各账号的 cookies 和用户目录
+            browser_manager: 共享的 BrowserManager，为空时单独启动一个浏览器
+        """
+        browser_config = Config().get_browser_config()
+        if persistent_profile is None:
+            persistent_profile = browser_config.get('persistent_profile', False)
+        self.persistent_profile = persistent_profile
+        self.profile_dir = os.path.expanduser(browser_config.get('profile_dir') or
+                                              os.path.join('~', '.xhs_system', 'browser_profile'))
+        self.account_id = account_id
+        self.browser_manager = browser_manager or BrowserManager()
+        # 自己创建的浏览器需要在关闭时一起释放
+        self._owns_browser_manager = browser_manager is None
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
         self.verification_handler = VerificationCodeHandler()
+        self.selector_resolver = get_selector_resolver()
+        self.resource_policy = ResourcePolicy.from_config()
+        self.session_probe = SessionProbe()
         self.loop = None
+        # 最近一次操作各等待步骤的耗时
+        self.last_timings = []
+        # 预热的发布标签页: kind -> asyncio.Task，以及正在使用的发布标签页
+        self._warm_tabs = {}
+        self._publish_pages = {}
+        # 只预热最近使用的发布类型，避免每个账号同时多开标签页
+        self.last_publish_kind = "article"
+        # 填写完成、等待用户检查发布的标签页: page -> 填写完成时间
+        self._drafts = {}
+        # 上传进度回调: callback(百分比, 字节/秒)
+        self.progress_callback = None
+        # 冷启动耗时统计
+        self._init_started_at = None
+        self.launch_seconds = None
         # 不再在初始化时调用 initialize，而是让调用者显式调用
-        
+
     async def initialize(self):
         """初始化浏览器"""
         if self.playwright is not None:
@@ -96,66 +176,30 @@ class XiaohongshuPoster:
             
         try:
             print("开始初始化Playwright...")
-            self.playwright = await async_playwright().start()
-
-            # 获取可执行文件所在目录
-            launch_args = {
-                'headless': False,
-                'args': [
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--disable-extensions',
-                    '--disable-infobars',
-                    '--start-maximized',
-                    '--ignore-certificate-errors',
-                    '--ignore-ssl-errors'
-                ]
-            }
-
-            chromium_path = None
-
-            if getattr(sys, 'frozen', False):
-                # 如果是打包后的可执行文件
-                executable_dir = os.path.dirname(sys.executable)
-                logging.debug(f"executable_dir: {executable_dir}")
-                if sys.platform == 'darwin':  # macOS系统
-                    if 'XhsAi' in executable_dir:
-                        # 如果在 DMG 中运行
-                        browser_path = os.path.join(
-                            executable_dir, "ms-playwright")
-                    else:
-                        # 如果已经安装到应用程序文件夹
-                        browser_path = os.path.join(
-                            executable_dir, "Contents", "MacOS", "ms-playwright")
-                    logging.debug(f"浏览器路径: {browser_path}")
-                    chromium_path = os.path.join(
-                        browser_path, "chromium-1161/chrome-mac/Chromium.app/Contents/MacOS/Chromium")
-                else:
-                    # Windows系统
-                    executable_dir = sys._MEIPASS
-                    print(f"临时解压目录: {executable_dir}")
-                    browser_path = os.path.join(executable_dir, "ms-playwright")
-                    print(f"浏览器路径: {browser_path}")
-                    chromium_path = os.path.join(
-                        browser_path, "chrome-win", "chrome.exe")
-                    logging.debug(f"Chromium 路径: {chromium_path}")
-            logging.debug(f"Chromium 路径: {chromium_path}")
-            if chromium_path:
-                # 确保浏览器文件存在且有执行权限
-                if os.path.exists(chromium_path):
-                    os.chmod(chromium_path, 0o755)
-                    launch_args['executable_path'] = chromium_path
-                else:
-                    raise Exception(f"浏览器文件不存在: {chromium_path}")
-
-            # 获取默认的 Chromium 可执行文件路径
-            self.browser = await self.playwright.chromium.launch(**launch_args)
-            # 创建新的上下文时设置权限
-            self.context = await self.browser.new_context(
-                permissions=['geolocation']  # 自动允许位置信息访问
-            )
-            self.page = await self.context.new_page()
+            self._init_started_at = time.perf_counter()
+            self.playwright = await self.browser_manager.start()
+            self.browser_manager.register(self)
+
+            profile_dir = self._account_profile_dir()
+            profile_is_new = not os.path.exists(profile_dir)
+            if self.persistent_profile:
+                # 持久化用户目录：HTTP 缓存、service worker 和登录会话在重启后保留
+                self.context = await self.browser_manager.launch_persistent_context(
+                    profile_dir,
+                    permissions=['geolocation']  # 自动允许位置信息访问
+                )
+                self.browser = None
+                self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+            else:
+                # 共享浏览器中为当前账号创建独立的上下文，创建时设置权限
+                self.browser = await self.browser_manager.get_browser()
+                self.context = await self.browser_manager.new_context(
+                    permissions=['geolocation']  # 自动允许位置信息访问
+                )
+                self.page = await self.context.new_page()
+
+            # 拦截发布流程不需要的资源并统计节省的流量和加载时间
+            await self.resource_policy.install(self.context, persistent=self.persistent_profile)
             
             # 注入stealth.min.js
             stealth_js = """
@@ -203,7 +247,8 @@ class XiaohongshuPoster:
                 };
             })();
             """
-            await self.page.add_init_script(stealth_js)
+            # 注入到上下文，之后新建的页面同样生效
+            await self.context.add_init_script(stealth_js)
             
             print("浏览器启动成功！")
             logging.debug("浏览器启动成功！")
@@ -214,11 +259,19 @@ class XiaohongshuPoster:
             if not os.path.exists(app_dir):
                 os.makedirs(app_dir)
 
-            # 设置token和cookies文件路径
-            self.token_file = os.path.join(app_dir, "xiaohongshu_token.json")
-            self.cookies_file = os.path.join(app_dir, "xiaohongshu_cookies.json")
+            # 设置token和cookies文件路径（每个账号独立）
+            suffix = f"_{self.account_id}" if self.account_id else ""
+            self.token_file = os.path.join(app_dir, f"xiaohongshu_token{suffix}.json")
+            self.cookies_file = os.path.join(app_dir, f"xiaohongshu_cookies{suffix}.json")
+            # 同一账号的 cookies 在进程内只读取一次文件
+            self.cookie_jar = get_cookie_jar(self.cookies_file)
             self.token = self._load_token()
-            await self._load_cookies()
+            # 持久化用户目录自带会话，只有新建目录时才需要从文件导入 cookies
+            if not self.persistent_profile or profile_is_new:
+                await self._load_cookies()
+
+            self.launch_seconds = time.perf_counter() - self._init_started_at
+            print(f"浏览器启动耗时: {self.launch_seconds:.2f}s（{self._startup_mode()}）")
 
         except Exception as e:
             print(f"初始化过程中出现错误: {str(e)}")
@@ -250,27 +303,20 @@ class XiaohongshuPoster:
             json.dump(token_data, f)
 
     async def _load_cookies(self):
-        """从文件加载cookies"""
-        if os.path.exists(self.cookies_file):
+        """把账号的cookies加入上下文"""
+        cookies = self.cookie_jar.cookies()
+        if cookies:
             try:
-                with open(self.cookies_file, 'r') as f:
-                    cookies = json.load(f)
-                    # 确保cookies包含必要的字段
-                    for cookie in cookies:
-                        if 'domain' not in cookie:
-                            cookie['domain'] = '.xiaohongshu.com'
-                        if 'path' not in cookie:
-                            cookie['path'] = '/'
-                    await self.context.add_cookies(cookies)
+                await self.context.add_cookies(cookies)
             except Exception as e:
                 logging.debug(f"加载cookies失败: {str(e)}")
 
     async def _save_cookies(self):
         """保存cookies"""
         try:
-            # 原有的保存逻辑
             cookies = await self.context.cookies()
-            self.cookie = ';'.join([f"{c['name']}={c['value']}" for c in cookies])
+            self.cookie_jar.replace(cookies)
+            self.cookie = self.cookie_jar.header()
             
             # 新增：使用 filter_cookies 处理 cookies 并发送信号
             try:
@@ -282,17 +328,83 @@ class XiaohongshuPoster:
                         await self.on_cookies_saved(filtered_cookie)
             except Exception as e:
                 print(f"处理 cookie 时出错（不影响主功能）: {str(e)}")
-                
+
+            # 有变化时一次性写入文件
+            self.cookie_jar.flush()
         except Exception as e:
             print(f"保存cookies失败: {str(e)}")
 
+    def _account_profile_dir(self):
+        """持久化用户目录，多账号时每个账号一个子目录"""
+        if self.account_id:
+            return os.path.join(self.profile_dir, str(self.account_id))
+        return self.profile_dir
+
+    def _startup_mode(self):
+        return "持久化用户目录" if self.persistent_profile else "临时上下文"
+
+    def _record_cold_start(self):
+        """记录从启动浏览器到进入已登录创作者页面的耗时，便于对比两种启动模式"""
+        if self._init_started_at is None:
+            return
+        total = time.perf_counter() - self._init_started_at
+        record = {
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'mode': 'persistent' if self.persistent_profile else 'ephemeral',
+            'launch_seconds': round(self.launch_seconds or 0, 3),
+            'cold_start_seconds': round(total, 3),
+        }
+        print(f"冷启动到已登录页面耗时: {total:.2f}s（{self._startup_mode()}）")
+        try:
+            stats_file = os.path.join(os.path.expanduser('~'), '.xhs_system', 'startup_times.jsonl')
+            with open(stats_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+        except Exception as e:
+            logging.debug(f"记录冷启动耗时失败: {str(e)}")
+        self._init_started_at = None
+
     async def login(self, phone, country_code="+86"):
         """登录小红书"""
+        await self._login(phone, country_code)
+        # 登录后在后台准备好最近使用的发布标签页，不抢占当前页面的焦点
+        if self.page and "login" not in self.page.url:
+            self.warm_publish_tab(self.last_publish_kind, keep_front=self.page)
+
+    async def _login(self, phone, country_code="+86"):
         await self.ensure_browser()  # 确保浏览器已初始化
         # 如果token有效则直接返回
         if self.token:
             return
 
+        # 先用一次接口请求检查已有会话（持久化用户目录或已加载的 cookies），有效时无需打开登录页
+        session_valid = await self.session_probe.check(self.context)
+        if session_valid:
+            print(f"{'使用持久化会话' if self.persistent_profile else '使用cookies'}登录成功")
+            self.token = self._load_token()
+            self._record_cold_start()
+            await self._save_cookies()
+            return
+        if session_valid is False:
+            # 已确认失效，清理无效的cookies后直接手动登录
+            await self.context.clear_cookies()
+        else:
+            # 接口无法判断时回退到页面检查
+            await self._navigation_login_check()
+            if "login" not in self.page.url:
+                print("使用cookies登录成功")
+                self.token = self._load_token()
+                self._record_cold_start()
+                await self._save_cookies()
+                return
+            # 清理无效的cookies
+            await self.context.clear_cookies()
+
+        # 如果cookies登录失败，则进行手动登录
+        await self._manual_login(phone)
+        self.session_probe.invalidate()
+
+    async def _navigation_login_check(self):
+        """加载登录页，根据是否跳转判断 cookies 是否有效"""
         # 尝试加载cookies进行登录
         await self.page.goto("https://creator.xiaohongshu.com/login", wait_until="networkidle")
         # 先清除所有cookies
@@ -303,36 +415,20 @@ class XiaohongshuPoster:
         # 刷新页面并等待加载完成
         await self.page.reload(wait_until="networkidle")
 
-        # 检查是否已经登录
-        current_url = self.page.url
-        if "login" not in current_url:
-            print("使用cookies登录成功")
-            self.token = self._load_token()
-            await self._save_cookies()
-            return
-        else:
-            # 清理无效的cookies
-            await self.context.clear_cookies()
-            
-        # 如果cookies登录失败，则进行手动登录
+    async def _manual_login(self, phone):
+        """输入手机号和验证码登录"""
+        waiter = self._new_waiter()
         await self.page.goto("https://creator.xiaohongshu.com/login")
-        await asyncio.sleep(1)
+        await waiter.visible("//input[@placeholder='手机号']", "登录页就绪")
 
         # 输入手机号
         await self.page.fill("//input[@placeholder='手机号']", phone)
 
-        await asyncio.sleep(2)
-        # 点击发送验证码按钮
+        # 点击发送验证码按钮（同时尝试所有候选选择器）
         try:
-            await self.page.click(".css-uyobdj")
-        except:
-            try:
-                await self.page.click(".css-1vfl29")
-            except:
-                try:
-                    await self.page.click("//button[text()='发送验证码']")
-                except:
-                    print("无法找到发送验证码按钮")
+            await self.selector_resolver.click(self.page, "login", "send_code", SEND_CODE_SELECTORS)
+        except Exception:
+            print("无法找到发送验证码按钮")
 
         # 使用信号机制获取验证码
         verification_code = await self.verification_handler.get_verification_code()
@@ -342,8 +438,10 @@ class XiaohongshuPoster:
         # 点击登录按钮
         await self.page.click(".beer-login-btn")
 
-        # 等待登录成功
-        await asyncio.sleep(3)
+        # 等待跳转离开登录页
+        await waiter.url(lambda url: "login" not in url, "登录跳转", timeout=30, required=False)
+        self._finish_waiter(waiter, "登录")
+        self._record_cold_start()
         # 保存cookies
         await self._save_cookies()
 
@@ -355,35 +453,27 @@ class XiaohongshuPoster:
             images: 图片路径列表
         """
         await self.ensure_browser()  # 确保浏览器已初始化
-        print("点击发布按钮")
-        # 点击发布按钮
-        await self.page.click(".btn.el-tooltip__trigger.el-tooltip__trigger")
-
-        # 切换到上传图文
-        await asyncio.sleep(1)
-        tabs = await self.page.query_selector_all(".creator-tab")
-        if len(tabs) > 1:
-            await tabs[1].click()
-        await asyncio.sleep(1)
+        waiter = self._new_waiter()
+        # 使用预热的图文发布标签页
+        page = await self._take_publish_page("article", waiter)
 
         # 上传图片
+        upload = None
         if images:
-            async with self.page.expect_file_chooser() as fc_info:
-                await self.page.click(".upload-input")
+            async with page.expect_file_chooser() as fc_info:
+                await page.click(".upload-input")
             file_chooser = await fc_info.value
             await file_chooser.set_files(images)
-            await asyncio.sleep(1)
-
-        await asyncio.sleep(3)
-        # 输入标题
-        await self.page.fill(".d-text", title)
+            # 图片预览渲染完成视为上传完成
+            upload = self._wait_image_previews(waiter)
 
-        # 输入内容
+        # 上传的同时填写标题和内容
         print(content)
-        await self.page.fill(".ql-editor", content)
+        await self._fill_while_uploading(page, waiter, upload, title, content, editor_timeout=60)
+        self._finish_waiter(waiter, "发布图文")
+        await self._after_publish_filled(page, "article")
 
         # 发布
-        await asyncio.sleep(1)
         # await self.page.click(".el-button.publishBtn")
 
     async def post_video(self, title, content, video_path=None):
@@ -404,60 +494,272 @@ class XiaohongshuPoster:
                 raise FileNotFoundError(f"视频文件不存在：{video_path}")
         
         await self.ensure_browser()  # 确保浏览器已初始化
-        print("点击发布按钮")
+        waiter = self._new_waiter()
         try:
-            # 点击发布按钮
-            await self.page.click(".btn.el-tooltip__trigger.el-tooltip__trigger")
-
-            # 切换到上传视频
-            await asyncio.sleep(1)
-            tabs = await self.page.query_selector_all(".creator-tab")
-            if len(tabs) > 2:  # 确保有视频上传选项
-                await tabs[2].click()
-            else:
-                raise Exception("找不到视频上传选项")
-            await asyncio.sleep(1)
+            # 使用预热的视频发布标签页
+            page = await self._take_publish_page("video", waiter)
 
             # 上传视频
+            upload = None
             if video_path:
-                async with self.page.expect_file_chooser() as fc_info:
-                    await self.page.click(".upload-input")
+                async with page.expect_file_chooser() as fc_info:
+                    await page.click(".upload-input")
                 file_chooser = await fc_info.value
                 await file_chooser.set_files(video_path)
                 print("开始上传视频...")
-                await asyncio.sleep(3)  # 等待视频上传开始
-                
-                # 等待上传完成（可以根据实际情况调整等待时间或添加上传进度检测）
-                await self.page.wait_for_selector(".upload-success", timeout=300000)  # 5分钟超时
-                print("视频上传完成")
-
-            # 输入标题
-            await self.page.fill(".d-text", title)
+                upload = self._wait_video_upload(page, waiter, video_path)
 
-            # 输入描述
-            await self.page.fill(".ql-editor", content)
+            # 视频上传的同时填写标题和描述
+            await self._fill_while_uploading(page, waiter, upload, title, content)
+            self._finish_waiter(waiter, "发布视频")
+            await self._after_publish_filled(page, "video")
 
             # 发布
-            await asyncio.sleep(1)
             # await self.page.click(".el-button.publishBtn")
             
         except Exception as e:
             logging.error(f"发布视频时出错: {str(e)}")
             raise Exception(f"发布视频失败: {str(e)}")
 
+    async def _wait_image_previews(self, waiter):
+        """等待编辑区出现并且图片预览渲染完成"""
+        await waiter.visible(".d-text", "编辑区就绪", timeout=60)
+        await waiter.dom_settled(step="图片预览稳定", timeout=5)
+
+    async def _wait_video_upload(self, page, waiter, video_path):
+        """等待视频上传完成，上传停滞时重新选择文件上传"""
+        tracker = UploadProgressTracker(page, os.path.getsize(video_path),
+                                        callback=self.progress_callback,
+                                        stall_timeout=UPLOAD_STALL_TIMEOUT,
+                                        in_flight_stall_timeout=UPLOAD_IN_FLIGHT_STALL_TIMEOUT)
+        tracker.start()
+        try:
+            for attempt in range(UPLOAD_RETRIES + 1):
+                try:
+                    await tracker.wait(waiter.visible(".upload-success", "视频上传", timeout=300))  # 5分钟超时
+                    print(f"视频上传完成，耗时 {time.time() - tracker.started_at:.1f}s")
+                    return
+                except UploadStalled as e:
+                    if attempt == UPLOAD_RETRIES:
+                        raise Exception(f"视频上传失败: {str(e)}")
+                    # 上传区域已经被替换（例如进入了编辑状态）时无法重新选择文件
+                    if await page.query_selector(".upload-input") is None:
+                        raise Exception(f"视频上传失败: {str(e)}，找不到上传区域，无法重新上传")
+                    print(f"{str(e)}，重新上传（第 {attempt + 1} 次）")
+                    tracker.reset()
+                    await page.set_input_files(".upload-input", video_path)
+        finally:
+            tracker.stop()
+
+    async def _fill_metadata(self, page, waiter, title, content, editor_timeout=None):
+        """填写标题和正文（话题标签包含在正文中）"""
+        await waiter.visible(".d-text", "编辑区就绪", timeout=editor_timeout)
+        # 输入标题
+        await page.fill(".d-text", title)
+        # 输入内容
+        await page.fill(".ql-editor", content)
+
+    async def _fill_while_uploading(self, page, waiter, upload, title, content, editor_timeout=None):
+        """上传和填写表单同时进行，两者都完成后才能发布
+
+        任何一方失败都会取消另一方并抛出异常。
+        """
+        tasks = [asyncio.create_task(self._fill_metadata(page, waiter, title, content, editor_timeout))]
+        if upload is not None:
+            tasks.append(asyncio.create_task(upload))
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _select_publish_tab(self, page, waiter, kind):
+        """在发布页切换到对应的创作类型"""
+        await waiter.visible(".creator-tab", "发布页就绪")
+        tabs = await page.query_selector_all(".creator-tab")
+        index = PUBLISH_TAB_INDEX[kind]
+        if len(tabs) > index:
+            await tabs[index].click()
+        elif kind == "video":  # 确保有视频上传选项
+            raise Exception("找不到视频上传选项")
+        await waiter.attached(".upload-input", "上传区域就绪")
+
+    async def _prepare_publish_page(self, kind, keep_front=None):
+        """打开一个停在发布编辑器上的新标签页，并切换到对应的创作类型
+
+        keep_front 为需要保持在前台的页面，新标签页打开后把它切回前台。
+        """
+        page = await self.context.new_page()
+        try:
+            if keep_front is not None and not keep_front.is_closed():
+                await keep_front.bring_to_front()
+            await page.goto(PUBLISH_URL, wait_until="domcontentloaded")
+            await self._select_publish_tab(page, PageWaiter(page), kind)
+        except Exception:
+            await page.close()
+            raise
+        return page
+
+    def warm_publish_tab(self, kind, keep_front=None):
+        """在后台准备一个发布标签页（已存在则跳过）
+
+        同时只保留一个预热标签页，其他类型的预热标签页会被丢弃。
+        """
+        if self.context is None or kind in self._warm_tabs:
+            return
+        for other in list(self._warm_tabs):
+            self._discard_warm_tab(other)
+        task = asyncio.create_task(self._prepare_publish_page(kind, keep_front))
+        # 失败时在取用时处理，这里只避免未读取异常的警告
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._warm_tabs[kind] = task
+
+    def _discard_warm_tab(self, kind):
+        task = self._warm_tabs.pop(kind, None)
+        if task is None:
+            return
+
+        def close_page(t):
+            if not t.cancelled() and t.exception() is None:
+                asyncio.ensure_future(t.result().close())
+        task.add_done_callback(close_page)
+        task.cancel()
+
+    def pending_draft_age(self):
+        """最新一个仍然打开的待检查草稿已经等待的秒数，没有时返回 None"""
+        for page in [page for page in self._drafts if page.is_closed()]:
+            self._drafts.pop(page, None)
+        if not self._drafts:
+            return None
+        return time.time() - max(self._drafts.values())
+
+    def _on_draft_closed(self, page):
+        self._drafts.pop(page, None)
+        self.browser_manager.draft_closed()
+
+    async def _after_publish_filled(self, page, kind):
+        """填写完成后把待检查的标签页切到前台，再在后台准备下一次使用的标签页"""
+        self.last_publish_kind = kind
+        if page not in self._drafts:
+            page.on("close", lambda: self._on_draft_closed(page))
+        # 用户检查并发布前不回收浏览器，避免关闭填写好的草稿
+        self._drafts[page] = time.time()
+        try:
+            await page.bring_to_front()
+        except Exception as e:
+            logging.debug(f"切换到发布标签页失败: {str(e)}")
+        self.warm_publish_tab(kind, keep_front=page)
+
+    async def _take_publish_page(self, kind, waiter):
+        """取用预热的发布标签页，没有时直接打开发布页"""
+        page = None
+        task = self._warm_tabs.pop(kind, None)
+        if task is not None:
+            try:
+                page = await task
+                if page.is_closed():
+                    page = None
+            except Exception as e:
+                logging.debug(f"预热发布标签页不可用: {str(e)}")
+
+        if page is None:
+            # 没有预热的标签页（例如浏览器刚被回收），直接打开发布页
+            try:
+                page = await self._prepare_publish_page(kind)
+            except Exception as e:
+                logging.debug(f"直接打开发布页失败: {str(e)}")
+
+        waiter.page = page or self.page
+        if page is None:
+            # 没有可用的预热标签页，按原流程在主页面点击发布按钮
+            page = self.page
+            print("点击发布按钮")
+            await page.click(".btn.el-tooltip__trigger.el-tooltip__trigger")
+            await self._select_publish_tab(page, waiter, kind)
+        else:
+            await page.bring_to_front()
+
+        # 关闭上一次同类型的发布标签页，避免标签页越积越多
+        previous = self._publish_pages.get(kind)
+        if previous is not None and previous is not self.page and previous is not page:
+            try:
+                await previous.close()
+            except Exception:
+                pass
+        self._publish_pages[kind] = page
+        return page
+
+    def _new_waiter(self, page=None):
+        """为一次操作创建等待器"""
+        return PageWaiter(page or self.page)
+
+    def _finish_waiter(self, waiter, action):
+        """记录一次操作中各步骤的实际等待时间"""
+        self.last_timings = list(waiter.timings)
+        print(f"{action}: {waiter.report()}")
+        logging.debug(f"{action}: {waiter.report()}")
+
+    async def _release_tabs(self):
+        """取消预热任务并关闭发布标签页，只保留主页面"""
+        for task in self._warm_tabs.values():
+            task.cancel()
+        await asyncio.gather(*self._warm_tabs.values(), return_exceptions=True)
+        for task in self._warm_tabs.values():
+            if not task.cancelled() and task.exception() is None:
+                await task.result().close()
+        self._warm_tabs = {}
+        for page in self._publish_pages.values():
+            if page is not self.page and not page.is_closed():
+                await page.close()
+        self._publish_pages = {}
+
+    def is_alive(self):
+        """上下文和主页面是否仍然可用"""
+        if self.context is None or self.page is None or self.page.is_closed():
+            return False
+        return self.browser is None or self.browser.is_connected()
+
+    async def suspend(self):
+        """浏览器回收前保存会话并关闭上下文，下次使用时自动重新初始化"""
+        if self.context is None:
+            return
+        try:
+            # 保存会话，下次初始化时从 cookie jar 恢复
+            self.cookie_jar.replace(await self.context.cookies())
+            self.cookie_jar.flush()
+        except Exception as e:
+            logging.debug(f"保存cookies失败: {str(e)}")
+        try:
+            await self._release_tabs()
+            await self.context.close()
+        except Exception as e:
+            logging.debug(f"关闭上下文时出错: {str(e)}")
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.page = None
+
     async def close(self, force=False):
         """关闭浏览器
         Args:
-            force: 是否强制关闭浏览器，默认为False
+            force: 是否强制关闭浏览器，默认为False；
+                   不强制关闭时只释放发布标签页，保留已登录的页面供用户查看
         """
         try:
+            await self._release_tabs()
             if force:
                 if self.context:
                     await self.context.close()
-                if self.browser:
-                    await self.browser.close()
-                if self.playwright:
-                    await self.playwright.stop()
+                # 共享的浏览器由 BrowserManager 的持有者负责关闭
+                if self._owns_browser_manager:
+                    await self.browser_manager.close()
+                else:
+                    self.browser_manager.unregister(self)
                 self.playwright = None
                 self.browser = None
                 self.context = None
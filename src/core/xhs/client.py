@@ -4,11 +4,10 @@ except ImportError:
     print("请先安装 xhs-sdk: pip install xhs-sdk")
     XhsClient = None
 
-from playwright.sync_api import sync_playwright
-import pathlib
-import time
 from datetime import datetime
 
+from src.core.signer.router import get_signer
+
 class XhsClientManager:
     def __init__(self):
         if XhsClient is None:
@@ -16,31 +15,8 @@ class XhsClientManager:
         self.client = None
         
     def sign_local(self, uri, data=None, a1="", web_session=""):
-        """本地签名实现"""
-        for _ in range(10):
-            try:
-                with sync_playwright() as playwright:
-                    chromium = playwright.chromium
-                    browser = chromium.launch(headless=True)
-                    browser_context = browser.new_context()
-                    context_page = browser_context.new_page()
-                    context_page.goto("https://www.xiaohongshu.com")
-                    browser_context.add_cookies([
-                        {'name': 'a1', 'value': a1, 'domain': ".xiaohongshu.com", 'path': "/"}
-                    ])
-                    context_page.reload()
-                    time.sleep(2)
-                    encrypt_params = context_page.evaluate(
-                        "([url, data]) => window._webmsxyw(url, data)", 
-                        [uri, data]
-                    )
-                    return {
-                        "x-s": encrypt_params["X-s"],
-                        "x-t": str(encrypt_params["X-t"])
-                    }
-            except Exception:
-                continue
-        raise Exception("签名失败")
+        """签名实现（由统一签名器选择最快的可用后端）"""
+        return get_signer().sign(uri, data, a1, web_session)
 
     def init_client(self, cookies):
         """初始化客户端"""
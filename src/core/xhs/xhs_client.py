@@ -5,6 +5,8 @@ except ImportError:
     BaseXhsClient = None
 
 from playwright.sync_api import sync_playwright
+
+from src.core.cookie_jar import cookie_header
 import pathlib
 import time
 
@@ -20,13 +22,7 @@ class XhsClient(BaseXhsClient):
             cookies = self.get_cookies()
             
             # 格式化cookie字符串
-            cookie_str = ';'.join([
-                f"{cookie['name']}={cookie['value']}"
-                for cookie in cookies
-                if cookie.get('domain', '').endswith('.xiaohongshu.com')
-            ])
-            
-            return cookie_str
+            return cookie_header(cookies, domain_suffix='.xiaohongshu.com')
         except Exception as e:
             print(f"获取cookie失败: {str(e)}")
             return None
@@ -0,0 +1,9 @@
+// 测试用的签名脚本桩，行为与真实的 window._webmsxyw 接口一致
+window._webmsxyw = function (url, data) {
+    var a1 = (document.cookie.match(/(?:^|; )a1=([^;]*)/) || [])[1] || '';
+    var payload = url + '|' + (data ? JSON.stringify(data) : '') + '|' + a1;
+    return {
+        'X-s': 'XYW_' + btoa(unescape(encodeURIComponent(payload))),
+        'X-t': 1700000000000
+    };
+};
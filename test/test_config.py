@@ -0,0 +1,43 @@
+import json
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config.config import Config, merge_changes
+
+
+def read_settings(home):
+    with open(os.path.join(str(home), '.xhs_system', 'settings.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_loading_complete_config_does_not_write(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    config_file = Config().config_file
+    mtime = os.stat(config_file).st_mtime_ns
+    os.utime(config_file, ns=(mtime - 10**9, mtime - 10**9))
+    Config()
+    assert os.stat(config_file).st_mtime_ns == mtime - 10**9
+
+
+def test_stale_instance_keeps_newer_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    stale = Config()
+    fresh = Config()
+    fresh.update_phone_config("13000000000")
+    fresh.update_author_config("新作者")
+
+    # 旧实例只改了标题，保存时不能把其他实例的修改覆盖回旧值
+    stale.update_title_config("新标题")
+    saved = read_settings(tmp_path)
+    assert saved['phone'] == "13000000000"
+    assert saved['title_edit'] == {"author": "新作者", "title": "新标题"}
+    assert stale.get_phone_config() == "13000000000"
+
+
+def test_merge_changes_removes_deleted_keys():
+    base = {"a": 1, "b": {"x": 1, "y": 1}}
+    mine = {"b": {"x": 2, "y": 1}}
+    theirs = {"a": 1, "b": {"x": 1, "y": 3}, "c": 4}
+    assert merge_changes(base, mine, theirs) == {"b": {"x": 2, "y": 3}, "c": 4}
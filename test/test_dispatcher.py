@@ -0,0 +1,152 @@
+import asyncio
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.dispatcher import (PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, ActionDispatcher,
+                                 ActionTimeout, PriorityGate)
+
+
+def test_gate_releases_by_priority_then_arrival():
+    async def run():
+        gate = PriorityGate(1)
+        await gate.acquire(0)
+        order = []
+
+        async def waiter(name, priority):
+            await gate.acquire(priority)
+            order.append(name)
+            gate.release()
+
+        tasks = [asyncio.create_task(waiter("后台1", 10)),
+                 asyncio.create_task(waiter("交互1", 0)),
+                 asyncio.create_task(waiter("后台2", 10)),
+                 asyncio.create_task(waiter("交互2", 0))]
+        await asyncio.sleep(0)
+        assert gate.waiting() == 4
+        gate.release()
+        await asyncio.gather(*tasks)
+        assert order == ["交互1", "交互2", "后台1", "后台2"]
+        assert gate.in_use == 0
+    asyncio.run(run())
+
+
+def test_gate_cancelled_waiter_does_not_leak():
+    async def run():
+        gate = PriorityGate(1)
+        await gate.acquire(0)
+        task = asyncio.create_task(gate.acquire(0))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert gate.waiting() == 0
+
+        # 已分到名额后被取消，名额交还
+        task = asyncio.create_task(gate.acquire(0))
+        await asyncio.sleep(0)
+        gate.release()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert gate.in_use == 0
+        await asyncio.wait_for(gate.acquire(0), 1)
+    asyncio.run(run())
+
+
+def make_dispatcher(max_concurrency, durations=None):
+    events = []
+    results = {}
+
+    async def handler(action):
+        events.append(("start", action['action_id']))
+        await asyncio.sleep((durations or {}).get(action['action_id'], 0.01))
+        events.append(("end", action['action_id']))
+
+    def on_done(action, status, error):
+        results[action['action_id']] = (status, error)
+
+    dispatcher = ActionDispatcher(handler, key_func=lambda a: a['account'],
+                                  max_concurrency=max_concurrency, on_done=on_done)
+    return dispatcher, events, results
+
+
+def test_same_account_is_serial_and_interactive_first():
+    async def run():
+        dispatcher, events, results = make_dispatcher(4)
+        tasks = [
+            dispatcher.dispatch({'action_id': 'first', 'type': 'preview', 'account': 'a'}),
+            dispatcher.dispatch({'action_id': 'scheduled', 'type': 'preview', 'account': 'a', 'scheduled': True}),
+            dispatcher.dispatch({'action_id': 'click', 'type': 'preview', 'account': 'a'}),
+        ]
+        await asyncio.gather(*tasks)
+        starts = [action_id for kind, action_id in events if kind == "start"]
+        assert starts == ['first', 'click', 'scheduled']
+        # 同一账号串行：每个动作结束后下一个才开始
+        assert [kind for kind, _ in events] == ["start", "end"] * 3
+        assert all(status == "done" for status, _ in results.values())
+    asyncio.run(run())
+
+
+def test_global_limit_across_accounts():
+    async def run():
+        dispatcher, events, _ = make_dispatcher(2, {'a': 0.05, 'b': 0.05, 'c': 0.05})
+        await asyncio.gather(*(dispatcher.dispatch({'action_id': name, 'type': 'preview', 'account': name})
+                               for name in ['a', 'b', 'c']))
+        running = peak = 0
+        for kind, _ in events:
+            running += 1 if kind == "start" else -1
+            peak = max(peak, running)
+        assert peak == 2
+    asyncio.run(run())
+
+
+def test_priority_of():
+    assert ActionDispatcher.priority_of({'type': 'preview'}) == PRIORITY_INTERACTIVE
+    assert ActionDispatcher.priority_of({'type': 'preview', 'scheduled': True}) == PRIORITY_BACKGROUND
+    assert ActionDispatcher.priority_of({'type': 'preview', 'priority': 3}) == 3
+
+
+def test_deadline_includes_queue_time():
+    async def run():
+        dispatcher, events, results = make_dispatcher(1, {'slow': 0.3, 'queued': 0.01})
+        await asyncio.gather(
+            dispatcher.dispatch({'action_id': 'slow', 'type': 'preview', 'account': 'a'}),
+            dispatcher.dispatch({'action_id': 'queued', 'type': 'preview', 'account': 'b', 'deadline': 0.1}),
+        )
+        assert results['slow'] == ("done", None)
+        status, error = results['queued']
+        assert status == "timeout" and isinstance(error, ActionTimeout)
+        # 排队期间就超时，没有开始执行
+        assert ("start", "queued") not in events
+    asyncio.run(run())
+
+
+def test_cancel_running_and_unknown_action():
+    async def run():
+        dispatcher, events, results = make_dispatcher(2, {'long': 5})
+        task = dispatcher.dispatch({'action_id': 'long', 'type': 'video', 'account': 'a'})
+        await asyncio.sleep(0.01)
+        assert dispatcher.stats()["running"] == 1
+        assert dispatcher.cancel('long') is True
+        await task
+        assert results['long'] == ("cancelled", None)
+        assert ("end", "long") not in events
+        assert dispatcher.cancel('long') is False
+        assert dispatcher.stats()["running"] == 0
+    asyncio.run(run())
+
+
+def test_idle_account_gates_are_dropped():
+    async def run():
+        dispatcher, _, results = make_dispatcher(1, {'slow': 0.05})
+        first = dispatcher.dispatch({'action_id': 'slow', 'type': 'preview', 'account': 'a'})
+        second = dispatcher.dispatch({'action_id': 'next', 'type': 'preview', 'account': 'a'})
+        queued = dispatcher.dispatch({'action_id': 'queued', 'type': 'preview', 'account': 'b'})
+        await asyncio.sleep(0.01)
+        # 同一账号的动作共用一个队列
+        assert set(dispatcher._account_gates) == {'a', 'b'}
+        dispatcher.cancel('queued')
+        await asyncio.gather(first, second, queued)
+        assert results['queued'] == ("cancelled", None)
+        assert dispatcher._account_gates == {}
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.processor.cache import GenerationCache, get_or_generate
+
+
+def make_generator(results):
+    calls = []
+
+    async def generate():
+        calls.append(len(calls))
+        return results[len(calls) - 1]
+    return generate, calls
+
+
+def test_cache_hit_and_regenerate(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    key = GenerationCache.make_key("wf", {"BOT_USER_INPUT": "主题"})
+    generate, calls = make_generator([{"title": "第一次"}, {"title": "第二次"}])
+
+    first = asyncio.run(get_or_generate(cache, key, generate))
+    assert first == {"title": "第一次"}
+
+    # 相同参数命中缓存，不再调用生成
+    cached = asyncio.run(get_or_generate(cache, key, generate))
+    assert cached == {"title": "第一次", "from_cache": True}
+    assert len(calls) == 1
+
+    # 重新生成跳过缓存，并用新结果覆盖旧缓存
+    regenerated = asyncio.run(get_or_generate(cache, key, generate, use_cache=False))
+    assert regenerated == {"title": "第二次"}
+    assert len(calls) == 2
+    assert cache.get(key) == {"title": "第二次"}
+
+
+def test_store_filter(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    generate, calls = make_generator([{"title": "本地", "cover_image": None}])
+    asyncio.run(get_or_generate(cache, "k", generate, store=lambda r: r["cover_image"] is not None))
+    assert cache.get("k") is None
+
+
+def test_key_depends_on_parameters():
+    assert GenerationCache.make_key("wf", {"a": 1, "b": 2}) == GenerationCache.make_key("wf", {"b": 2, "a": 1})
+    assert GenerationCache.make_key("wf", {"a": 1}) != GenerationCache.make_key("wf", {"a": 2})
+    assert GenerationCache.make_key("wf", {"a": 1}) != GenerationCache.make_key("other", {"a": 1})
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    cache = GenerationCache(str(tmp_path), ttl=60)
+    cache.put("k", {"title": "t"})
+    assert cache.get("k") == {"title": "t"}
+
+    cache.ttl = -1
+    assert cache.get("k") is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "k.json"))
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    # TTL 足够长，只测试按大小淘汰
+    cache = GenerationCache(str(tmp_path), ttl=10 ** 10, max_bytes=10 ** 6)
+    payload = {"content": "x" * 400}
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, payload)
+        # 固定访问时间，a 最久未使用
+        mtime = 1_000_000_000 + i
+        os.utime(os.path.join(str(tmp_path), f"{key}.json"), (mtime, mtime))
+    size = os.path.getsize(os.path.join(str(tmp_path), "a.json"))
+
+    # 上限只够放三个（创建时间的位数可能不同，留一点余量），写入第四个时淘汰最久未使用的 a，刚写入的 d 保留
+    cache.max_bytes = size * 3 + 64
+    cache.put("d", payload)
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.get("d") is not None
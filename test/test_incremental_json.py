@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.processor.ollama import IncrementalJsonFields, parse_generated_text
+
+DOCUMENT = json.dumps({
+    "title": "夏日穿搭☀️ \"清爽\"",
+    "content": "第一行\n第二行\t缩进 \\ 反斜杠 é",
+    "tags": "穿搭,夏日",
+}, ensure_ascii=True)
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJsonFields()
+    updates = []
+    for i in range(0, len(text), size):
+        updates.append(parser.feed(text[i:i + size]))
+    return parser, updates
+
+
+def test_split_at_every_position():
+    expected = json.loads(DOCUMENT)
+    # 逐字符输入时转义序列和 \uXXXX 都会被截断
+    for size in (1, 2, 3, 7, len(DOCUMENT)):
+        parser, _ = feed_in_chunks(DOCUMENT, size)
+        assert parser.values() == expected
+
+
+def test_values_only_grow():
+    parser, updates = feed_in_chunks(DOCUMENT, 1)
+    seen = {}
+    for changed in updates:
+        for field, value in changed.items():
+            assert value.startswith(seen.get(field, ""))
+            seen[field] = value
+    assert seen == json.loads(DOCUMENT)
+
+
+def test_incomplete_escape_is_held_back():
+    parser = IncrementalJsonFields()
+    assert parser.feed('{"title": "a\\') == {"title": "a"}
+    assert parser.feed('u00') == {}
+    assert parser.feed('e9b"') == {"title": "aéb"}
+    assert parser.values() == {"title": "aéb"}
+
+
+def test_key_split_across_chunks_and_whitespace():
+    parser = IncrementalJsonFields()
+    assert parser.feed('{"ti') == {}
+    assert parser.feed('tle"  :\n ') == {}
+    assert parser.feed('"标题", "content": "正') == {"title": "标题", "content": "正"}
+    assert parser.feed('文"}') == {"content": "正文"}
+
+
+def test_parse_generated_text_fallbacks():
+    assert parse_generated_text('```json\n{"title": "t", "content": "c", "tags": ["a", "b"]}\n```') == \
+        {"title": "t", "content": "c", "tags": "a,b"}
+    assert parse_generated_text("标题\n正文一\n#标签\n正文二") == \
+        {"title": "标题", "content": "正文一\n正文二", "tags": "标签"}
@@ -0,0 +1,39 @@
+import base64
+import os
+import sys
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.signer.js_engine import JsEngineSigner
+
+STUB_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "stub_webmsxyw.js")
+
+
+def decode(x_s):
+    return base64.b64decode(x_s[len("XYW_"):]).decode("utf-8")
+
+
+def test_js_signer():
+    if not JsEngineSigner.available():
+        pytest.skip("未安装 JS 引擎")
+
+    signer = JsEngineSigner(STUB_SCRIPT)
+    signs = signer.sign("/api/sns/web/v1/feed", {"source_note_id": "笔记"}, a1="a1-value")
+    assert signs["x-t"] == "1700000000000"
+    assert decode(signs["x-s"]) == '/api/sns/web/v1/feed|{"source_note_id":"笔记"}|a1-value'
+
+    # 切换账号后签名使用新的 a1
+    signs = signer.sign("/api/sns/web/v1/feed", a1="other")
+    assert decode(signs["x-s"]) == "/api/sns/web/v1/feed||other"
+
+
+def test_js_signer_missing_function(tmp_path):
+    if not JsEngineSigner.available():
+        pytest.skip("未安装 JS 引擎")
+
+    script = tmp_path / "empty.js"
+    script.write_text("var nothing = 1;", encoding="utf-8")
+    with pytest.raises(Exception, match="_webmsxyw is not a function"):
+        JsEngineSigner(str(script))
@@ -0,0 +1,47 @@
+import asyncio
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.processor.cache import GenerationCache
+from src.core.processor.llm import LLMRouter, OllamaBackend, WorkflowBackend
+
+
+class FakeBackend:
+    def __init__(self, backend_class, result):
+        self.name = backend_class.name
+        self.cacheable = backend_class.cacheable
+        self.degraded_kinds = backend_class.degraded_kinds
+        self.result = result
+        self.calls = []
+
+    async def generate(self, client, request, on_token=None):
+        self.calls.append(request['kind'])
+        return dict(self.result)
+
+
+def make_router(tmp_path):
+    workflow = FakeBackend(WorkflowBackend, {'title': "工作流", 'content': "正文"})
+    ollama = FakeBackend(OllamaBackend, {'title': "本地", 'content': "正文", 'tags': "a,b"})
+    router = LLMRouter([workflow, ollama], health_interval=0, cache=GenerationCache(str(tmp_path)))
+    return router, workflow, ollama
+
+
+def test_video_prefers_streaming_backend(tmp_path):
+    router, workflow, ollama = make_router(tmp_path)
+    request = {'kind': 'video', 'topic': "主题"}
+    result = asyncio.run(router.generate(None, request))
+    assert result['backend'] == "ollama" and not result['degraded']
+    assert workflow.calls == [] and ollama.calls == ['video']
+
+
+def test_article_prefers_workflow_and_kinds_do_not_share_cache(tmp_path):
+    router, workflow, ollama = make_router(tmp_path)
+    article = asyncio.run(router.generate(None, {'kind': 'article', 'topic': "主题"}))
+    assert article['backend'] == "workflow"
+
+    # 同一主题的视频文案不能命中图文的缓存结果
+    video = asyncio.run(router.generate(None, {'kind': 'video', 'topic': "主题"}))
+    assert video['backend'] == "ollama" and 'from_cache' not in video
+    assert router.cache_key({'kind': 'article', 'topic': "主题"}) != router.cache_key({'kind': 'video', 'topic': "主题"})
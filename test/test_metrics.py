@@ -0,0 +1,33 @@
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.metrics import BackendStats, order_by_latency
+
+
+def names(stats_list):
+    return [stats.name for stats in order_by_latency(stats_list)]
+
+
+def test_measured_before_unmeasured_in_given_order():
+    pool, remote, js = BackendStats("pool"), BackendStats("remote"), BackendStats("js")
+    assert names([pool, remote, js]) == ["pool", "remote", "js"]
+
+    # 第一次调用后 pool 已测量，下一次仍然先用 pool，而不是去试探 remote
+    pool.record_success(300)
+    assert names([pool, remote, js]) == ["pool", "remote", "js"]
+
+    js.record_success(10)
+    assert names([pool, remote, js]) == ["js", "pool", "remote"]
+
+
+def test_failures_and_cooldown_go_last():
+    fast, slow = BackendStats("fast", failure_threshold=2), BackendStats("slow")
+    fast.record_success(10)
+    slow.record_success(500)
+    fast.record_failure(10)
+    assert names([fast, slow]) == ["slow", "fast"]
+
+    slow.mark_unhealthy()
+    assert names([fast, slow]) == ["fast", "slow"]
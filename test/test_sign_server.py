@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import sys
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.signer.server import MAX_BODY_SIZE, MAX_HEADERS, MAX_LINE_SIZE, SignServer
+
+
+class FakePool:
+    waiting = 0
+
+    async def sign(self, uri, data=None, a1="", web_session=""):
+        return {"x-s": f"sign:{uri}:{a1}", "x-t": "1"}
+
+    def stats(self):
+        return {}
+
+
+def exchange(raw):
+    """发送原始请求，返回 (状态码, JSON 响应体)"""
+    async def run():
+        server = SignServer(FakePool(), port=0)
+        await server.listen()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(raw)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+        finally:
+            server.server.close()
+            await server.server.wait_closed()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+    return asyncio.run(run())
+
+
+def post(body, extra_headers=b""):
+    return (b"POST /sign HTTP/1.1\r\nConnection: close\r\n" + extra_headers +
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+
+
+def test_sign_ok():
+    status, payload = exchange(post(b'{"uri": "/api/x", "a1": "a"}'))
+    assert status == 200
+    assert payload["x-s"] == "sign:/api/x:a"
+
+
+def test_body_must_be_object_with_uri():
+    for body in (b"[1]", b'"x"', b"not json", b'{"data": 1}'):
+        status, _ = exchange(post(body))
+        assert status == 400, body
+
+
+def test_bad_content_length():
+    assert exchange(b"POST /sign HTTP/1.1\r\nContent-Length: abc\r\n\r\n")[0] == 400
+    assert exchange(b"POST /sign HTTP/1.1\r\nContent-Length: -5\r\n\r\n")[0] == 400
+    big = str(MAX_BODY_SIZE + 1).encode()
+    assert exchange(b"POST /sign HTTP/1.1\r\nContent-Length: " + big + b"\r\n\r\n")[0] == 413
+
+
+def test_malformed_request_line():
+    assert exchange(b"GARBAGE\r\n\r\n")[0] == 400
+
+
+def test_header_limits():
+    long_header = b"X-Long: " + b"a" * (MAX_LINE_SIZE * 2) + b"\r\n"
+    assert exchange(post(b'{"uri": "/"}', long_header))[0] == 431
+
+    many_headers = b"".join(b"X-H%d: 1\r\n" % i for i in range(MAX_HEADERS + 1))
+    assert exchange(post(b'{"uri": "/"}', many_headers))[0] == 431
+
+
+def test_unknown_path_and_method():
+    assert exchange(b"GET /nope HTTP/1.1\r\nConnection: close\r\n\r\n")[0] == 404
+    assert exchange(b"GET /sign HTTP/1.1\r\nConnection: close\r\n\r\n")[0] == 405
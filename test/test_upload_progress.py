@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.upload_progress import UploadProgressTracker, UploadStalled
+
+
+class FakeRequest:
+    def __init__(self, url="https://ros-upload.example.com/part", method="PUT", size=100):
+        self.url = url
+        self.method = method
+        self.post_data_buffer = b"x" * size
+
+    async def sizes(self):
+        return {"requestBodySize": len(self.post_data_buffer)}
+
+
+class FakePage:
+    def __init__(self, percent=None):
+        self.handlers = {}
+        self.percent = percent
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def remove_listener(self, event, handler):
+        self.handlers.pop(event, None)
+
+    async def evaluate(self, script):
+        return self.percent
+
+
+def make_tracker(page, **kwargs):
+    options = dict(stall_timeout=0.05, in_flight_stall_timeout=0.2, poll_interval=0.01)
+    options.update(kwargs)
+    tracker = UploadProgressTracker(page, 1000, **options)
+    tracker.start()
+    return tracker
+
+
+def test_hung_in_flight_request_is_stalled():
+    page = FakePage()
+    tracker = make_tracker(page)
+    page.handlers["request"](FakeRequest())
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(UploadStalled):
+            await tracker.wait(asyncio.sleep(10))
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+    # 有请求在进行时使用更长的阈值，但请求挂起仍会判定停滞
+    assert 0.2 <= elapsed < 5
+    assert tracker.in_flight == 1
+
+
+def test_finished_requests_report_progress():
+    page = FakePage()
+    reports = []
+    tracker = make_tracker(page, callback=lambda percent, speed: reports.append(percent))
+
+    async def upload():
+        for _ in range(3):
+            request = FakeRequest(size=200)
+            page.handlers["request"](request)
+            await asyncio.sleep(0.02)
+            await page.handlers["requestfinished"](request)
+        return "done"
+
+    assert asyncio.run(tracker.wait(upload())) == "done"
+    assert tracker.uploaded_bytes == 600 and tracker.in_flight == 0
+    assert reports[:3] == [20.0, 40.0, 60.0] and reports[-1] == 100.0
+
+
+def test_idle_without_requests_is_stalled():
+    tracker = make_tracker(FakePage(percent=10))
+    with pytest.raises(UploadStalled):
+        asyncio.run(tracker.wait(asyncio.sleep(10)))
+    assert tracker.percent == 10